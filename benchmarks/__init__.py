@@ -0,0 +1 @@
+"""Benchmarks of the pv_assignments package."""
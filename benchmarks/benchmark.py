@@ -0,0 +1,596 @@
+"""Offline benchmark suite for the calculation and loading hot paths.
+
+Every benchmark runs on synthetic irradiance data of a given size, from one year of
+hourly data up to thirty years of minute data. The wall time is the best of a few
+repeats, and the peak memory is measured in a separate run under tracemalloc, so
+the tracing overhead does not end up in the timings.
+
+Usage:
+    python -m benchmarks.benchmark run -o before.json
+    python -m benchmarks.benchmark run --sizes all -o after.json
+    python -m benchmarks.benchmark compare before.json after.json
+
+compare exits with status 1 when a benchmark got slower than the threshold, so it
+can gate a commit.
+
+The import time of the entry points is measured in fresh interpreters:
+
+    python -m benchmarks.benchmark imports
+
+exits with status 1 when an entry point is over its budget in IMPORT_BUDGETS or
+loads one of the LAZY_DEPENDENCIES on import.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.assignment_1 import part_1
+from pv_assignments.assignment_1.data import part_1_loader, part_2_loader
+from pv_assignments.assignment_1.data.spectrum_store import SpectrumStore
+from pv_assignments.utils.panel_irradiation import Panel
+from pv_assignments.utils.solar_position import solar_position
+from pv_assignments.utils.tmy import build_tmy
+
+# Dataset sizes as (years, sampling interval)
+SIZES = {
+    "1y-1h": (1, "1h"),
+    "1y-1min": (1, "1min"),
+    "20y-1h": (20, "1h"),
+    "10y-1min": (10, "1min"),
+    "30y-1min": (30, "1min"),
+}
+DEFAULT_SIZES = ["1y-1h", "1y-1min"]
+
+# Import time budgets (s) of the entry points, in a fresh interpreter. The CLI only
+# imports argparse, the others are dominated by numpy and pandas.
+IMPORT_BUDGETS = {
+    "pv_assignments.cli": 0.05,
+    "pv_assignments.utils.panel_irradiation": 1.0,
+    "pv_assignments.utils.batch_runner": 1.0,
+    "pv_assignments.assignment_1.part_1": 1.0,
+    "pv_assignments.assignment_1.part_2": 1.0,
+}
+# Dependencies that are only imported when a figure or workbook is needed
+LAZY_DEPENDENCIES = ["matplotlib", "openpyxl"]
+
+# Risø test site, which the part 2 data is from
+_LATITUDE = 55.6953
+_LONGITUDE = 12.0883
+_TIMEZONE = datetime.timezone(datetime.timedelta(hours=1))
+
+# Number of wavelengths of the synthetic spectra, like the part 1 workbooks
+_N_WAVELENGTHS = 373
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing and memory of one benchmark.
+
+    Attributes:
+        name (str): Name of the benchmark.
+        size (str): Name of the dataset size.
+        rows (int): Number of rows (or spectra) processed.
+        time_s (float): Best wall time over the repeats (s).
+        peak_mb (float): Peak traced memory during one run (MB).
+    """
+
+    name: str
+    size: str
+    rows: int
+    time_s: float
+    peak_mb: float
+
+
+def synthetic_irradiance(years: int, freq: str = "1h", seed: int = 0) -> pd.DataFrame:
+    """Generate an irradiance series with the columns the Panel methods expect.
+
+    The irradiance is a Haurwitz-like clear sky scaled by a random cloud factor per
+    hour, so it has realistic day/night structure and variability.
+
+    Args:
+        years (int): Number of years, starting in 2000.
+        freq (str, optional): Sampling interval. Defaults to "1h".
+        seed (int, optional): Seed of the cloud factors. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: "DateTime", "GHI", "DHI", "DNI", "Azimuth" and "Zenith" columns.
+    """
+    start = pd.Timestamp("2000-01-01", tz=_TIMEZONE)
+    times = pd.date_range(
+        start, start + pd.DateOffset(years=years), freq=freq, inclusive="left"
+    )
+    position = solar_position(times, _LATITUDE, _LONGITUDE)
+    zenith = position["Zenith"].to_numpy()
+    cos_zenith = np.cos(np.radians(zenith))
+
+    rng = np.random.default_rng(seed)
+    hours = (times - start) // pd.Timedelta(hours=1)
+    clearness = rng.uniform(0.2, 1.0, hours.max() + 1)[hours]
+    day = cos_zenith > 0
+    safe = np.where(day, cos_zenith, 1.0)
+    ghi_clear = np.where(day, 1098 * cos_zenith * np.exp(-0.057 / safe), 0.0)
+    ghi = ghi_clear * clearness
+    dhi = ghi * (1 - 0.8 * clearness)
+    dni = np.where(day & (cos_zenith > 0.01), (ghi - dhi) / safe, 0.0)
+    night = ~day
+    return pd.DataFrame(
+        {
+            "DateTime": times,
+            "GHI": np.where(night, np.nan, ghi),
+            "DHI": np.where(night, np.nan, dhi),
+            "DNI": np.where(night, np.nan, dni),
+            "Azimuth": position["Azimuth"].to_numpy(),
+            "Zenith": zenith,
+        }
+    )
+
+
+def _write_part_2_csv(df: pd.DataFrame, path: Path) -> None:
+    """Write synthetic data in the layout of the part 2 CSV file."""
+    pd.DataFrame(
+        {
+            "": df["DateTime"],
+            "GHI": df["GHI"],
+            "DHI": df["DHI"],
+            "DNI": df["DNI"],
+            "SolarElevation": 90 - df["Zenith"],
+            "SolarAzimuth": df["Azimuth"] + 180,
+        }
+    ).to_csv(path, index=False)
+
+
+def _synthetic_spectra(n_spectra: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Wavelength grid (nm) and smooth random spectra (W/m²/nm)."""
+    rng = np.random.default_rng(seed)
+    wavelengths = np.linspace(280, 4000, _N_WAVELENGTHS)
+    peak = rng.uniform(450, 700, (n_spectra, 1))
+    spectra = 1.5 * np.exp(-(((wavelengths - peak) / 400) ** 2))
+    return wavelengths, spectra
+
+
+@contextlib.contextmanager
+def _cache_root(path: Path) -> Iterator[None]:
+    """Point the on-disk caches at a directory for the duration of a block."""
+    previous = os.environ.get("PV_ASSIGNMENTS_CACHE")
+    os.environ["PV_ASSIGNMENTS_CACHE"] = str(path)
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["PV_ASSIGNMENTS_CACHE"]
+        else:
+            os.environ["PV_ASSIGNMENTS_CACHE"] = previous
+
+
+def _measure(
+    name: str,
+    size: str,
+    rows: int,
+    func: Callable[[], object],
+    repeat: int,
+    setup: Callable[[], object] | None = None,
+) -> BenchmarkResult:
+    """Time a function and trace its peak memory.
+
+    `setup` runs before every call and is neither timed nor traced.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(name, size, rows, best, peak / 2**20)
+
+
+def _panel_benchmarks(
+    size: str, df: pd.DataFrame, repeat: int
+) -> Iterator[BenchmarkResult]:
+    """Benchmarks of the Panel calculation methods."""
+    panel = Panel(azimuth=0, tilt=45, rho_g=0.2)
+    arrays = {
+        "dhi": df["DHI"].to_numpy(),
+        "dni": df["DNI"].to_numpy(),
+        "azimuth_sun": df["Azimuth"].to_numpy(),
+        "zenith_sun": df["Zenith"].to_numpy(),
+    }
+    rows = len(df)
+    yield _measure(
+        "Panel.calculate_gpoa",
+        size,
+        rows,
+        lambda: panel.calculate_gpoa(**arrays),
+        repeat,
+    )
+    yield _measure(
+        "Panel.calculate_daily_insolation",
+        size,
+        rows,
+        lambda: panel.calculate_daily_insolation(df, cache=False),
+        repeat,
+    )
+    yield _measure(
+        "Panel.calculate_monthly_insolation",
+        size,
+        rows,
+        lambda: panel.calculate_monthly_insolation(df, cache=False),
+        repeat,
+    )
+    yield _measure(
+        "Panel.calculate_monthly_insolation[cached]",
+        size,
+        rows,
+        lambda: panel.calculate_monthly_insolation(df),
+        repeat,
+        setup=lambda: panel.calculate_monthly_insolation(df),
+    )
+
+
+def _tmy_benchmarks(
+    size: str, df: pd.DataFrame, repeat: int
+) -> Iterator[BenchmarkResult]:
+    """Benchmark of the TMY selection and stitching."""
+    yield _measure("tmy.build_tmy", size, len(df), lambda: build_tmy(df), repeat)
+
+
+def _part_2_loader_benchmarks(
+    size: str, df: pd.DataFrame, repeat: int, workdir: Path
+) -> Iterator[BenchmarkResult]:
+    """Benchmarks of the part 2 loader: CSV parsing, cache conversion and cache hits."""
+    path = workdir / f"synthetic_{size}.csv"
+    _write_part_2_csv(df, path)
+    rows = len(df)
+    with _cache_root(workdir / "cache"):
+        yield _measure(
+            "part_2_loader.load_data[csv]",
+            size,
+            rows,
+            lambda: part_2_loader.load_data(path, cache=False),
+            repeat,
+        )
+        yield _measure(
+            "part_2_loader.load_data[convert]",
+            size,
+            rows,
+            lambda: part_2_loader.load_data(path, cache="refresh"),
+            repeat,
+        )
+        yield _measure(
+            "part_2_loader.load_data[cached]",
+            size,
+            rows,
+            lambda: part_2_loader.load_data(path),
+            repeat,
+        )
+    path.unlink()
+
+
+def _part_1_benchmarks(
+    size: str, n_spectra: int, repeat: int
+) -> Iterator[BenchmarkResult]:
+    """Benchmarks of the part 1 integration and peak functions, one spectrum per hour."""
+    wavelengths, spectra = _synthetic_spectra(n_spectra)
+    labels = [str(i) for i in range(n_spectra)]
+    yield _measure(
+        "part_1.spectral_statistics",
+        size,
+        n_spectra,
+        lambda: part_1.spectral_statistics(wavelengths, spectra, labels),
+        repeat,
+    )
+
+    df = pd.DataFrame(spectra.T, columns=labels)
+    df.insert(0, "Wavelength (nm)", wavelengths)
+
+    def broadband() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            part_1.broadband_irradiance([df], ["synthetic"], labels)
+
+    yield _measure("part_1.broadband_irradiance", size, n_spectra, broadband, repeat)
+    yield _measure(
+        "part_1.peak_wavelength",
+        size,
+        n_spectra,
+        lambda: part_1.peak_wavelength([df], ["synthetic"], labels),
+        repeat,
+    )
+
+
+def _part_1_loader_benchmarks(repeat: int, workdir: Path) -> Iterator[BenchmarkResult]:
+    """Benchmarks of the part 1 loader on the packaged workbooks."""
+    spectra = [("1.5", None), ("3", None), ("4.5", None), ("6", None)]
+    rows = len(spectra)
+
+    def load_all(store: SpectrumStore) -> None:
+        with warnings.catch_warnings():
+            # openpyxl warns about the missing default style of every workbook
+            warnings.simplefilter("ignore", UserWarning)
+            for am, water_vapor in spectra:
+                store.to_frame(am, water_vapor)
+
+    cache = workdir / "spectra-cache"
+
+    def empty_cache() -> None:
+        for path in (cache / "spectra").glob("*"):
+            path.unlink()
+
+    with _cache_root(cache):
+        yield _measure(
+            "part_1_loader.load_data[excel]",
+            "workbooks",
+            rows,
+            lambda: load_all(SpectrumStore()),
+            repeat,
+            setup=empty_cache,
+        )
+        yield _measure(
+            "part_1_loader.load_data[cached]",
+            "workbooks",
+            rows,
+            lambda: load_all(SpectrumStore()),
+            repeat,
+        )
+    yield _measure(
+        "part_1_loader.load_data[in-process]",
+        "workbooks",
+        rows,
+        lambda: [part_1_loader.load_data(am, wp) for am, wp in spectra],
+        repeat,
+    )
+
+
+def _import_in_subprocess(module: str, memory: bool = False) -> tuple[float, list]:
+    """Import a module in a fresh interpreter.
+
+    Returns the import time (s), or the peak traced memory (bytes) if `memory`, and
+    the lazy dependencies that were loaded.
+    """
+    value = "tracemalloc.get_traced_memory()[1]" if memory else "elapsed"
+    code = (
+        "import sys, time, tracemalloc\n"
+        + ("tracemalloc.start()\n" if memory else "")
+        + "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [m for m in {LAZY_DEPENDENCIES!r} if m in sys.modules]\n"
+        f"print({value}, *loaded)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parents[1],
+    ).stdout.split()
+    return float(output[0]), output[1:]
+
+
+def _import_benchmarks(repeat: int) -> Iterator[BenchmarkResult]:
+    """Import time and memory of the entry points, each in a fresh interpreter."""
+    for module in IMPORT_BUDGETS:
+        best = min(_import_in_subprocess(module)[0] for _ in range(repeat))
+        peak = _import_in_subprocess(module, memory=True)[0]
+        yield BenchmarkResult(f"import {module}", "import", 0, best, peak / 2**20)
+
+
+def check_imports(repeat: int = 3) -> pd.DataFrame:
+    """Check the import time budgets and lazy dependencies of the entry points.
+
+    Args:
+        repeat (int, optional): Number of imports per module, the best time counts.
+            Defaults to 3.
+
+    Returns:
+        pd.DataFrame: One row per entry point with the import time, its budget, the
+            lazy dependencies it loaded and whether it passed.
+    """
+    rows = []
+    for module, budget in IMPORT_BUDGETS.items():
+        imports = [_import_in_subprocess(module) for _ in range(repeat)]
+        time_s = min(elapsed for elapsed, _ in imports)
+        loaded = sorted({name for _, names in imports for name in names})
+        rows.append(
+            {
+                "module": module,
+                "time_s": time_s,
+                "budget_s": budget,
+                "lazy_loaded": ", ".join(loaded),
+                "ok": time_s <= budget and not loaded,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def run_benchmarks(
+    sizes: list[str] | None = None,
+    repeat: int = 3,
+    loaders: bool = True,
+    max_spectra_elements: int = 2**26,
+) -> list[BenchmarkResult]:
+    """Run the benchmark suite.
+
+    Args:
+        sizes (list[str] | None, optional): Dataset sizes to run, keys of SIZES.
+            If None, DEFAULT_SIZES is used. Defaults to None.
+        repeat (int, optional): Number of timed runs per benchmark. Defaults to 3.
+        loaders (bool, optional): Whether to run the loader benchmarks, which write
+            temporary files. Defaults to True.
+        max_spectra_elements (int, optional): Largest spectra array (spectra times
+            wavelengths) for the part 1 benchmarks. Larger sizes are capped.
+            Defaults to 2**26.
+
+    Returns:
+        list[BenchmarkResult]: One result per benchmark and size.
+    """
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        raise ValueError(f"Unknown sizes: {sorted(unknown)}")
+
+    results = list(_import_benchmarks(repeat))
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if loaders:
+            results.extend(_part_1_loader_benchmarks(repeat, workdir))
+        for size in sizes:
+            years, freq = SIZES[size]
+            df = synthetic_irradiance(years, freq)
+            results.extend(_panel_benchmarks(size, df, repeat))
+            results.extend(_tmy_benchmarks(size, df, repeat))
+            if loaders:
+                results.extend(_part_2_loader_benchmarks(size, df, repeat, workdir))
+            n_hours = len(df) * pd.Timedelta(freq) // pd.Timedelta(hours=1)
+            n_spectra = min(n_hours, max_spectra_elements // _N_WAVELENGTHS)
+            results.extend(_part_1_benchmarks(size, n_spectra, repeat))
+    return results
+
+
+def _git_commit() -> str | None:
+    """Commit hash of the working tree, if it is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: list[BenchmarkResult], path: str | os.PathLike) -> None:
+    """Save benchmark results with the environment they were measured in.
+
+    Args:
+        results (list[BenchmarkResult]): Results of run_benchmarks.
+        path (str | os.PathLike): Output JSON file.
+    """
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "date": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": [asdict(result) for result in results],
+    }
+    Path(path).write_text(json.dumps(report, indent=2))
+
+
+def compare_results(
+    base: str | os.PathLike, new: str | os.PathLike, threshold: float = 1.2
+) -> pd.DataFrame:
+    """Compare two saved benchmark runs.
+
+    Args:
+        base (str | os.PathLike): JSON file of the reference run.
+        new (str | os.PathLike): JSON file of the run to check.
+        threshold (float, optional): Time ratio (new / base) above which a benchmark
+            counts as a regression. Defaults to 1.2.
+
+    Returns:
+        pd.DataFrame: One row per benchmark in both runs with the times, peak memory,
+            their ratios and a "regression" column.
+    """
+    frames = [
+        pd.DataFrame(json.loads(Path(path).read_text())["results"])
+        for path in (base, new)
+    ]
+    table = frames[0].merge(frames[1], on=["name", "size"], suffixes=("_base", "_new"))
+    table["time_ratio"] = table["time_s_new"] / table["time_s_base"]
+    table["peak_ratio"] = table["peak_mb_new"] / table["peak_mb_base"]
+    table["regression"] = table["time_ratio"] > threshold
+    return table[
+        [
+            "name",
+            "size",
+            "time_s_base",
+            "time_s_new",
+            "time_ratio",
+            "peak_mb_base",
+            "peak_mb_new",
+            "peak_ratio",
+            "regression",
+        ]
+    ]
+
+
+def main() -> None:
+    """Run or compare benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and save them as JSON")
+    run.add_argument(
+        "--sizes",
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help=f"Dataset sizes, 'all' or any of {', '.join(SIZES)}",
+    )
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--no-loaders", action="store_true", help="Skip loader benchmarks")
+    run.add_argument("-o", "--output", default=None, help="Output JSON file")
+
+    imports = commands.add_parser(
+        "imports", help="Check the import time budgets of the entry points"
+    )
+    imports.add_argument("--repeat", type=int, default=3)
+
+    compare = commands.add_parser("compare", help="Compare two saved runs")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        sizes = list(SIZES) if args.sizes == ["all"] else args.sizes
+        results = run_benchmarks(sizes, repeat=args.repeat, loaders=not args.no_loaders)
+        output = args.output or f"benchmark-{_git_commit() or 'local'}.json"
+        save_results(results, output)
+        print(pd.DataFrame([asdict(r) for r in results]).to_string(index=False))
+        print(f"Saved results to {output}")
+    elif args.command == "imports":
+        table = check_imports(repeat=args.repeat)
+        print(table.to_string(index=False, float_format="{:.3f}".format))
+        if not table["ok"].all():
+            sys.exit(1)
+    else:
+        table = compare_results(args.base, args.new, threshold=args.threshold)
+        print(table.to_string(index=False, float_format="{:.3f}".format))
+        if table["regression"].any():
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 """Dataloader functions for part 1 of the assignment."""
 
-import importlib.resources as resources
 from typing import Literal
 
 import pandas as pd
 
+from pv_assignments.assignment_1.data.spectrum_store import default_store
+from pv_assignments.utils.instrumentation import instrument
 
+
+@instrument
 def load_data(
     am: str | Literal["1.5", "3", "4.5", "6"],
     water_vapor: str | None | Literal["0", "0.71", "2.13"] = None,
@@ -22,17 +25,5 @@ def load_data(
     Returns:
         pd.DataFrame: The loaded data as a pandas DataFrame.
     """
-    # Create the file name based on the provided parameters
-    file_name = "Spectrum"
-    file_name += f"_AM{'_'.join(am.split('.'))}"
-    if water_vapor is not None:
-        file_name += f"_WP{'_'.join(water_vapor.split('.'))}"
-
-    with (
-        resources.files("pv_assignments.assignment_1.data")
-        .joinpath(f"{file_name}.xlsx")
-        .open("rb") as f
-    ):
-        df = pd.read_excel(f, sheet_name="Spectral irradiance")
-
-    return df
+    # Each workbook is only parsed once, later calls are served from the store
+    return default_store().to_frame(am, water_vapor)
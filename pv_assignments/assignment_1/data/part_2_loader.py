@@ -1,24 +1,250 @@
 """Dataloader functions for part 2 of the assignment."""
 
+import datetime
 import importlib.resources as resources
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
 from typing import Literal
 
+import numpy as np
 import pandas as pd
 
+from pv_assignments.utils.cache import cache_dir, file_key
+from pv_assignments.utils.instrumentation import instrument, stage
 
-def load_data() -> pd.DataFrame:
-    """Load datafile for part 2.
+DEFAULT_FILE = "34552_risoe_1h_irradiance_2024_v2.csv"
+
+
+def _read_csv(path: str | os.PathLike) -> pd.DataFrame:
+    """Parse an irradiance CSV file.
+
+    Args:
+        path (str | os.PathLike): Path of the CSV file.
 
     Returns:
-        pd.DataFrame: The loaded data as a pandas DataFrame.
+        pd.DataFrame: The parsed data with a "DateTime" column, in chronological
+            order.
     """
-    with (
-        resources.files("pv_assignments.assignment_1.data")
-        .joinpath("34552_risoe_1h_irradiance_2024_v2.csv")
-        .open("rb") as f
-    ):
-        df = pd.read_csv(f)
-        df.columns = ["DateTime"] + df.columns[1:].tolist()
+    with stage("csv parsing"):
+        df = pd.read_csv(path)
+    df.columns = ["DateTime"] + df.columns[1:].tolist()
+    with stage("timestamp conversion", rows=len(df)):
         df["DateTime"] = pd.to_datetime(df["DateTime"])
-
+    # The cache entries are searched with binary searches, so they must be sorted
+    if not df["DateTime"].is_monotonic_increasing:
+        df = df.sort_values("DateTime", kind="stable").reset_index(drop=True)
     return df
+
+
+def _tz_to_json(tz: datetime.tzinfo | None) -> str | int | None:
+    """Encode a timezone as a fixed offset in seconds or a zone name."""
+    if tz is None:
+        return None
+    if isinstance(tz, datetime.timezone):
+        return int(tz.utcoffset(None).total_seconds())
+    return str(tz)
+
+
+def _tz_from_json(tz: str | int | None) -> datetime.tzinfo | str | None:
+    """Decode a timezone written by _tz_to_json."""
+    if isinstance(tz, int):
+        return datetime.timezone(datetime.timedelta(seconds=tz))
+    return tz
+
+
+def _write_cache(df: pd.DataFrame, entry: Path) -> None:
+    """Write a parsed DataFrame as one .npy file per column.
+
+    The entry is written to a temporary directory first and then renamed, so
+    concurrent jobs never see a half written entry.
+    """
+    timestamps = df["DateTime"].dt
+    unit = np.datetime_data(df["DateTime"].dtype.base)[0]
+    tmp = Path(tempfile.mkdtemp(dir=entry.parent))
+    utc = timestamps.tz_convert("UTC") if timestamps.tz is not None else df["DateTime"]
+    np.save(tmp / "DateTime.npy", utc.to_numpy(dtype=f"datetime64[{unit}]").view("i8"))
+    columns = [column for column in df.columns if column != "DateTime"]
+    for i, column in enumerate(columns):
+        np.save(tmp / f"column_{i}.npy", df[column].to_numpy(dtype=float))
+    meta = {"columns": columns, "unit": unit, "tz": _tz_to_json(timestamps.tz)}
+    (tmp / "meta.json").write_text(json.dumps(meta))
+    try:
+        os.replace(tmp, entry)
+    except OSError:
+        # Another process wrote the same entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _to_epoch(
+    timestamp: str | pd.Timestamp, unit: str, tz: datetime.tzinfo | str | None
+) -> int:
+    """Convert a timestamp to an integer epoch in the cache's unit."""
+    timestamp = pd.Timestamp(timestamp)
+    if tz is not None:
+        timestamp = (
+            timestamp.tz_localize(tz)
+            if timestamp.tzinfo is None
+            else timestamp.tz_convert(tz)
+        )
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return int(np.datetime64(timestamp.to_datetime64(), unit).view("i8"))
+
+
+def _iter_cached(
+    entry: Path,
+    columns: list[str] | None,
+    start: str | pd.Timestamp | None,
+    end: str | pd.Timestamp | None,
+    chunksize: int | None,
+) -> Iterator[pd.DataFrame]:
+    """Load slices of a cache entry through memory maps."""
+    meta = json.loads((entry / "meta.json").read_text())
+    unit, tz = meta["unit"], _tz_from_json(meta["tz"])
+    epochs = np.load(entry / "DateTime.npy", mmap_mode="r")
+    values = {
+        column: np.load(entry / f"column_{i}.npy", mmap_mode="r")
+        for i, column in enumerate(meta["columns"])
+        if columns is None or column in columns
+    }
+
+    # Timestamps are sorted, so the date filter is two binary searches
+    lo = 0 if start is None else np.searchsorted(epochs, _to_epoch(start, unit, tz))
+    hi = (
+        len(epochs)
+        if end is None
+        else np.searchsorted(epochs, _to_epoch(end, unit, tz))
+    )
+
+    step = max(hi - lo, 1) if chunksize is None else chunksize
+    for chunk_lo in range(lo, max(hi, lo + 1), step):
+        chunk_hi = min(chunk_lo + step, hi)
+        with stage("timestamp conversion", rows=chunk_hi - chunk_lo):
+            date_time = pd.DatetimeIndex(
+                np.array(epochs[chunk_lo:chunk_hi]).view(f"datetime64[{unit}]")
+            )
+            if tz is not None:
+                date_time = date_time.tz_localize("UTC").tz_convert(tz)
+        data = {"DateTime": date_time}
+        for column, column_values in values.items():
+            data[column] = np.array(column_values[chunk_lo:chunk_hi])
+        yield pd.DataFrame(data)
+
+
+def _as_data_tz(timestamp: str | pd.Timestamp, df: pd.DataFrame) -> pd.Timestamp:
+    """Localize a naive timestamp to the timezone of the "DateTime" column."""
+    timestamp = pd.Timestamp(timestamp)
+    tz = df["DateTime"].dt.tz
+    if tz is not None and timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(tz)
+    return timestamp
+
+
+@instrument
+def load_data(
+    path: str | os.PathLike | None = None,
+    columns: list[str] | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    cache: bool | Literal["refresh"] = True,
+) -> pd.DataFrame:
+    """Load an hourly irradiance datafile (by default the one for part 2).
+
+    The first call converts the CSV into a binary columnar cache entry, keyed by the
+    file's path, size and modification time. Later calls memory-map that entry and
+    only materialise the requested columns and rows.
+
+    Args:
+        path (str | os.PathLike | None, optional): CSV file with the same schema as the
+            part 2 file. If None, the part 2 file is loaded. Defaults to None.
+        columns (list[str] | None, optional): Columns to load besides "DateTime".
+            If None, all columns are loaded. Defaults to None.
+        start (str | pd.Timestamp | None, optional): First timestamp to include.
+            Naive timestamps are in the file's timezone. Defaults to None.
+        end (str | pd.Timestamp | None, optional): Timestamp to stop before (exclusive).
+            Defaults to None.
+        cache (bool | "refresh", optional): Whether to use the on-disk cache.
+            "refresh" rebuilds the cache entry. Defaults to True.
+
+    Returns:
+        pd.DataFrame: The loaded data in chronological order.
+    """
+    if path is None:
+        with resources.as_file(
+            resources.files("pv_assignments.assignment_1.data").joinpath(DEFAULT_FILE)
+        ) as default_path:
+            return _load(default_path, columns, start, end, cache)
+    return _load(path, columns, start, end, cache)
+
+
+def _load(
+    path: str | os.PathLike,
+    columns: list[str] | None,
+    start: str | pd.Timestamp | None,
+    end: str | pd.Timestamp | None,
+    cache: bool | Literal["refresh"],
+) -> pd.DataFrame:
+    """Load a datafile, see load_data."""
+    if not cache:
+        df = _read_csv(path)
+        if start is not None:
+            df = df[df["DateTime"] >= _as_data_tz(start, df)]
+        if end is not None:
+            df = df[df["DateTime"] < _as_data_tz(end, df)]
+        if columns is not None:
+            df = df[["DateTime"] + [c for c in df.columns if c in columns]]
+        return df.reset_index(drop=True)
+
+    return next(_iter_cached(_cache_entry(path, cache), columns, start, end, None))
+
+
+def iter_data(
+    path: str | os.PathLike | None = None,
+    columns: list[str] | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    chunksize: int = 100_000,
+) -> Iterator[pd.DataFrame]:
+    """Iterate over an hourly irradiance datafile in chunks of rows.
+
+    Only one chunk is materialised at a time, the rest stays in the memory-mapped
+    cache entry.
+
+    Args:
+        path (str | os.PathLike | None, optional): CSV file with the same schema as the
+            part 2 file. If None, the part 2 file is loaded. Defaults to None.
+        columns (list[str] | None, optional): Columns to load besides "DateTime".
+            If None, all columns are loaded. Defaults to None.
+        start (str | pd.Timestamp | None, optional): First timestamp to include.
+            Naive timestamps are in the file's timezone. Defaults to None.
+        end (str | pd.Timestamp | None, optional): Timestamp to stop before (exclusive).
+            Defaults to None.
+        chunksize (int, optional): Number of rows per chunk. Defaults to 100_000.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the data in chronological order.
+    """
+    if path is None:
+        with resources.as_file(
+            resources.files("pv_assignments.assignment_1.data").joinpath(DEFAULT_FILE)
+        ) as default_path:
+            yield from iter_data(default_path, columns, start, end, chunksize)
+        return
+
+    entry = _cache_entry(path, True)
+    yield from _iter_cached(entry, columns, start, end, chunksize)
+
+
+def _cache_entry(path: str | os.PathLike, cache: bool | Literal["refresh"]) -> Path:
+    """Return the cache entry of a CSV file, converting the file if needed."""
+    entry = cache_dir("irradiance") / f"{Path(path).stem}-{file_key(path)}"
+    if cache == "refresh" and entry.exists():
+        shutil.rmtree(entry)
+    if not entry.exists():
+        df = _read_csv(path)
+        with stage("cache write", rows=len(df)):
+            _write_cache(df, entry)
+    return entry
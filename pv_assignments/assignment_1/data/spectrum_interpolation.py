@@ -0,0 +1,128 @@
+"""Interpolation of the part 1 spectra to arbitrary air mass and water vapor.
+
+The workbooks only cover a cross of the (air mass, water vapor) plane: AM 1.5, 3, 4.5
+and 6 at 1.42 cm of water vapor, and 0, 0.71, 1.42 and 2.13 cm at AM 1.5. Following
+Beer-Lambert, the log of the irradiance is close to linear in both the air mass and
+the absorber path, so the spectra are interpolated in log space:
+
+    log S(m, w) = log S(m, 1.42) + m / 1.5 * (log S(1.5, w) - log S(1.5, 1.42))
+
+The water vapor term is scaled by m / 1.5 because the absorption path through the
+water vapor grows with the air mass.
+"""
+
+import numpy as np
+
+from pv_assignments.assignment_1.data.spectrum_store import (
+    SpectrumStore,
+    available_spectra,
+    default_store,
+)
+from pv_assignments.utils.clear_sky import air_mass
+
+# air_mass moved to clear_sky and is re-exported here for existing callers
+__all__ = [
+    "REFERENCE_AM",
+    "REFERENCE_WATER_VAPOR",
+    "SpectralInterpolator",
+    "air_mass",
+]
+
+REFERENCE_AM = 1.5
+REFERENCE_WATER_VAPOR = 1.42
+
+# Smallest irradiance used before taking the log, so zeros stay (close to) zero
+_FLOOR = 1e-300
+
+
+def _segments(grid: np.ndarray, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Find the grid segment and position in it for every x.
+
+    Values outside the grid use the first or last segment, i.e. they are
+    extrapolated linearly.
+    """
+    idx = np.clip(np.searchsorted(grid, x) - 1, 0, grid.size - 2)
+    t = (x - grid[idx]) / (grid[idx + 1] - grid[idx])
+    return idx, t
+
+
+class SpectralInterpolator:
+    """Vectorized interpolator of a spectral column over air mass and water vapor."""
+
+    def __init__(
+        self,
+        column: str = "Global to perpendicular plane  (W/m2/nm)",
+        store: SpectrumStore | None = None,
+    ) -> None:
+        """Build the log-space grids from the spectra in the store.
+
+        Args:
+            column (str, optional): Name of the spectral column to interpolate.
+                Defaults to "Global to perpendicular plane  (W/m2/nm)".
+            store (SpectrumStore | None, optional): Store to read the spectra from.
+                If None, the shared store is used. Defaults to None.
+        """
+        store = default_store() if store is None else store
+        self.column = column
+        self.wavelengths = np.array(store.wavelengths)
+
+        def log_spectrum(am: str, water_vapor: str | None) -> np.ndarray:
+            spectrum = store.column(am, water_vapor, column)
+            return np.log(np.maximum(spectrum, _FLOOR))
+
+        spectra = available_spectra()
+        air_masses = sorted((am for am, wp in spectra if wp is None), key=float)
+        reference_am = next(am for am in air_masses if float(am) == REFERENCE_AM)
+        water_vapors = sorted(
+            (wp for am, wp in spectra if float(am) == REFERENCE_AM and wp is not None),
+            key=float,
+        )
+
+        # log S(m, 1.42) with shape (n_air_masses, n_wavelengths)
+        self.air_masses = np.array([float(am) for am in air_masses])
+        self._log_am = np.stack([log_spectrum(am, None) for am in air_masses])
+
+        # log S(1.5, w) - log S(1.5, 1.42) with shape (n_water_vapors, n_wavelengths)
+        reference = self._log_am[air_masses.index(reference_am)]
+        self.water_vapors = np.array(
+            sorted([float(wp) for wp in water_vapors] + [REFERENCE_WATER_VAPOR])
+        )
+        log_wp = {
+            float(wp): log_spectrum(reference_am, wp) - reference for wp in water_vapors
+        }
+        log_wp[REFERENCE_WATER_VAPOR] = np.zeros_like(reference)
+        self._log_wp = np.stack([log_wp[wp] for wp in self.water_vapors])
+
+    def __call__(
+        self,
+        air_mass: float | np.ndarray,
+        water_vapor: float | np.ndarray = REFERENCE_WATER_VAPOR,
+    ) -> np.ndarray:
+        """Evaluate the spectrum for many (air mass, water vapor) pairs at once.
+
+        Args:
+            air_mass (float | np.ndarray): Relative air mass. Values outside the grid
+                are extrapolated log-linearly.
+            water_vapor (float | np.ndarray, optional): Precipitable water (cm).
+                Defaults to 1.42.
+
+        Returns:
+            np.ndarray: Spectral irradiance (W/m2/nm) with shape (n_pairs, n_wavelengths).
+        """
+        air_mass, water_vapor = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(air_mass, dtype=float)),
+            np.atleast_1d(np.asarray(water_vapor, dtype=float)),
+        )
+        air_mass, water_vapor = air_mass.ravel(), water_vapor.ravel()
+
+        idx, t = _segments(self.air_masses, air_mass)
+        log_spectrum = self._log_am[idx] * (1 - t)[:, None]
+        log_spectrum += self._log_am[idx + 1] * t[:, None]
+
+        idx, t = _segments(self.water_vapors, water_vapor)
+        log_water = self._log_wp[idx] * (1 - t)[:, None]
+        log_water += self._log_wp[idx + 1] * t[:, None]
+        log_water *= (air_mass / REFERENCE_AM)[:, None]
+
+        log_spectrum += log_water
+        return np.exp(log_spectrum, out=log_spectrum)
@@ -0,0 +1,222 @@
+"""Convert-once store for the spectral irradiance workbooks of part 1.
+
+Every Spectrum_AM*_WP* workbook is parsed with openpyxl only once. The spectrum is
+then kept on disk as a .npy array on the shared wavelength grid and memory-mapped on
+later lookups, with an in-process LRU on top.
+"""
+
+import importlib.resources as resources
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.cache import cache_dir, file_key
+from pv_assignments.utils.instrumentation import stage
+
+DATA_PACKAGE = "pv_assignments.assignment_1.data"
+SHEET_NAME = "Spectral irradiance"
+WAVELENGTH = "Wavelength (nm)"
+
+# The spectrum whose wavelength grid all other spectra are put on
+REFERENCE_SPECTRUM = ("1.5", None)
+
+_FILE_PATTERN = re.compile(r"Spectrum_AM(?P<am>[\d_]+?)(?:_WP(?P<wp>[\d_]+))?\.xlsx")
+
+
+def spectrum_file_name(am: str, water_vapor: str | None = None) -> str:
+    """Create the workbook file name for an air mass and water vapor value.
+
+    Args:
+        am (str): String representation of the air mass, e.g. "1.5".
+        water_vapor (str | None, optional): String representation of the water vapor
+            content (cm). If None, the file for 1.42 cm is used. Defaults to None.
+
+    Returns:
+        str: The file name, e.g. "Spectrum_AM1_5_WP0_71.xlsx".
+    """
+    file_name = "Spectrum"
+    file_name += f"_AM{'_'.join(am.split('.'))}"
+    if water_vapor is not None:
+        file_name += f"_WP{'_'.join(water_vapor.split('.'))}"
+    return f"{file_name}.xlsx"
+
+
+def available_spectra() -> list[tuple[str, str | None]]:
+    """List the (air mass, water vapor) combinations that have a workbook.
+
+    Returns:
+        list[tuple[str, str | None]]: The combinations, with None for the default
+            water vapor content of 1.42 cm.
+    """
+    spectra = []
+    for entry in resources.files(DATA_PACKAGE).iterdir():
+        match = _FILE_PATTERN.fullmatch(entry.name)
+        if match is None:
+            continue
+        wp = match.group("wp")
+        spectra.append(
+            (
+                match.group("am").replace("_", "."),
+                None if wp is None else wp.replace("_", "."),
+            )
+        )
+    return sorted(
+        spectra, key=lambda s: (float(s[0]), -1 if s[1] is None else float(s[1]))
+    )
+
+
+class SpectrumStore:
+    """Typed array cache of the spectral irradiance workbooks.
+
+    A spectrum is stored as a (n_columns, n_wavelengths) float64 array, so each
+    column is a contiguous, read-only view into the memory-mapped cache file.
+    """
+
+    def __init__(self, maxsize: int = 32) -> None:
+        """Initialize an empty store.
+
+        Args:
+            maxsize (int, optional): Number of spectra kept in the in-process LRU.
+                Defaults to 32.
+        """
+        self.maxsize = maxsize
+        self._spectra: OrderedDict[tuple[str, str | None], np.ndarray] = OrderedDict()
+        self._columns: list[str] | None = None
+        self._wavelengths: np.ndarray | None = None
+        self._wavelength_dtype: str | None = None
+
+    @property
+    def columns(self) -> list[str]:
+        """Names of the spectral columns, excluding the wavelength."""
+        if self._columns is None:
+            self.get(*REFERENCE_SPECTRUM)
+        return list(self._columns)
+
+    @property
+    def wavelengths(self) -> np.ndarray:
+        """The shared wavelength grid (nm)."""
+        if self._wavelengths is None:
+            spectrum = self.get(*REFERENCE_SPECTRUM, include_wavelength=True)
+            self._wavelengths = spectrum[0]
+        return self._wavelengths
+
+    def _convert(self, file_name: str, path: Path) -> None:
+        """Parse a workbook and write it to the on-disk cache."""
+        with (
+            stage("excel parsing"),
+            resources.files(DATA_PACKAGE).joinpath(file_name).open("rb") as f,
+        ):
+            df = pd.read_excel(f, sheet_name=SHEET_NAME)
+
+        wavelengths = df[WAVELENGTH].to_numpy(dtype=float)
+        values = df.drop(columns=WAVELENGTH).to_numpy(dtype=float).T
+        if file_name != spectrum_file_name(*REFERENCE_SPECTRUM) and not np.array_equal(
+            wavelengths, self.wavelengths
+        ):
+            values = np.stack(
+                [np.interp(self.wavelengths, wavelengths, v) for v in values]
+            )
+            wavelengths = self.wavelengths
+
+        tmp = path.with_suffix(f".{os.getpid()}.tmp.npy")
+        np.save(tmp, np.vstack([wavelengths, values]))
+        path.with_suffix(".json").write_text(
+            json.dumps(
+                {
+                    "columns": df.columns.drop(WAVELENGTH).tolist(),
+                    "wavelength_dtype": str(df[WAVELENGTH].dtype),
+                }
+            )
+        )
+        os.replace(tmp, path)
+
+    def get(
+        self, am: str, water_vapor: str | None = None, include_wavelength: bool = False
+    ) -> np.ndarray:
+        """Return the spectrum for an air mass and water vapor value.
+
+        Args:
+            am (str): String representation of the air mass, e.g. "1.5".
+            water_vapor (str | None, optional): String representation of the water vapor
+                content (cm). If None, 1.42 cm is used. Defaults to None.
+            include_wavelength (bool, optional): Whether row 0 is the wavelength grid.
+                Defaults to False.
+
+        Returns:
+            np.ndarray: Read-only (n_columns, n_wavelengths) view of the spectrum.
+        """
+        key = (am, water_vapor)
+        if key in self._spectra:
+            self._spectra.move_to_end(key)
+        else:
+            file_name = spectrum_file_name(am, water_vapor)
+            with resources.as_file(
+                resources.files(DATA_PACKAGE).joinpath(file_name)
+            ) as source:
+                if not source.exists():
+                    raise FileNotFoundError(
+                        f"No spectrum for AM {am}, WP {water_vapor}"
+                    )
+                path = (
+                    cache_dir("spectra")
+                    / f"{Path(file_name).stem}-{file_key(source)}.npy"
+                )
+            if not path.exists():
+                self._convert(file_name, path)
+            if self._columns is None:
+                meta = json.loads(path.with_suffix(".json").read_text())
+                self._columns = meta["columns"]
+                self._wavelength_dtype = meta["wavelength_dtype"]
+            self._spectra[key] = np.load(path, mmap_mode="r")
+            if len(self._spectra) > self.maxsize:
+                self._spectra.popitem(last=False)
+
+        spectrum = self._spectra[key]
+        return spectrum if include_wavelength else spectrum[1:]
+
+    def column(self, am: str, water_vapor: str | None, name: str) -> np.ndarray:
+        """Return a single column of a spectrum.
+
+        Args:
+            am (str): String representation of the air mass, e.g. "1.5".
+            water_vapor (str | None): String representation of the water vapor content (cm).
+            name (str): Name of the column, e.g. "Global to perpendicular plane  (W/m2/nm)".
+
+        Returns:
+            np.ndarray: Read-only view of the column on the shared wavelength grid.
+        """
+        spectrum = self.get(am, water_vapor)
+        return spectrum[self.columns.index(name)]
+
+    def to_frame(self, am: str, water_vapor: str | None = None) -> pd.DataFrame:
+        """Return a spectrum as a DataFrame laid out like the workbook sheet.
+
+        Args:
+            am (str): String representation of the air mass, e.g. "1.5".
+            water_vapor (str | None, optional): String representation of the water vapor
+                content (cm). If None, 1.42 cm is used. Defaults to None.
+
+        Returns:
+            pd.DataFrame: The spectrum with a "Wavelength (nm)" column.
+        """
+        spectrum = self.get(am, water_vapor, include_wavelength=True)
+        data = {WAVELENGTH: spectrum[0].astype(self._wavelength_dtype)}
+        data.update(zip(self.columns, np.array(spectrum[1:]), strict=True))
+        return pd.DataFrame(data)
+
+    def clear(self) -> None:
+        """Drop all spectra from the in-process LRU."""
+        self._spectra.clear()
+
+
+_default_store = SpectrumStore()
+
+
+def default_store() -> SpectrumStore:
+    """Return the store shared by the whole process."""
+    return _default_store
@@ -1,13 +1,26 @@
 """Task 1 of assignment 1."""
 
-from importlib import resources
-import matplotlib.pyplot as plt
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
 import pandas as pd
 import numpy as np
 
 from pv_assignments.assignment_1.data.part_1_loader import load_data
-
-def _economist_style(ax: plt.Axes) -> None:
+from pv_assignments.utils.figure_renderer import (
+    FigureRenderer,
+    default_renderer,
+    figure_path,
+)
+
+if TYPE_CHECKING:
+    # pyplot is imported where a figure is drawn, so the computations can be used
+    # without loading matplotlib
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+
+def _economist_style(ax: "Axes") -> None:
     """Apply an Economist-like style to an axes."""
     # Subtle horizontal grid only
     ax.grid(axis="y", linestyle=":", alpha=0.5)
@@ -38,11 +51,6 @@ PV_colors = {
     "text": "#222222",
 }
 
-def _figure_path(fig_title: str) -> str:
-    # This points to pv_assignments/assignment_1/figures/
-    p = resources.files("pv_assignments.assignment_1.figures").joinpath(f"{fig_title}.png")
-    return str(p)
-
 def plot(
     dfs: list[pd.DataFrame],
     labels: list[str],
@@ -50,16 +58,53 @@ def plot(
     peak_wavelengths: bool = False,
     title: str | None = None,
     fig_title: str | None = None,
-) -> None:
+    renderer: FigureRenderer | None = None,
+) -> Future[str]:
     """Plot spectral irradiance for multiple dataframes.
 
+    The figure is queued on a renderer and saved as a 300 dpi PNG in the figures
+    folder. Unchanged figures are not rendered again.
+
     Args:
         dfs (list[pd.DataFrame]): DataFrames containing the spectral irradiance data.
         labels (list[str]): Labels for each DataFrame.
         value_names (list[str]): Names of the columns to plot.
         peak_wavelengths (bool, optional): Whether to mark peak wavelengths with vertical lines.
             Defaults to False.
+        title (str | None, optional): Title of the figure. Defaults to None.
+        fig_title (str | None, optional): File name of the figure, without suffix.
+            If None, the title is used. Defaults to None.
+        renderer (FigureRenderer | None, optional): Renderer to queue the figure on.
+            If None, the default renderer is used. Defaults to None.
+
+    Returns:
+        Future[str]: Future of the path of the saved figure.
     """
+    if fig_title is None:
+        fig_title = title
+    renderer = default_renderer() if renderer is None else renderer
+    # Only the plotted columns are sent to the renderer
+    dfs = [df[["Wavelength (nm)", *value_names]] for df in dfs]
+    return renderer.submit(
+        _draw_spectra,
+        figure_path(fig_title),
+        dfs=dfs,
+        labels=labels,
+        value_names=value_names,
+        peak_wavelengths=peak_wavelengths,
+        title=title,
+    )
+
+
+def _draw_spectra(
+    dfs: list[pd.DataFrame],
+    labels: list[str],
+    value_names: list[str],
+    peak_wavelengths: bool,
+    title: str | None,
+) -> "Figure":
+    """Draw the spectral irradiance figure of plot."""
+    import matplotlib.pyplot as plt
 
     # Golden ratio
     phi = (1 + np.sqrt(5)) / 2
@@ -124,15 +169,7 @@ def plot(
 
     # Reserve top space for title + legend
     fig.tight_layout()
-
-    # --- save ---
-    if fig_title is None:
-        fig_title = title
-
-    save_path = _figure_path(fig_title)
-    fig.savefig(save_path, dpi=300, bbox_inches="tight")
-    plt.close(fig)
-    print("Saved figure:", save_path)
+    return fig
 
 # Not used
 def plot_peter(
@@ -150,6 +187,8 @@ def plot_peter(
         peak_wavelengths (bool, optional): Whether to mark peak wavelengths with vertical lines.
             Defaults to False.
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 6))
     for df, label in zip(dfs, labels, strict=True):
         for value_name in value_names:
@@ -175,23 +214,126 @@ def plot_peter(
     plt.show()
 
 
+# Silicon bandgap of 1.12 eV corresponds to 1107 nm
+SILICON_BAND = (280.0, 1107.0)
+
+
+@dataclass
+class SpectralStatistics:
+    """Integrals and peaks of a batch of spectra.
+
+    Attributes:
+        labels (list[str]): Label of each spectrum.
+        broadband (np.ndarray): Trapezoidal integral over the full grid (W/m²).
+        bands (dict[str, np.ndarray]): Trapezoidal integral over each band (W/m²).
+        peak_wavelength (np.ndarray): Wavelength of the maximum of each spectrum (nm).
+        peak_irradiance (np.ndarray): Maximum of each spectrum (W/m²/nm).
+    """
+
+    labels: list[str]
+    broadband: np.ndarray
+    bands: dict[str, np.ndarray]
+    peak_wavelength: np.ndarray
+    peak_irradiance: np.ndarray
+
+
+def stack_spectra(
+    dfs: list[pd.DataFrame], labels: list[str], value_names: list[str]
+) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    """Stack the columns of several dataframes into one array.
+
+    Args:
+        dfs (list[pd.DataFrame]): DataFrames on the same wavelength grid.
+        labels (list[str]): Names of each dataframe.
+        value_names (list[str]): Names of the columns to stack.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, list[str]]: The wavelength grid, the spectra with
+            shape (n_spectra, n_wavelengths) and the "<label> - <value_name>" labels.
+    """
+    wavelengths = dfs[0]["Wavelength (nm)"].to_numpy()
+    for df in dfs[1:]:
+        if not np.array_equal(df["Wavelength (nm)"].to_numpy(), wavelengths):
+            raise ValueError("All dataframes must share the same wavelength grid")
+    spectra = np.stack(
+        [df[value_name].to_numpy(dtype=float) for df in dfs for value_name in value_names]
+    )
+    series_labels = [
+        f"{label} - {value_name}" for label in labels for value_name in value_names
+    ]
+    return wavelengths, spectra, series_labels
+
+
+def _band_integral(
+    wavelengths: np.ndarray, spectra: np.ndarray, low: float, high: float
+) -> np.ndarray:
+    """Trapezoidal integral of every spectrum between two wavelengths.
+
+    The band edges are inserted into the grid by linear interpolation, so a band
+    does not have to fall on grid points.
+    """
+    inside = (wavelengths > low) & (wavelengths < high)
+    edges = np.clip([low, high], wavelengths[0], wavelengths[-1])
+    idx = np.clip(np.searchsorted(wavelengths, edges) - 1, 0, wavelengths.size - 2)
+    t = (edges - wavelengths[idx]) / (wavelengths[idx + 1] - wavelengths[idx])
+    edge_values = spectra[:, idx] * (1 - t) + spectra[:, idx + 1] * t
+    grid = np.concatenate([edges[:1], wavelengths[inside], edges[1:]])
+    values = np.concatenate(
+        [edge_values[:, :1], spectra[:, inside], edge_values[:, 1:]], axis=1
+    )
+    return np.trapezoid(values, grid, axis=1)
+
+
+def spectral_statistics(
+    wavelengths: np.ndarray,
+    spectra: np.ndarray,
+    labels: list[str],
+    bands: dict[str, tuple[float, float]] | None = None,
+) -> SpectralStatistics:
+    """Integrate and find the peaks of many spectra in single array reductions.
+
+    Args:
+        wavelengths (np.ndarray): Wavelength grid (nm).
+        spectra (np.ndarray): Spectra with shape (n_spectra, n_wavelengths).
+        labels (list[str]): Label of each spectrum.
+        bands (dict[str, tuple[float, float]] | None, optional): Wavelength bands (nm)
+            to integrate over, by name. If None, only the silicon band is used.
+            Defaults to None.
+
+    Returns:
+        SpectralStatistics: Broadband and band integrals and peaks of every spectrum.
+    """
+    if bands is None:
+        bands = {"Silicon": SILICON_BAND}
+    peak_index = np.argmax(spectra, axis=1)
+    return SpectralStatistics(
+        labels=list(labels),
+        broadband=np.trapezoid(spectra, wavelengths, axis=1),
+        bands={
+            name: _band_integral(wavelengths, spectra, low, high)
+            for name, (low, high) in bands.items()
+        },
+        peak_wavelength=wavelengths[peak_index],
+        peak_irradiance=spectra[np.arange(len(spectra)), peak_index],
+    )
+
+
 def broadband_irradiance(
     dfs: list[pd.DataFrame], labels: list[str], value_names: list[str]
 ) -> dict[str, float]:
-    """Calculate the total broadband irradiance (integration).
+    """Calculate the total broadband irradiance (trapezoidal integration).
 
     Args:
         dfs (list[pd.DataFrame]): List of dataframes
         labels (list[str]): Names of each dataframe
         value_names (list[str]): Names of the columns to integrate
     """
-    broadband_irradiance_values = {}
-    for df, label in zip(dfs, labels, strict=False):
-        for value_name in value_names:
-            new_label = f"{label} - {value_name}"
-            irr_broadband = df[value_name].sum() * 10
-            broadband_irradiance_values[new_label] = irr_broadband
-            print(f"Broadband Irradiance for {new_label}: {irr_broadband:.2f} W/m²")
+    stats = spectral_statistics(*stack_spectra(dfs, labels, value_names), bands={})
+    broadband_irradiance_values = dict(
+        zip(stats.labels, stats.broadband.tolist(), strict=True)
+    )
+    for new_label, irr_broadband in broadband_irradiance_values.items():
+        print(f"Broadband Irradiance for {new_label}: {irr_broadband:.2f} W/m²")
 
     return broadband_irradiance_values
 
@@ -213,16 +355,13 @@ def peak_wavelength(
     Returns:
         dict[str, dict[str, float]]: Nested dict with label -> ("wavelength" | "irradiance").
     """
-    peak_irradiance_values = {}
-    for df, label in zip(dfs, labels, strict=False):
-        for value_name in value_names:
-            new_label = f"{label} - {value_name}"
-            max_irr = df[value_name].max()
-            peak_wavelength = df.loc[df[value_name].idxmax(), "Wavelength (nm)"]
-            peak_irradiance_values[new_label] = {
-                "wavelength": peak_wavelength,
-                "irradiance": max_irr,
-            }
+    stats = spectral_statistics(*stack_spectra(dfs, labels, value_names), bands={})
+    peak_irradiance_values = {
+        label: {"wavelength": wavelength, "irradiance": irradiance}
+        for label, wavelength, irradiance in zip(
+            stats.labels, stats.peak_wavelength, stats.peak_irradiance, strict=True
+        )
+    }
     if not silent:
         print("Peak Irradiance and Corresponding Wavelengths:")
         for label, data in peak_irradiance_values.items():
@@ -257,7 +396,13 @@ def main() -> None:
         "Global to horizontal plane  (W/m2/nm)",
     ]
     plot(dfs=dfs, labels=labels, value_names=value_names, title="Spectral irradiance - Horizontal plane", fig_title="Part 1-2")
-    broadband = broadband_irradiance(dfs, labels, value_names)
+    stats = spectral_statistics(*stack_spectra(dfs, labels, value_names))
+    for label, irr_broadband, irr_silicon in zip(
+        stats.labels, stats.broadband, stats.bands["Silicon"], strict=True
+    ):
+        print(f"Broadband Irradiance for {label}: {irr_broadband:.2f} W/m²")
+        print(f"  of which within the silicon band: {irr_silicon:.2f} W/m²")
+    broadband = dict(zip(stats.labels, stats.broadband, strict=True))
     diffuse_fraction = (
         broadband["AM 1.5 - Diffuse to horizontal plane (W/m2/nm)"]
         / broadband["AM 1.5 - Global to horizontal plane  (W/m2/nm)"]
@@ -280,6 +425,9 @@ def main() -> None:
     value_names = ["Global to perpendicular plane  (W/m2/nm)"]
     plot(dfs=dfs, labels=labels, value_names=value_names, title="Spectral irradiance for different water vapor contents", fig_title="Part 1-3")
 
+    for save_path in default_renderer().wait():
+        print("Saved figure:", save_path)
+
 
 if __name__ == "__main__":
     main()
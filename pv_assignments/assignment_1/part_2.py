@@ -1,11 +1,53 @@
 """Task 2 of assignment 1."""
 
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING
+
 import numpy as np
 import pandas as pd
 
 from pv_assignments.assignment_1.data.part_2_loader import load_data
-from pv_assignments.utils.panel_irradiation import Panel
+from pv_assignments.utils.figure_renderer import default_renderer, figure_path
+from pv_assignments.utils.orientation_optimizer import optimize_orientation
+from pv_assignments.utils.panel_irradiation import (
+    Panel,
+    PanelArray,
+    mean_annual_insolation,
+)
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+
+def _draw_monthly_insolation(df_monthly_insolation: pd.DataFrame) -> "Figure":
+    """Draw the monthly insolation of the four panel orientations of part 2-2."""
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure()
+    plt.plot(
+        df_monthly_insolation["DateTime"],
+        df_monthly_insolation["Insolation_horizontal"],
+        label="Horizontal",
+    )
+    plt.plot(
+        df_monthly_insolation["DateTime"],
+        df_monthly_insolation["Insolation_south"],
+        label="South",
+    )
+    plt.plot(
+        df_monthly_insolation["DateTime"],
+        df_monthly_insolation["Insolation_south_tilted"],
+        label="South Tilted",
+    )
+    plt.plot(
+        df_monthly_insolation["DateTime"],
+        df_monthly_insolation["Insolation_west_tilted"],
+        label="West Tilted",
+    )
+    plt.xlabel("Date")
+    plt.ylabel("Monthly Insolation (Wh/m²)")
+    plt.title("Comparison of Monthly Insolation for Different Panel Orientations")
+    plt.legend()
+    return fig
 
 
 def main() -> None:
@@ -49,66 +91,24 @@ def main() -> None:
     panel_south = Panel(azimuth=0, tilt=90, rho_g=rho_g)
     panel_south_tilted = Panel(azimuth=0, tilt=45, rho_g=rho_g)
     panel_west_tilted = Panel(azimuth=90, tilt=45, rho_g=rho_g)
-
-    df_monthly_insolation = panel_horizontal.calculate_monthly_insolation(df).rename(
-        columns={"Insolation": "Insolation_horizontal"}
-    )
-    df_monthly_insolation = df_monthly_insolation.merge(
-        panel_south.calculate_monthly_insolation(df).rename(
-            columns={"Insolation": "Insolation_south"}
-        ),
-        on="DateTime",
-    )
-    df_monthly_insolation = df_monthly_insolation.merge(
-        panel_south_tilted.calculate_monthly_insolation(df).rename(
-            columns={"Insolation": "Insolation_south_tilted"}
-        ),
-        on="DateTime",
+    panels = PanelArray.from_panels(
+        [panel_horizontal, panel_south, panel_south_tilted, panel_west_tilted],
+        names=["horizontal", "south", "south_tilted", "west_tilted"],
     )
-    df_monthly_insolation = df_monthly_insolation.merge(
-        panel_west_tilted.calculate_monthly_insolation(df).rename(
-            columns={"Insolation": "Insolation_west_tilted"}
-        ),
-        on="DateTime",
-    )
-    plt.figure()
-    plt.plot(
-        df_monthly_insolation["DateTime"],
-        df_monthly_insolation["Insolation_horizontal"],
-        label="Horizontal",
-    )
-    plt.plot(
-        df_monthly_insolation["DateTime"],
-        df_monthly_insolation["Insolation_south"],
-        label="South",
-    )
-    plt.plot(
-        df_monthly_insolation["DateTime"],
-        df_monthly_insolation["Insolation_south_tilted"],
-        label="South Tilted",
-    )
-    plt.plot(
-        df_monthly_insolation["DateTime"],
-        df_monthly_insolation["Insolation_west_tilted"],
-        label="West Tilted",
+
+    df_monthly_insolation = panels.calculate_monthly_insolation(df)
+    default_renderer().submit(
+        _draw_monthly_insolation,
+        figure_path("Part 2-2"),
+        df_monthly_insolation=df_monthly_insolation,
     )
-    plt.xlabel("Date")
-    plt.ylabel("Monthly Insolation (Wh/m²)")
-    plt.title("Comparison of Monthly Insolation for Different Panel Orientations")
-    plt.legend()
-    plt.show()
 
+    annual_insolation = mean_annual_insolation(panels.calculate_daily_insolation(df))
     print("  Annual insolation values:")
-    print(
-        f"    Horizontal: {df_monthly_insolation['Insolation_horizontal'].mean() * 365}"
-    )
-    print(f"    South: {df_monthly_insolation['Insolation_south'].mean() * 365}")
-    print(
-        f"    South Tilted: {df_monthly_insolation['Insolation_south_tilted'].mean() * 365}"
-    )
-    print(
-        f"    West Tilted: {df_monthly_insolation['Insolation_west_tilted'].mean() * 365}"
-    )
+    print(f"    Horizontal: {annual_insolation['Insolation_horizontal']}")
+    print(f"    South: {annual_insolation['Insolation_south']}")
+    print(f"    South Tilted: {annual_insolation['Insolation_south_tilted']}")
+    print(f"    West Tilted: {annual_insolation['Insolation_west_tilted']}")
 
     print("  Diffuse fraction values:")
     print(
@@ -125,6 +125,11 @@ def main() -> None:
     )
 
     print("\nPart 2-3")
+    optimum = optimize_orientation(df, rho_g=rho_g)
+    print("  Optimal orientation:")
+    print(f"    Azimuth: {optimum.azimuth:.1f}")
+    print(f"    Tilt: {optimum.tilt:.1f}")
+    print(f"    Annual insolation: {optimum.insolation}")
     print("\nPart 2-4")
     print("  Yearly transposition factor:")
     print(
@@ -137,6 +142,9 @@ def main() -> None:
         f"    West Tilted: {df_monthly_insolation['Insolation_west_tilted'].sum() / df_monthly_insolation['Insolation_horizontal'].sum()}"  # type: ignore
     )
 
+    for save_path in default_renderer().wait():
+        print("\nSaved figure:", save_path)
+
 
 if __name__ == "__main__":
     main()
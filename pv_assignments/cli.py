@@ -0,0 +1,248 @@
+"""Command line interface of the irradiance calculations.
+
+Usage:
+    pv-assign transpose --azimuth 63 --tilt 41 --dhi 120 --dni 600 --sun-azimuth -76 --sun-zenith 63
+    pv-assign insolation data.csv --panel south=0,45 --panel west=90,45 --period monthly
+    pv-assign spectrum --am 1.5 3 --plot spectra.png
+
+Only argparse is imported with this module. Every subcommand imports what it needs
+when it runs, and matplotlib is only loaded when a figure is requested, so a short
+compute-only job starts quickly. The import cost is tracked by
+"python -m benchmarks.benchmark imports".
+"""
+
+import argparse
+import sys
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from matplotlib.figure import Figure
+
+SKY_MODELS = ["isotropic", "haydavies", "reindl", "perez"]
+
+
+def _panel(text: str) -> tuple[str, float, float]:
+    """Parse a "name=azimuth,tilt" panel argument."""
+    try:
+        name, orientation = text.split("=")
+        azimuth, tilt = (float(value) for value in orientation.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Expected name=azimuth,tilt, got {text!r}"
+        ) from None
+    return name, azimuth, tilt
+
+
+def _transpose(args: argparse.Namespace) -> None:
+    """Print the plane of array irradiance components for one sun position."""
+    from pv_assignments.utils.panel_irradiation import Panel
+
+    panel = Panel(
+        azimuth=args.azimuth,
+        tilt=args.tilt,
+        rho_g=args.rho_g,
+        sky_model=args.sky_model,
+    )
+    direct, diffuse, ground_reflected = panel.calculate_gpoa_components(
+        args.dhi, args.dni, args.sun_azimuth, args.sun_zenith, dni_extra=args.dni_extra
+    )
+    angle_of_incidence = panel.calculate_angle_of_incidence(
+        args.sun_azimuth, args.sun_zenith
+    )
+    print(f"Angle of incidence: {angle_of_incidence:.2f} degrees")
+    print(f"Direct irradiance: {direct:.2f} W/m^2")
+    print(f"Diffuse irradiance: {diffuse:.2f} W/m^2")
+    print(f"Ground reflected irradiance: {ground_reflected:.2f} W/m^2")
+    print(f"GPOA: {direct + diffuse + ground_reflected:.2f} W/m^2")
+
+
+def _draw_insolation(df: "pd.DataFrame", ylabel: str) -> "Figure":
+    """Draw one line per insolation column."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    for column in df.columns.drop("DateTime"):
+        ax.plot(df["DateTime"], df[column], label=column.removeprefix("Insolation_"))
+    ax.set_xlabel("Date")
+    ax.set_ylabel(ylabel)
+    ax.legend()
+    return fig
+
+
+def _insolation(args: argparse.Namespace) -> None:
+    """Calculate the daily, monthly or annual insolation of an irradiance file."""
+    from pv_assignments.assignment_1.data.part_2_loader import load_data
+    from pv_assignments.utils.batch_runner import prepare_sun_angles
+    from pv_assignments.utils.panel_irradiation import PanelArray, annual_insolation
+
+    panels = args.panel or [("horizontal", 0.0, 0.0)]
+    names, azimuths, tilts = zip(*panels, strict=True)
+    panel_array = PanelArray(
+        azimuths,
+        tilts,
+        args.rho_g,
+        names=list(names),
+        sky_model=args.sky_model,
+    )
+    df = load_data(args.path, columns=["DHI", "DNI", "SolarElevation", "SolarAzimuth"])
+    df = prepare_sun_angles(df, args.latitude, args.longitude)
+
+    daily = panel_array.calculate_daily_insolation(df, cache=False)
+    if args.period == "daily":
+        result, ylabel = daily, "Daily insolation (Wh/m²)"
+    elif args.period == "monthly":
+        result = daily.resample("MS", on="DateTime").mean().reset_index()
+        ylabel = "Monthly insolation (Wh/m²/day)"
+    else:
+        result = annual_insolation(daily)
+        ylabel = "Annual insolation (Wh/m²)"
+
+    if args.output is None:
+        print(result.to_string(index=False))
+    else:
+        result.to_csv(args.output, index=False)
+        print(f"Saved {args.period} insolation to {args.output}")
+    if args.plot is not None:
+        from pv_assignments.utils.figure_renderer import FigureRenderer
+
+        with FigureRenderer(workers=1) as renderer:
+            renderer.submit(_draw_insolation, args.plot, df=result, ylabel=ylabel)
+        print(f"Saved figure: {args.plot}")
+
+
+def _spectrum(args: argparse.Namespace) -> None:
+    """Print the broadband, silicon band and peak irradiance of spectra."""
+    from pv_assignments.assignment_1.data.part_1_loader import load_data
+    from pv_assignments.assignment_1.part_1 import spectral_statistics, stack_spectra
+
+    dfs = [load_data(am, args.water_vapor) for am in args.am]
+    labels = [f"AM {am}" for am in args.am]
+    stats = spectral_statistics(*stack_spectra(dfs, labels, args.column))
+    for i, label in enumerate(stats.labels):
+        print(label)
+        print(f"  Broadband irradiance: {stats.broadband[i]:.2f} W/m²")
+        print(f"  Silicon band irradiance: {stats.bands['Silicon'][i]:.2f} W/m²")
+        print(
+            f"  Peak: {stats.peak_irradiance[i]:.4f} W/m²/nm "
+            f"at {stats.peak_wavelength[i]} nm"
+        )
+    if args.plot is not None:
+        from pv_assignments.assignment_1.part_1 import _draw_spectra
+        from pv_assignments.utils.figure_renderer import FigureRenderer
+
+        with FigureRenderer(workers=1) as renderer:
+            renderer.submit(
+                _draw_spectra,
+                args.plot,
+                dfs=[df[["Wavelength (nm)", *args.column]] for df in dfs],
+                labels=labels,
+                value_names=args.column,
+                peak_wavelengths=True,
+                title=args.title,
+            )
+        print(f"Saved figure: {args.plot}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of pv-assign.
+
+    Returns:
+        argparse.ArgumentParser: Parser with the transpose, insolation and spectrum
+            subcommands.
+    """
+    parser = argparse.ArgumentParser(
+        prog="pv-assign", description=__doc__.splitlines()[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    transpose = commands.add_parser(
+        "transpose", help="Irradiance on a panel for one sun position"
+    )
+    transpose.add_argument("--azimuth", type=float, required=True)
+    transpose.add_argument("--tilt", type=float, required=True)
+    transpose.add_argument("--rho-g", type=float, default=0.2)
+    transpose.add_argument("--sky-model", choices=SKY_MODELS, default="isotropic")
+    transpose.add_argument("--dhi", type=float, required=True, help="W/m²")
+    transpose.add_argument("--dni", type=float, required=True, help="W/m²")
+    transpose.add_argument(
+        "--sun-azimuth", type=float, required=True, help="Degrees, south convention"
+    )
+    transpose.add_argument("--sun-zenith", type=float, required=True)
+    transpose.add_argument(
+        "--dni-extra",
+        type=float,
+        default=None,
+        help="Extraterrestrial irradiance of the anisotropic sky models (W/m²)",
+    )
+    transpose.set_defaults(run=_transpose)
+
+    insolation = commands.add_parser(
+        "insolation", help="Insolation on panels from an irradiance file"
+    )
+    insolation.add_argument(
+        "path",
+        nargs="?",
+        default=None,
+        help="CSV file with the schema of the part 2 file (default: the part 2 file)",
+    )
+    insolation.add_argument(
+        "--panel",
+        type=_panel,
+        action="append",
+        help="Panel as name=azimuth,tilt, can be repeated (default: horizontal)",
+    )
+    insolation.add_argument("--rho-g", type=float, default=0.2)
+    insolation.add_argument("--sky-model", choices=SKY_MODELS, default="isotropic")
+    insolation.add_argument(
+        "--period", choices=["daily", "monthly", "annual"], default="monthly"
+    )
+    insolation.add_argument(
+        "--latitude", type=float, default=None, help="For files without sun angles"
+    )
+    insolation.add_argument(
+        "--longitude", type=float, default=None, help="For files without sun angles"
+    )
+    insolation.add_argument("-o", "--output", default=None, help="Output CSV")
+    insolation.add_argument("--plot", default=None, help="Output figure")
+    insolation.set_defaults(run=_insolation)
+
+    spectrum = commands.add_parser(
+        "spectrum", help="Broadband and peak irradiance of the part 1 spectra"
+    )
+    spectrum.add_argument(
+        "--am", nargs="+", default=["1.5"], help="Air masses: 1.5, 3, 4.5 or 6"
+    )
+    spectrum.add_argument(
+        "--water-vapor", default=None, help="0, 0.71 or 2.13 cm (default: 1.42 cm)"
+    )
+    spectrum.add_argument(
+        "--column",
+        nargs="+",
+        default=["Global to perpendicular plane  (W/m2/nm)"],
+        help="Columns of the workbooks",
+    )
+    spectrum.add_argument("--plot", default=None, help="Output figure")
+    spectrum.add_argument("--title", default=None, help="Title of the figure")
+    spectrum.set_defaults(run=_spectrum)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run pv-assign.
+
+    Args:
+        argv (Sequence[str] | None, optional): Arguments. If None, the command line
+            arguments are used. Defaults to None.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(args)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"pv-assign {args.command}: {error}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
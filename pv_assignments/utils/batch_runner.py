@@ -0,0 +1,218 @@
+"""Batch runner for the transposition and insolation pipeline over many sites.
+
+Every irradiance file in a manifest is loaded with part_2_loader.load_data and run
+through one PanelArray holding all panel configurations. The files are spread over
+a process pool. Workers write their results straight into a shared memory array, so
+only a file index and a short status string are pickled per task.
+
+Usage:
+    python -m pv_assignments.utils.batch_runner manifest.csv panels.csv -o results.csv
+
+The manifest has a "path" column and optional "latitude" and "longitude" columns,
+which are used to compute the sun's position for files without
+"SolarElevation"/"SolarAzimuth" columns. The panel file has "name", "azimuth", "tilt"
+and optional "rho_g" columns.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.assignment_1.data.part_2_loader import load_data
+from pv_assignments.utils.panel_irradiation import PanelArray, mean_annual_insolation
+from pv_assignments.utils.solar_position import add_solar_position
+
+MONTHS = [
+    "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+    "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
+]  # fmt: skip
+
+# Result columns per (file, panel): annual insolation, then the mean daily
+# insolation of each calendar month
+_N_RESULTS = 1 + len(MONTHS)
+
+# State of a worker process, set once by _init_worker
+_worker: dict = {}
+
+
+def prepare_sun_angles(
+    df: pd.DataFrame, latitude: float | None = None, longitude: float | None = None
+) -> pd.DataFrame:
+    """Add the "Azimuth" and "Zenith" columns that Panel expects.
+
+    Files with "SolarElevation"/"SolarAzimuth" columns are converted like in part 2,
+    for other files the position is computed from the latitude and longitude.
+
+    Args:
+        df (pd.DataFrame): Irradiance data with a "DateTime" column.
+        latitude (float | None, optional): Latitude of the site (degrees). Defaults to None.
+        longitude (float | None, optional): Longitude of the site (degrees). Defaults to None.
+
+    Returns:
+        pd.DataFrame: The data with "Azimuth" and "Zenith" columns.
+    """
+    if {"SolarElevation", "SolarAzimuth"}.issubset(df.columns):
+        df = df.rename(columns={"SolarElevation": "Zenith", "SolarAzimuth": "Azimuth"})
+        df["Zenith"] = 90 - df["Zenith"]  # Convert elevation to zenith
+        df["Azimuth"] = df["Azimuth"] - 180  # Convert to south convention
+        return df
+    if latitude is None or longitude is None or np.isnan([latitude, longitude]).any():
+        raise ValueError(
+            "Latitude and longitude are needed without solar angle columns"
+        )
+    return add_solar_position(df, latitude, longitude)
+
+
+def _site_results(panels: PanelArray, df: pd.DataFrame) -> np.ndarray:
+    """Annual and per-calendar-month insolation for every panel at one site."""
+    # Every site is only visited once, so its results are not worth caching
+    daily = panels.calculate_daily_insolation(df, cache=False)
+    values = daily.drop(columns="DateTime")
+    monthly = values.groupby(daily["DateTime"].dt.month).mean().reindex(range(1, 13))
+    results = np.empty((len(panels), _N_RESULTS))
+    results[:, 0] = mean_annual_insolation(daily).to_numpy()
+    results[:, 1:] = monthly.to_numpy().T
+    return results
+
+
+def _init_worker(
+    shm_name: str, shape: tuple[int, int, int], panel_config: pd.DataFrame
+) -> None:
+    """Attach a worker to the shared result array and build its panels once."""
+    # Workers must not unlink the block when they exit, the parent owns it
+    kwargs = {"track": False} if sys.version_info >= (3, 13) else {}
+    shm = shared_memory.SharedMemory(name=shm_name, **kwargs)
+    _worker["shm"] = shm
+    _worker["results"] = np.ndarray(shape, dtype=float, buffer=shm.buf)
+    _worker["panels"] = _panels(panel_config)
+
+
+def _run_site(task: tuple[int, str, float, float]) -> tuple[int, str]:
+    """Process one file and write its results into the shared array."""
+    index, path, latitude, longitude = task
+    try:
+        df = prepare_sun_angles(load_data(path), latitude, longitude)
+        _worker["results"][index] = _site_results(_worker["panels"], df)
+        return index, ""
+    except Exception as error:
+        _worker["results"][index] = np.nan
+        return index, f"{type(error).__name__}: {error}"
+
+
+def _run_sites(tasks: list[tuple[int, str, float, float]]) -> list[tuple[int, str]]:
+    """Process a chunk of files, so one pickled task covers several files."""
+    return [_run_site(task) for task in tasks]
+
+
+def _panels(panel_config: pd.DataFrame) -> PanelArray:
+    """Build the PanelArray of a panel configuration table."""
+    return PanelArray(
+        azimuths=panel_config["azimuth"].to_numpy(dtype=float),
+        tilts=panel_config["tilt"].to_numpy(dtype=float),
+        rho_gs=(
+            panel_config["rho_g"].to_numpy(dtype=float)
+            if "rho_g" in panel_config
+            else 0.2
+        ),
+        names=panel_config["name"].astype(str).tolist(),
+    )
+
+
+def run_batch(
+    manifest: pd.DataFrame,
+    panel_config: pd.DataFrame,
+    workers: int | None = None,
+    chunksize: int | None = None,
+) -> pd.DataFrame:
+    """Run the insolation pipeline for every file and panel configuration.
+
+    Args:
+        manifest (pd.DataFrame): One row per irradiance file, with a "path" column and
+            optional "latitude" and "longitude" columns.
+        panel_config (pd.DataFrame): One row per panel, with "name", "azimuth", "tilt"
+            and optional "rho_g" columns.
+        workers (int | None, optional): Number of worker processes. 1 runs everything
+            in this process. If None, all cores are used. Defaults to None.
+        chunksize (int | None, optional): Files per pickled task. If None, the files
+            are split in about four chunks per worker. Defaults to None.
+
+    Returns:
+        pd.DataFrame: One row per (file, panel) with the annual insolation (Wh/m²),
+            the mean daily insolation per calendar month (Wh/m²) and an "error" column.
+    """
+    n_files, n_panels = len(manifest), len(panel_config)
+    workers = workers or os.cpu_count() or 1
+    tasks = [
+        (
+            i,
+            str(row["path"]),
+            float(row.get("latitude", np.nan)),
+            float(row.get("longitude", np.nan)),
+        )
+        for i, (_, row) in enumerate(manifest.iterrows())
+    ]
+    shape = (n_files, n_panels, _N_RESULTS)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    try:
+        if workers == 1 or n_files <= 1:
+            _worker["results"] = np.ndarray(shape, dtype=float, buffer=shm.buf)
+            _worker["panels"] = _panels(panel_config)
+            statuses = _run_sites(tasks)
+        else:
+            if chunksize is None:
+                chunksize = max(1, n_files // (workers * 4))
+            chunks = [tasks[i : i + chunksize] for i in range(0, n_files, chunksize)]
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(shm.name, shape, panel_config),
+            ) as pool:
+                statuses = [s for chunk in pool.map(_run_sites, chunks) for s in chunk]
+        results = np.array(np.ndarray(shape, dtype=float, buffer=shm.buf))
+    finally:
+        _worker.clear()
+        shm.close()
+        shm.unlink()
+
+    errors = dict(statuses)
+    table = pd.DataFrame(
+        results.reshape(n_files * n_panels, _N_RESULTS),
+        columns=["annual"] + MONTHS,
+    )
+    table.insert(0, "panel", np.tile(panel_config["name"].astype(str), n_files))
+    table.insert(
+        0, "path", np.repeat(manifest["path"].astype(str), n_panels).to_numpy()
+    )
+    table["error"] = np.repeat([errors[i] for i in range(n_files)], n_panels)
+    return table
+
+
+def main() -> None:
+    """Run the batch runner from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("manifest", help="CSV file with a 'path' column per site")
+    parser.add_argument(
+        "panels", help="CSV file with 'name', 'azimuth', 'tilt' columns"
+    )
+    parser.add_argument("-o", "--output", default="results.csv", help="Output CSV")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    args = parser.parse_args()
+
+    table = run_batch(
+        pd.read_csv(args.manifest),
+        pd.read_csv(args.panels),
+        workers=args.workers,
+        chunksize=args.chunksize,
+    )
+    table.to_csv(args.output, index=False)
+    print(f"Saved results for {table['path'].nunique()} files to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Helpers for the on-disk caches of converted data files."""
+
+import hashlib
+import os
+from pathlib import Path
+
+# Bump when the layout of a cache entry changes, so old entries are not reused
+CACHE_VERSION = 2
+
+
+def cache_dir(name: str) -> Path:
+    """Return (and create) the cache directory for a kind of cached data.
+
+    The root is taken from the PV_ASSIGNMENTS_CACHE environment variable and
+    defaults to ~/.cache/pv_assignments.
+
+    Args:
+        name (str): Name of the sub directory, e.g. "irradiance".
+
+    Returns:
+        Path: The cache directory.
+    """
+    root = os.environ.get("PV_ASSIGNMENTS_CACHE")
+    path = (Path(root) if root else Path.home() / ".cache" / "pv_assignments") / name
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def file_key(path: str | os.PathLike) -> str:
+    """Return a key identifying the current version of a file.
+
+    The key is built from the resolved path, size and modification time, so a
+    changed file gets a new key without having to hash its content.
+
+    Args:
+        path (str | os.PathLike): Path of the source file.
+
+    Returns:
+        str: Hex digest identifying the file.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    fingerprint = f"{CACHE_VERSION}|{path}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
@@ -0,0 +1,125 @@
+"""Extraterrestrial and clear-sky irradiance."""
+
+import numpy as np
+import pandas as pd
+
+SOLAR_CONSTANT = 1361.1  # W/m²
+
+
+def _spencer(day_of_year: np.ndarray) -> np.ndarray:
+    """Extraterrestrial normal irradiance (W/m²) on the given days of the year."""
+    day_angle = 2 * np.pi * (day_of_year - 1) / 365
+    return SOLAR_CONSTANT * (
+        1.00011
+        + 0.034221 * np.cos(day_angle)
+        + 0.00128 * np.sin(day_angle)
+        + 0.000719 * np.cos(2 * day_angle)
+        + 0.000077 * np.sin(2 * day_angle)
+    )
+
+
+# The irradiance only depends on the day, so it is looked up per day of the year
+_SPENCER_TABLE = _spencer(np.arange(1, 367, dtype=float))
+
+
+def extraterrestrial_irradiance(
+    times: pd.DatetimeIndex | pd.Series,
+) -> np.ndarray:
+    """Calculate the extraterrestrial normal irradiance with Spencer's (1971) series.
+
+    Args:
+        times (pd.DatetimeIndex | pd.Series): Timestamps.
+
+    Returns:
+        np.ndarray: Irradiance on a plane normal to the sun at the top of the
+            atmosphere (W/m²).
+    """
+    return _SPENCER_TABLE[pd.DatetimeIndex(times).dayofyear.to_numpy() - 1]
+
+
+def air_mass(zenith: float | np.ndarray) -> float | np.ndarray:
+    """Calculate the relative air mass with the Kasten-Young formula.
+
+    Args:
+        zenith (float | np.ndarray): Zenith angle of the sun (degrees).
+
+    Returns:
+        float | np.ndarray: Relative air mass. NaN when the sun is below the horizon.
+    """
+    zenith = np.asarray(zenith, dtype=float)
+    clipped = np.minimum(zenith, 90)
+    am = 1 / (np.cos(np.radians(clipped)) + 0.50572 * (96.07995 - clipped) ** -1.6364)
+    am = np.where(zenith < 90, am, np.nan)
+    return am[()] if am.ndim == 0 else am
+
+
+def haurwitz(zenith: float | np.ndarray) -> float | np.ndarray:
+    """Calculate the clear-sky GHI with the Haurwitz model.
+
+    Args:
+        zenith (float | np.ndarray): Zenith angle of the sun (degrees).
+
+    Returns:
+        float | np.ndarray: Clear-sky GHI (W/m²). 0 when the sun is below the horizon.
+    """
+    cos_zenith = np.cos(np.radians(np.asarray(zenith, dtype=float)))
+    day = cos_zenith > 0
+    safe = np.where(day, cos_zenith, 1.0)
+    ghi = np.where(day, 1098 * cos_zenith * np.exp(-0.057 / safe), 0.0)
+    return ghi[()] if ghi.ndim == 0 else ghi
+
+
+def ineichen(
+    zenith: float | np.ndarray,
+    times: pd.DatetimeIndex | pd.Series,
+    linke_turbidity: float | np.ndarray = 3.0,
+    altitude: float = 0.0,
+    dni_extra: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Calculate the clear-sky irradiance with the Ineichen-Perez model.
+
+    Follows Ineichen and Perez (2002) with the beam correction of the original
+    paper, as implemented in pvlib.
+
+    Args:
+        zenith (float | np.ndarray): Zenith angle of the sun (degrees).
+        times (pd.DatetimeIndex | pd.Series): Timestamps, for the extraterrestrial
+            irradiance.
+        linke_turbidity (float | np.ndarray, optional): Linke turbidity factor, as one
+            value or one per timestep. Typical values are 2-3 in clean Northern
+            European air and 3-5 in more polluted or humid air. Defaults to 3.
+        altitude (float, optional): Altitude of the site (m). Defaults to 0.
+        dni_extra (np.ndarray | None, optional): Extraterrestrial irradiance of the
+            timestamps, if it was already computed. Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Clear-sky GHI, DNI and DHI (W/m²).
+            0 when the sun is below the horizon.
+    """
+    zenith = np.asarray(zenith, dtype=float)
+    cos_zenith = np.maximum(np.cos(np.radians(zenith)), 0)
+    if dni_extra is None:
+        dni_extra = extraterrestrial_irradiance(times)
+    tl = np.asarray(linke_turbidity, dtype=float)
+
+    # Absolute air mass with the standard pressure at the altitude
+    pressure_ratio = (1 - 2.25577e-5 * altitude) ** 5.25588
+    am = np.nan_to_num(air_mass(zenith), nan=0.0) * pressure_ratio
+
+    fh1 = np.exp(-altitude / 8000)
+    fh2 = np.exp(-altitude / 1250)
+    cg1 = 5.09e-5 * altitude + 0.868
+    cg2 = 3.92e-5 * altitude + 0.0387
+    ghi = cg1 * dni_extra * cos_zenith * np.exp(-cg2 * am * (fh1 + fh2 * (tl - 1)))
+
+    b = 0.664 + 0.163 / fh1
+    beam = dni_extra * b * np.exp(-0.09 * am * (tl - 1))
+    # Empirical correction that keeps the beam below the global irradiance
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correction = (1 - (0.1 - 0.2 * np.exp(-tl)) / (0.1 + 0.882 / fh1)) / cos_zenith
+        dni = np.minimum(beam, ghi * correction)
+    day = zenith < 90
+    dni = np.where(day, dni, 0.0)
+    ghi = np.where(day, ghi, 0.0)
+    dhi = ghi - dni * cos_zenith
+    return ghi, dni, dhi
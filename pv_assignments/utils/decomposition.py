@@ -0,0 +1,230 @@
+"""Separation of GHI into DNI and DHI, for sites that only measure GHI.
+
+All models work on whole arrays at once:
+
+- "erbs": Erbs et al. (1982), diffuse fraction as a piecewise polynomial of the
+  clearness index.
+- "disc": Maxwell's (1987) DISC model, direct beam clearness index from the
+  clearness index and the air mass.
+- "engerer": Engerer's (2015) Engerer2 model, a logistic function of the clearness
+  index, apparent solar time, zenith and departure from a clear sky, tuned for
+  minute data and cloud enhancement.
+
+The results have the "DNI" and "DHI" columns that Panel and PanelArray expect.
+"""
+
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.clear_sky import extraterrestrial_irradiance, haurwitz
+from pv_assignments.utils.solar_position import apparent_solar_time
+
+# Near the horizon cos(zenith) makes the clearness index blow up, so it is floored
+_MIN_COS_ZENITH = 0.065
+# Above this zenith angle all irradiance is taken to be diffuse
+_MAX_ZENITH = 87.0
+
+# Engerer2 coefficients for 1-minute data (Engerer 2015, table 6)
+_ENGERER2 = {
+    "c": 4.2336e-2,
+    "b0": -3.7912,
+    "b1": 7.5479,
+    "b2": -1.0036e-2,
+    "b3": 3.1480e-3,
+    "b4": -5.3146,
+    "b5": 1.7073,
+}
+
+
+def _clearness_index(
+    ghi: np.ndarray, cos_zenith: np.ndarray, dni_extra: np.ndarray
+) -> np.ndarray:
+    """Ratio of GHI to the extraterrestrial horizontal irradiance, clipped to [0, 1]."""
+    horizontal_extra = dni_extra * np.maximum(cos_zenith, _MIN_COS_ZENITH)
+    return np.clip(ghi / horizontal_extra, 0, 1)
+
+
+def _split(
+    ghi: np.ndarray,
+    cos_zenith: np.ndarray,
+    zenith: np.ndarray,
+    diffuse_fraction: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """DNI and DHI from a diffuse fraction, with all-diffuse light near the horizon."""
+    dhi = diffuse_fraction * ghi
+    low_sun = zenith > _MAX_ZENITH
+    dhi = np.where(low_sun, ghi, dhi)
+    dni = np.where(low_sun, 0.0, (ghi - dhi) / np.where(low_sun, 1.0, cos_zenith))
+    return dni, dhi
+
+
+def _inputs(
+    ghi: np.ndarray, zenith: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """GHI (negative values clipped to 0), zenith and cos(zenith) as float arrays."""
+    ghi = np.maximum(np.asarray(ghi, dtype=float), 0)
+    zenith = np.asarray(zenith, dtype=float)
+    return ghi, zenith, np.cos(np.radians(zenith))
+
+
+def erbs(
+    ghi: np.ndarray, zenith: np.ndarray, times: pd.DatetimeIndex | pd.Series
+) -> tuple[np.ndarray, np.ndarray]:
+    """Separate GHI into DNI and DHI with the Erbs model.
+
+    Args:
+        ghi (np.ndarray): Global horizontal irradiance (W/m²).
+        zenith (np.ndarray): Zenith angle of the sun (degrees).
+        times (pd.DatetimeIndex | pd.Series): Timestamps.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: DNI and DHI (W/m²).
+    """
+    ghi, zenith, cos_zenith = _inputs(ghi, zenith)
+    kt = _clearness_index(ghi, cos_zenith, extraterrestrial_irradiance(times))
+
+    diffuse_fraction = np.where(
+        kt <= 0.22,
+        1 - 0.09 * kt,
+        np.where(
+            kt <= 0.8,
+            0.9511 + kt * (-0.1604 + kt * (4.388 + kt * (-16.638 + kt * 12.336))),
+            0.165,
+        ),
+    )
+    return _split(ghi, cos_zenith, zenith, diffuse_fraction)
+
+
+def disc(
+    ghi: np.ndarray,
+    zenith: np.ndarray,
+    times: pd.DatetimeIndex | pd.Series,
+    pressure: float | np.ndarray = 101325.0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Separate GHI into DNI and DHI with the DISC model.
+
+    Args:
+        ghi (np.ndarray): Global horizontal irradiance (W/m²).
+        zenith (np.ndarray): Zenith angle of the sun (degrees).
+        times (pd.DatetimeIndex | pd.Series): Timestamps.
+        pressure (float | np.ndarray, optional): Site pressure (Pa). Defaults to 101325.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: DNI and DHI (W/m²).
+    """
+    ghi, zenith, cos_zenith = _inputs(ghi, zenith)
+    dni_extra = extraterrestrial_irradiance(times)
+    kt = _clearness_index(ghi, cos_zenith, dni_extra)
+
+    # Kasten (1966) air mass, as in the original model, corrected for pressure
+    clipped = np.minimum(zenith, _MAX_ZENITH)
+    am = (1 / (np.cos(np.radians(clipped)) + 0.15 * (93.885 - clipped) ** -1.253)) * (
+        np.asarray(pressure) / 101325.0
+    )
+
+    knc = 0.866 + am * (-0.122 + am * (0.0121 + am * (-0.000653 + am * 0.000014)))
+    cloudy = kt <= 0.6
+    a = np.where(
+        cloudy,
+        0.512 + kt * (-1.56 + kt * (2.286 - 2.222 * kt)),
+        -5.743 + kt * (21.77 + kt * (-27.49 + 11.56 * kt)),
+    )
+    b = np.where(
+        cloudy,
+        0.37 + 0.962 * kt,
+        41.4 + kt * (-118.5 + kt * (66.05 + 31.9 * kt)),
+    )
+    c = np.where(
+        cloudy,
+        -0.28 + kt * (0.932 - 2.048 * kt),
+        -47.01 + kt * (184.2 + kt * (-222.0 + 73.81 * kt)),
+    )
+    kn = knc - (a + b * np.exp(c * am))
+
+    dni = np.maximum(kn * dni_extra, 0)
+    dni = np.where((zenith > _MAX_ZENITH) | ~np.isfinite(dni), 0.0, dni)
+    dni = np.minimum(dni, ghi / np.maximum(cos_zenith, _MIN_COS_ZENITH))
+    dni = np.where(np.isnan(ghi), np.nan, dni)
+    return dni, ghi - dni * cos_zenith
+
+
+def engerer(
+    ghi: np.ndarray,
+    zenith: np.ndarray,
+    times: pd.DatetimeIndex | pd.Series,
+    longitude: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Separate GHI into DNI and DHI with the Engerer2 model.
+
+    The clear-sky GHI is taken from the Haurwitz model.
+
+    Args:
+        ghi (np.ndarray): Global horizontal irradiance (W/m²).
+        zenith (np.ndarray): Zenith angle of the sun (degrees).
+        times (pd.DatetimeIndex | pd.Series): Timestamps. Naive timestamps are taken
+            to be UTC.
+        longitude (float): Longitude of the site (degrees, east positive).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: DNI and DHI (W/m²).
+    """
+    ghi, zenith, cos_zenith = _inputs(ghi, zenith)
+    dni_extra = extraterrestrial_irradiance(times)
+    kt = _clearness_index(ghi, cos_zenith, dni_extra)
+
+    ghi_clear = haurwitz(zenith)
+    ktc = _clearness_index(ghi_clear, cos_zenith, dni_extra)
+    # Share of the GHI above the clear-sky GHI, i.e. from cloud enhancement
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kde = np.where(ghi > 0, np.maximum(1 - ghi_clear / ghi, 0), 0.0)
+
+    k = _ENGERER2
+    exponent = (
+        k["b0"]
+        + k["b1"] * kt
+        + k["b2"] * apparent_solar_time(times, longitude)
+        + k["b3"] * zenith
+        + k["b4"] * (ktc - kt)
+    )
+    diffuse_fraction = k["c"] + (1 - k["c"]) / (1 + np.exp(exponent)) + k["b5"] * kde
+    return _split(ghi, cos_zenith, zenith, np.clip(diffuse_fraction, 0, 1))
+
+
+def add_dni_dhi(
+    df: pd.DataFrame,
+    model: Literal["erbs", "disc", "engerer"] = "erbs",
+    longitude: float | None = None,
+) -> pd.DataFrame:
+    """Return a copy of an irradiance DataFrame with DNI and DHI derived from GHI.
+
+    The result can be passed to Panel.calculate_daily_insolation and
+    Panel.calculate_monthly_insolation like measured data.
+
+    Args:
+        df (pd.DataFrame): DataFrame with "DateTime", "GHI" and "Zenith" columns.
+        model ("erbs" | "disc" | "engerer", optional): Separation model.
+            Defaults to "erbs".
+        longitude (float | None, optional): Longitude of the site (degrees), needed by
+            the "engerer" model. Defaults to None.
+
+    Returns:
+        pd.DataFrame: Copy of the DataFrame with "DNI" and "DHI" columns.
+    """
+    ghi = df["GHI"].to_numpy(dtype=float)
+    zenith = df["Zenith"].to_numpy(dtype=float)
+    if model == "erbs":
+        dni, dhi = erbs(ghi, zenith, df["DateTime"])
+    elif model == "disc":
+        dni, dhi = disc(ghi, zenith, df["DateTime"])
+    elif model == "engerer":
+        if longitude is None:
+            raise ValueError("The engerer model needs the longitude of the site")
+        dni, dhi = engerer(ghi, zenith, df["DateTime"], longitude)
+    else:
+        raise ValueError(f"Unknown decomposition model: {model}")
+    df = df.copy()
+    df["DNI"] = dni
+    df["DHI"] = dhi
+    return df
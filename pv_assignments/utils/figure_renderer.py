@@ -0,0 +1,254 @@
+"""Headless figure rendering in a process pool, with a content-keyed cache.
+
+A figure job is a drawing function that returns a matplotlib Figure, the data it is
+drawn from, and an output path. Jobs are queued with FigureRenderer.submit, which
+returns a future of the output path right away. The figures are rendered with the
+Agg backend in worker processes.
+
+Every rendered figure is kept in the "figures" cache directory under a hash of the
+data, the drawing function's source file, the dpi and the matplotlib version. A
+job whose hash is already in the cache is not rendered again. Its output is copied
+from the cache, or left alone if it is unchanged.
+
+The number of workers of the default renderer is set with the
+PV_ASSIGNMENTS_RENDER_WORKERS environment variable. 1 renders in the calling
+process.
+
+matplotlib is only imported where a figure is rendered, so modules that queue
+figures stay cheap to import for jobs that never plot.
+"""
+
+import filecmp
+import functools
+import hashlib
+import inspect
+import os
+import shutil
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from importlib import metadata, resources
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.cache import CACHE_VERSION, cache_dir
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# Drawing function of a figure job: data in, Figure out
+DrawFunction = Callable[..., "Figure"]
+
+
+def _update_hash(hasher: "hashlib._Hash", value: object) -> None:
+    """Feed the content of a (nested) value to a hash."""
+    if isinstance(value, pd.DataFrame | pd.Series):
+        hasher.update(
+            repr(value.columns.tolist() if value.ndim == 2 else value.name).encode()
+        )
+        hasher.update(
+            pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()
+        )
+    elif isinstance(value, np.ndarray):
+        hasher.update(f"{value.dtype}{value.shape}".encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            hasher.update(repr(key).encode())
+            _update_hash(hasher, value[key])
+    elif isinstance(value, list | tuple):
+        hasher.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update_hash(hasher, item)
+    else:
+        hasher.update(repr(value).encode())
+
+
+@functools.cache
+def _matplotlib_version() -> str:
+    """Installed matplotlib version, read without importing matplotlib."""
+    return metadata.version("matplotlib")
+
+
+def figure_key(draw: DrawFunction, dpi: int, data: dict) -> str:
+    """Hash identifying the output of a figure job.
+
+    The source file of the drawing function is part of the key, so editing the
+    plotting code or its style invalidates the cached figures.
+
+    Args:
+        draw (DrawFunction): Drawing function of the job.
+        dpi (int): Resolution of the output.
+        data (dict): Keyword arguments of the drawing function.
+
+    Returns:
+        str: Hex digest identifying the figure.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(
+        f"{CACHE_VERSION}:{_matplotlib_version()}:{draw.__qualname__}:{dpi}".encode()
+    )
+    hasher.update(Path(inspect.getfile(draw)).read_bytes())
+    _update_hash(hasher, data)
+    return hasher.hexdigest()[:32]
+
+
+def _init_worker() -> None:
+    """Make a worker process render without a display."""
+    import matplotlib
+
+    matplotlib.use("Agg", force=True)
+
+
+def _render(draw: DrawFunction, data: dict, entry: Path, dpi: int) -> None:
+    """Draw a figure and save it to its cache entry."""
+    import matplotlib.pyplot as plt
+
+    fig = draw(**data)
+    # The entry is written under a temporary name and renamed, so other renderers
+    # never see a half written file
+    tmp = entry.with_name(f"{entry.stem}.{os.getpid()}.tmp{entry.suffix}")
+    try:
+        fig.savefig(tmp, dpi=dpi, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    os.replace(tmp, entry)
+
+
+def _render_job(
+    draw: DrawFunction, data: dict, entry: Path, path: Path, dpi: int
+) -> str:
+    """Render a figure job and copy it to its output path."""
+    _render(draw, data, entry, dpi)
+    shutil.copyfile(entry, path)
+    return str(path)
+
+
+class FigureRenderer:
+    """Queue of figure jobs rendered in a process pool."""
+
+    def __init__(self, workers: int | None = None, cache: bool = True) -> None:
+        """Initialize the renderer. The pool is started with the first job.
+
+        Args:
+            workers (int | None, optional): Number of worker processes. 1 renders in
+                the calling process when the job is submitted. If None, all cores
+                are used. Defaults to None.
+            cache (bool, optional): Whether to skip figures whose hash is in the cache.
+                Defaults to True.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache
+        self.rendered = 0
+        self.skipped = 0
+        self._pool: ProcessPoolExecutor | None = None
+        self._futures: list[Future[str]] = []
+
+    def submit(
+        self,
+        draw: DrawFunction,
+        path: str | os.PathLike,
+        dpi: int = 300,
+        **data: object,
+    ) -> Future[str]:
+        """Queue a figure job.
+
+        Args:
+            draw (DrawFunction): Module level function that draws the figure from the
+                data and returns it. It must be picklable.
+            path (str | os.PathLike): Output file. The format follows the suffix.
+            dpi (int, optional): Resolution of the output. Defaults to 300.
+            **data (object): Keyword arguments of the drawing function.
+
+        Returns:
+            Future[str]: Future of the output path. It is already done when the
+                figure was in the cache or is rendered in the calling process.
+        """
+        path = Path(path)
+        entry = cache_dir("figures") / f"{figure_key(draw, dpi, data)}{path.suffix}"
+        future: Future[str]
+        if self.cache and entry.exists():
+            if not (path.exists() and filecmp.cmp(entry, path, shallow=False)):
+                shutil.copyfile(entry, path)
+            self.skipped += 1
+            future = Future()
+            future.set_result(str(path))
+        elif self.workers == 1:
+            future = Future()
+            try:
+                future.set_result(_render_job(draw, data, entry, path, dpi))
+            except Exception as error:
+                future.set_exception(error)
+            self.rendered += 1
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker
+                )
+            future = self._pool.submit(_render_job, draw, data, entry, path, dpi)
+            self.rendered += 1
+        self._futures.append(future)
+        return future
+
+    def wait(self) -> list[str]:
+        """Wait for all queued jobs.
+
+        Returns:
+            list[str]: Output paths of the jobs in the order they were submitted.
+
+        Raises:
+            Exception: The first error of a failed job.
+        """
+        futures, self._futures = self._futures, []
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        """Wait for all queued jobs and stop the worker processes."""
+        try:
+            self.wait()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self) -> "FigureRenderer":
+        """Use the renderer as a context manager that shuts it down on exit."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Shut the renderer down."""
+        self.shutdown()
+
+
+_default_renderer: FigureRenderer | None = None
+
+
+def figure_path(
+    fig_title: str, package: str = "pv_assignments.assignment_1.figures"
+) -> str:
+    """Return the output path of a figure in a figures package.
+
+    Args:
+        fig_title (str): Title of the figure, used as the file name.
+        package (str, optional): Package the figure is saved in. Defaults to
+            "pv_assignments.assignment_1.figures".
+
+    Returns:
+        str: Path of the PNG file.
+    """
+    return str(resources.files(package).joinpath(f"{fig_title}.png"))
+
+
+def default_renderer() -> FigureRenderer:
+    """Return the process-wide renderer used by the plot functions.
+
+    Returns:
+        FigureRenderer: The renderer, created on first use.
+    """
+    global _default_renderer
+    if _default_renderer is None:
+        workers = os.environ.get("PV_ASSIGNMENTS_RENDER_WORKERS")
+        _default_renderer = FigureRenderer(workers=int(workers) if workers else None)
+    return _default_renderer
@@ -0,0 +1,193 @@
+"""Time-weighted integration of irradiance into daily insolation.
+
+Unlike the mean GPOA times 24, this uses the actual timestamp deltas, so it works for
+any (also irregular) sampling interval. Every sample is held constant until the next
+one. Durations are elapsed (UTC) time and the days run from local midnight to local
+midnight, so a day with a DST change has 23 or 25 hours. Missing data is not turned
+into zeros:
+
+- NaN values while the sun is below the horizon count as 0 W/m² (night).
+- Other NaN values, and gaps between timestamps longer than `max_gap_factor` times
+  the nominal step, are missing. Runs of missing data up to `max_fill_hours` long are
+  filled by linear interpolation in time, longer ones stay missing.
+
+Every day reports the fraction of it that was measured and filled, and days with
+too little data are flagged and get a NaN insolation.
+"""
+
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+_HOURS_PER_DAY = 24.0
+
+
+def _accumulate(
+    start: np.ndarray,
+    end: np.ndarray,
+    value_start: np.ndarray,
+    value_end: np.ndarray,
+    edges: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Integrate linear segments and add them to per-day bins.
+
+    Times and the day edges (the midnights) are in hours since midnight of the first
+    day. Segments shorter than a day are split at midnight, so each part is added to
+    its own day.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Energy (Wh/m²) and duration (hours) per day.
+    """
+    keep = end > start
+    start, end = start[keep], end[keep]
+    value_start, value_end = value_start[keep], value_end[keep]
+
+    n_days = edges.size - 1
+    day = np.searchsorted(edges, start, side="right") - 1
+    midnight = np.minimum(edges[day + 1], end)
+    slope = (value_end - value_start) / (end - start)
+    value_midnight = value_start + slope * (midnight - start)
+
+    days = np.concatenate([day, day + 1]).astype(int)
+    duration = np.concatenate([midnight - start, end - midnight])
+    energy = duration * np.concatenate(
+        [(value_start + value_midnight) / 2, (value_midnight + value_end) / 2]
+    )
+    return (
+        np.bincount(days, weights=energy, minlength=n_days + 1)[:n_days],
+        np.bincount(days, weights=duration, minlength=n_days + 1)[:n_days],
+    )
+
+
+def integrate_daily_insolation(
+    date_time: pd.Series | pd.DatetimeIndex,
+    gpoa: np.ndarray,
+    zenith_sun: np.ndarray | None = None,
+    fill: Literal["interpolate", "none"] = "interpolate",
+    max_fill_hours: float = 3.0,
+    max_gap_factor: float = 1.5,
+    min_coverage: float = 0.9,
+) -> pd.DataFrame:
+    """Integrate irradiance over the actual timestamps into daily insolation.
+
+    Args:
+        date_time (pd.Series | pd.DatetimeIndex): Timestamp of every sample.
+        gpoa (np.ndarray): Irradiance of every sample (W/m²), NaN where missing.
+        zenith_sun (np.ndarray | None, optional): Zenith angle of the sun (degrees). NaN
+            values with the sun below the horizon count as 0. If None, every NaN is
+            missing. Defaults to None.
+        fill ("interpolate" | "none", optional): How to treat missing data.
+            Defaults to "interpolate".
+        max_fill_hours (float, optional): Longest run of missing data that is filled
+            (hours). Defaults to 3.0.
+        max_gap_factor (float, optional): A step longer than this times the nominal
+            (median) step is a gap in the data. Defaults to 1.5.
+        min_coverage (float, optional): Smallest measured plus filled fraction of a day
+            for its insolation to be reported. Defaults to 0.9.
+
+    Returns:
+        pd.DataFrame: Per day the "DateTime", "Insolation" (Wh/m²), "Coverage" (measured
+            fraction), "Filled" (filled fraction) and "Flag" (too little data).
+    """
+    if not 0 < max_fill_hours <= _HOURS_PER_DAY:
+        raise ValueError("max_fill_hours must be in (0, 24]")
+    date_time = pd.DatetimeIndex(date_time)
+    gpoa = np.asarray(gpoa, dtype=float)
+    order = np.argsort(date_time.asi8, kind="stable")
+    date_time, gpoa = date_time[order], gpoa[order]
+
+    # Local midnights from the first to the day after the last sample
+    local = date_time.tz_localize(None) if date_time.tz is not None else date_time
+    days = pd.date_range(
+        local[0].normalize(),
+        local[-1].normalize() + pd.Timedelta(days=1),
+        freq="D",
+        unit=local.unit,
+    )
+    if date_time.tz is not None:
+        days = days.tz_localize(
+            date_time.tz,
+            ambiguous=np.ones(days.size, dtype=bool),
+            nonexistent="shift_forward",
+        )
+    # Elapsed hours, also across DST changes, since the first midnight
+    edges = (days - days[0]).to_numpy() / np.timedelta64(1, "h")
+    hours = (date_time - days[0]).to_numpy() / np.timedelta64(1, "h")
+    n_days = days.size - 1
+    day_hours = np.diff(edges)
+
+    valid = np.isfinite(gpoa)
+    if zenith_sun is not None:
+        night = np.asarray(zenith_sun, dtype=float)[order] >= 90
+        gpoa = np.where(~valid & night, 0.0, gpoa)
+        valid |= night
+
+    step = np.diff(hours)
+    nominal = np.median(step) if step.size else 1.0
+    is_gap = np.append(step > max_gap_factor * nominal, True)
+    next_hours = np.append(hours[1:], hours[-1] + nominal)
+    covered_end = np.where(is_gap, hours + nominal, next_hours)
+
+    # Measured data: every valid sample is held until the next sample
+    energy, measured = _accumulate(
+        hours[valid], covered_end[valid], gpoa[valid], gpoa[valid], edges
+    )
+    filled = np.zeros(n_days)
+
+    if fill == "interpolate" and valid.any():
+        valid_hours, valid_gpoa = hours[valid], gpoa[valid]
+
+        # Missing samples between valid neighbours that are close enough in time
+        prev_valid = np.maximum.accumulate(np.where(valid, np.arange(valid.size), -1))
+        next_valid = np.minimum.accumulate(
+            np.where(valid, np.arange(valid.size), valid.size)[::-1]
+        )[::-1]
+        fillable = (
+            ~valid
+            & (prev_valid >= 0)
+            & (next_valid < valid.size)
+            & (
+                hours[np.minimum(next_valid, valid.size - 1)]
+                - covered_end[np.maximum(prev_valid, 0)]
+                <= max_fill_hours
+            )
+        )
+        values = np.interp(hours[fillable], valid_hours, valid_gpoa)
+        fill_energy, fill_hours = _accumulate(
+            hours[fillable], covered_end[fillable], values, values, edges
+        )
+        energy += fill_energy
+        filled += fill_hours
+
+        # Gaps between timestamps, bridged linearly between the samples around them
+        gap_start = covered_end[:-1]
+        gap_end = hours[1:]
+        fillable_gap = (
+            is_gap[:-1]
+            & valid[:-1]
+            & valid[1:]
+            & (gap_end - gap_start <= max_fill_hours)
+        )
+        gap_start, gap_end = gap_start[fillable_gap], gap_end[fillable_gap]
+        value_start = gpoa[:-1][fillable_gap]
+        value_end = gpoa[1:][fillable_gap]
+        fill_energy, fill_hours = _accumulate(
+            gap_start, gap_end, value_start, value_end, edges
+        )
+        energy += fill_energy
+        filled += fill_hours
+
+    coverage = measured / day_hours
+    filled /= day_hours
+    flag = coverage + filled < min_coverage
+
+    return pd.DataFrame(
+        {
+            "DateTime": days[:-1],
+            "Insolation": np.where(flag, np.nan, energy),
+            "Coverage": coverage,
+            "Filled": filled,
+            "Flag": flag,
+        }
+    )
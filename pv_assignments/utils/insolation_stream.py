@@ -0,0 +1,206 @@
+"""Streaming daily, monthly and annual insolation aggregation."""
+
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.panel_irradiation import Panel, PanelArray, _dni_extra
+
+
+def _group_sum(
+    keys: np.ndarray, values: np.ndarray, counts: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sum the columns of values (n_panels, n) and the counts per unique key."""
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.stack(
+        [
+            np.bincount(inverse, weights=row, minlength=unique_keys.size)
+            for row in values
+        ]
+    )
+    if counts is None:
+        counts = np.ones(keys.size)
+    return unique_keys, sums, np.bincount(inverse, weights=counts)
+
+
+class InsolationAggregator:
+    """Running insolation accumulators for a panel fed with chunks of irradiance data.
+
+    The results match Panel.calculate_daily_insolation and
+    Panel.calculate_monthly_insolation, but only one chunk of rows is held in memory
+    at a time. The chunks must be fed in chronological order, so that every day
+    before the last one seen is complete.
+    """
+
+    def __init__(self, panel: Panel | PanelArray, keep_daily: bool = True) -> None:
+        """Initialize empty accumulators.
+
+        Args:
+            panel (Panel | PanelArray): Panel (or panels) to calculate the insolation for.
+            keep_daily (bool, optional): Whether to keep the daily insolation of every
+                day. If False, only the monthly and annual totals are kept.
+                Defaults to True.
+        """
+        self.panel = panel
+        self.keep_daily = keep_daily
+        if isinstance(panel, PanelArray):
+            self.columns = [f"Insolation_{name}" for name in panel.names]
+        else:
+            self.columns = ["Insolation"]
+        self.tz = None
+        self._unit = "ns"
+
+        n_panels = len(self.columns)
+        # Day that may still receive rows from the next chunk
+        self._open_day = np.array([], dtype="datetime64[D]")
+        self._open_sum = np.zeros((n_panels, 0))
+        self._open_count = np.zeros(0)
+        self._daily_days: list[np.ndarray] = []
+        self._daily_values: list[np.ndarray] = []
+        self._monthly: dict[np.datetime64, list] = {}
+        self._annual: dict[np.datetime64, np.ndarray] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Add a chunk of irradiance data.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing the irradiance data.
+                Required columns: "DateTime", "DHI", "DNI", "Azimuth", "Zenith".
+                where Zenith and Azimuth are the sun's position at the given DateTime.
+        """
+        if df.empty:
+            return
+        gpoa = self.panel.calculate_gpoa(
+            dhi=df["DHI"].to_numpy(dtype=float),
+            dni=df["DNI"].to_numpy(dtype=float),
+            azimuth_sun=df["Azimuth"].to_numpy(dtype=float),
+            zenith_sun=df["Zenith"].to_numpy(dtype=float),
+            dni_extra=_dni_extra(self.panel.sky_model, df["DateTime"]),
+        )
+        gpoa = np.nan_to_num(np.atleast_2d(gpoa), nan=0.0)  # Replace NaN values with 0
+
+        # Days in local time, like resample("D") on a tz-aware column
+        date_time = df["DateTime"]
+        if date_time.dt.tz is not None:
+            self.tz = date_time.dt.tz
+            date_time = date_time.dt.tz_localize(None)
+        date_time = date_time.to_numpy()
+        self._unit = np.datetime_data(date_time.dtype)[0]
+        days = date_time.astype("datetime64[D]")
+        if self._open_day.size and days.min() < self._open_day[0]:
+            raise ValueError("Chunks must be fed in chronological order")
+
+        days, sums, counts = _group_sum(
+            np.concatenate([self._open_day, days]),
+            np.concatenate([self._open_sum, gpoa], axis=1),
+            np.concatenate([self._open_count, np.ones(days.size)]),
+        )
+        self._finalize(days[:-1], sums[:, :-1], counts[:-1])
+        self._open_day, self._open_sum, self._open_count = (
+            days[-1:],
+            sums[:, -1:],
+            counts[-1:],
+        )
+
+    def consume(self, chunks: Iterable[pd.DataFrame]) -> "InsolationAggregator":
+        """Add every chunk of an iterable of irradiance data.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Chunks in chronological order, e.g. from
+                part_2_loader.iter_data after adding "Azimuth" and "Zenith".
+
+        Returns:
+            InsolationAggregator: The aggregator itself.
+        """
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def _finalize(self, days: np.ndarray, sums: np.ndarray, counts: np.ndarray) -> None:
+        """Move complete days into the daily, monthly and annual accumulators."""
+        if days.size == 0:
+            return
+        daily = sums / counts * 24  # Assuming 24 hours per day
+        if self.keep_daily:
+            self._daily_days.append(days)
+            self._daily_values.append(daily)
+
+        months, month_sums, month_counts = _group_sum(
+            days.astype("datetime64[M]"), daily
+        )
+        for month, month_sum, month_count in zip(
+            months, month_sums.T, month_counts, strict=True
+        ):
+            total = self._monthly.setdefault(month, [0.0, 0.0])
+            total[0] = total[0] + month_sum
+            total[1] += month_count
+
+        years, year_sums, _ = _group_sum(days.astype("datetime64[Y]"), daily)
+        for year, year_sum in zip(years, year_sums.T, strict=True):
+            self._annual[year] = self._annual.get(year, 0.0) + year_sum
+
+    def _frame(self, labels: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+        """Build a result DataFrame with tz-aware "DateTime" labels."""
+        date_time = pd.DatetimeIndex(labels.astype(f"datetime64[{self._unit}]"))
+        if self.tz is not None:
+            date_time = date_time.tz_localize(self.tz)
+        df = pd.DataFrame(values.reshape(len(labels), -1), columns=self.columns)
+        df.insert(0, "DateTime", date_time)
+        return df
+
+    def _with_open_day(self) -> tuple[np.ndarray, np.ndarray]:
+        """Daily insolation of all kept days plus the day still open."""
+        days = self._daily_days + [self._open_day]
+        values = self._daily_values + [self._open_sum / self._open_count * 24]
+        return np.concatenate(days), np.concatenate(values, axis=1)
+
+    def daily(self) -> pd.DataFrame:
+        """Return the daily insolation of every day seen so far.
+
+        Returns:
+            pd.DataFrame: DataFrame with the daily insolation values.
+        """
+        if not self.keep_daily:
+            raise ValueError("Daily values are only kept when keep_daily is True")
+        days, values = self._with_open_day()
+        return self._frame(days, values.T)
+
+    def monthly(self) -> pd.DataFrame:
+        """Return the monthly insolation (mean daily insolation per month).
+
+        Returns:
+            pd.DataFrame: DataFrame with the monthly insolation values.
+        """
+        monthly = {month: list(total) for month, total in self._monthly.items()}
+        if self._open_day.size:
+            month = self._open_day[0].astype("datetime64[M]")
+            total = monthly.setdefault(month, [0.0, 0.0])
+            total[0] = total[0] + (self._open_sum[:, 0] / self._open_count[0] * 24)
+            total[1] += 1
+        months = np.array(sorted(monthly), dtype="datetime64[M]")
+        values = np.array(
+            [
+                np.broadcast_to(monthly[m][0], len(self.columns)) / monthly[m][1]
+                for m in months
+            ]
+        )
+        return self._frame(months, values)
+
+    def annual(self) -> pd.DataFrame:
+        """Return the annual insolation (sum of the daily insolation per year).
+
+        Returns:
+            pd.DataFrame: DataFrame with the annual insolation values.
+        """
+        annual = dict(self._annual)
+        if self._open_day.size:
+            year = self._open_day[0].astype("datetime64[Y]")
+            annual[year] = annual.get(year, 0.0) + (
+                self._open_sum[:, 0] / self._open_count[0] * 24
+            )
+        years = np.array(sorted(annual), dtype="datetime64[Y]")
+        values = np.array(
+            [np.broadcast_to(annual[y], len(self.columns)) for y in years]
+        )
+        return self._frame(years, values)
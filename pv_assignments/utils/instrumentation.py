@@ -0,0 +1,390 @@
+"""Opt-in timing and memory instrumentation of the loaders and Panel methods.
+
+Instrumented functions and stages record a span with their wall time, the number of
+rows processed and the size of their result. With memory tracing on, the peak
+traced memory of every span is recorded as well. When instrumentation is disabled,
+which is the default, a call costs one extra function call and a flag check.
+
+Instrumentation is enabled with enable() or the profile() context manager, or for a
+whole run with environment variables:
+
+- PV_ASSIGNMENTS_PROFILE: JSON file the summary is written to at exit.
+- PV_ASSIGNMENTS_TRACE: Chrome trace file (chrome://tracing, Perfetto) written at
+  exit. Optional.
+- PV_ASSIGNMENTS_PROFILE_MEMORY: Set to 1 to trace memory, which slows the run down.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class Span:
+    """One timed call of an instrumented function or stage.
+
+    Attributes:
+        name (str): Name of the function or stage.
+        start (float): Start time relative to when instrumentation was enabled (s).
+        duration (float): Wall time, including nested spans (s).
+        self_time (float): Wall time excluding nested spans (s).
+        rows (int | None): Number of rows processed, if known.
+        result_bytes (int | None): Size of the returned data, if known.
+        peak_bytes (int | None): Peak traced memory above the start of the span, when
+            memory tracing is on.
+        thread (int): Identifier of the calling thread.
+        depth (int): Nesting depth of the span.
+    """
+
+    name: str
+    start: float
+    duration: float
+    self_time: float
+    rows: int | None
+    result_bytes: int | None
+    peak_bytes: int | None
+    thread: int
+    depth: int
+
+
+class _State:
+    """Global instrumentation state."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.memory = False
+        self.origin = 0.0
+        self.spans: list[Span] = []
+        self.local = threading.local()
+
+
+_state = _State()
+
+
+def enable(memory: bool = False) -> None:
+    """Start recording spans.
+
+    Args:
+        memory (bool, optional): Whether to trace the peak memory of every span with
+            tracemalloc. Defaults to False.
+    """
+    if not _state.enabled:
+        _state.origin = time.perf_counter()
+    _state.memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _state.enabled = True
+
+
+def disable() -> None:
+    """Stop recording spans. The recorded spans are kept."""
+    _state.enabled = False
+    if _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.memory = False
+
+
+def reset() -> None:
+    """Forget all recorded spans."""
+    _state.spans = []
+    _state.origin = time.perf_counter()
+
+
+def is_enabled() -> bool:
+    """Whether instrumentation is enabled.
+
+    Returns:
+        bool: True if spans are being recorded.
+    """
+    return _state.enabled
+
+
+def spans() -> list[Span]:
+    """Return the recorded spans in the order they finished.
+
+    Returns:
+        list[Span]: The recorded spans.
+    """
+    return list(_state.spans)
+
+
+def _size(value: object) -> tuple[int | None, int | None]:
+    """Number of rows and bytes of an array-like value."""
+    if isinstance(value, pd.DataFrame):
+        return len(value), int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return len(value), int(value.memory_usage(index=True))
+    if isinstance(value, np.ndarray):
+        return (value.shape[-1] if value.ndim else 1), value.nbytes
+    if isinstance(value, tuple) and value:
+        sizes = [_size(item) for item in value]
+        if all(size[1] is not None for size in sizes):
+            return sizes[0][0], sum(size[1] for size in sizes)
+    return None, None
+
+
+class _Frame:
+    """An open span on the stack of the current thread."""
+
+    __slots__ = ("child_time", "name", "peak", "rows", "start", "start_memory")
+
+    def __init__(self, name: str, rows: int | None) -> None:
+        self.name = name
+        self.rows = rows
+        self.child_time = 0.0
+        self.peak = 0
+        self.start_memory = 0
+        self.start = 0.0
+
+
+def _push(name: str, rows: int | None) -> _Frame:
+    """Open a span."""
+    stack = getattr(_state.local, "stack", None)
+    if stack is None:
+        stack = _state.local.stack = []
+    frame = _Frame(name, rows)
+    if _state.memory:
+        current, peak = tracemalloc.get_traced_memory()
+        # The peak is reset for the new span, so keep the parent's peak so far
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        frame.start_memory = current
+    stack.append(frame)
+    frame.start = time.perf_counter()
+    return frame
+
+
+def _pop(frame: _Frame, result: object = None) -> None:
+    """Close a span and record it."""
+    end = time.perf_counter()
+    stack = _state.local.stack
+    stack.pop()
+    duration = end - frame.start
+
+    peak_bytes = None
+    if _state.memory and tracemalloc.is_tracing():
+        peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+        peak_bytes = peak - frame.start_memory
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak)
+    if stack:
+        stack[-1].child_time += duration
+
+    rows, result_bytes = _size(result)
+    _state.spans.append(
+        Span(
+            name=frame.name,
+            start=frame.start - _state.origin,
+            duration=duration,
+            self_time=duration - frame.child_time,
+            rows=frame.rows if frame.rows is not None else rows,
+            result_bytes=result_bytes,
+            peak_bytes=peak_bytes,
+            thread=threading.get_ident(),
+            depth=len(stack),
+        )
+    )
+
+
+def _input_rows(args: tuple, kwargs: dict) -> int | None:
+    """Number of rows of the first array-like argument."""
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, pd.DataFrame | pd.Series):
+            return len(value)
+        if isinstance(value, np.ndarray):
+            return value.shape[-1] if value.ndim else 1
+    return None
+
+
+def instrument[**P, R](func: Callable[P, R]) -> Callable[P, R]:
+    """Record a span for every call of a function while instrumentation is enabled.
+
+    The span is named after the module and qualified name of the function, e.g.
+    "panel_irradiation.Panel.calculate_gpoa". The rows are taken from the first
+    DataFrame or array argument, or otherwise from the result.
+
+    Args:
+        func (Callable): Function to instrument.
+
+    Returns:
+        Callable: The wrapped function.
+    """
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        if not _state.enabled:
+            return func(*args, **kwargs)
+        frame = _push(name, _input_rows(args, kwargs))
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        finally:
+            _pop(frame, result)
+
+    return wrapper
+
+
+class _Stage:
+    """Context manager of a named stage inside an instrumented function."""
+
+    __slots__ = ("frame", "name", "rows")
+
+    def __init__(self, name: str, rows: int | None) -> None:
+        self.name = name
+        self.rows = rows
+        self.frame = None
+
+    def __enter__(self) -> "_Stage":
+        if _state.enabled:
+            self.frame = _push(self.name, self.rows)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self.frame is not None:
+            _pop(self.frame)
+
+
+def stage(name: str, rows: int | None = None) -> _Stage:
+    """Record a span for a block, e.g. the parsing step of a loader.
+
+    Args:
+        name (str): Name of the stage.
+        rows (int | None, optional): Number of rows processed in the stage.
+            Defaults to None.
+
+    Returns:
+        _Stage: Context manager timing the block.
+    """
+    return _Stage(name, rows)
+
+
+@contextmanager
+def profile(memory: bool = False) -> Iterator[list[Span]]:
+    """Enable instrumentation for a block.
+
+    Args:
+        memory (bool, optional): Whether to trace memory. Defaults to False.
+
+    Yields:
+        list[Span]: List that the spans recorded in the block are added to when it
+            exits.
+    """
+    was_enabled, was_memory = _state.enabled, _state.memory
+    first = len(_state.spans)
+    recorded: list[Span] = []
+    enable(memory=memory)
+    try:
+        yield recorded
+    finally:
+        recorded.extend(_state.spans[first:])
+        if was_enabled:
+            enable(memory=was_memory)
+        else:
+            disable()
+
+
+def summary(recorded: list[Span] | None = None) -> dict[str, dict[str, float | int]]:
+    """Aggregate spans per name.
+
+    Args:
+        recorded (list[Span] | None, optional): Spans to aggregate. If None, all
+            recorded spans are used. Defaults to None.
+
+    Returns:
+        dict[str, dict[str, float | int]]: Per name the number of calls, total and
+            self time (s), the largest call (s), the rows processed and result bytes,
+            and the largest peak memory (bytes) when it was traced. Sorted by self
+            time, largest first.
+    """
+    recorded = _state.spans if recorded is None else recorded
+    stats: dict[str, dict[str, float | int]] = {}
+    for span in recorded:
+        entry = stats.setdefault(
+            span.name,
+            {
+                "calls": 0,
+                "total_s": 0.0,
+                "self_s": 0.0,
+                "max_s": 0.0,
+                "rows": 0,
+                "result_bytes": 0,
+            },
+        )
+        entry["calls"] += 1
+        entry["total_s"] += span.duration
+        entry["self_s"] += span.self_time
+        entry["max_s"] = max(entry["max_s"], span.duration)
+        entry["rows"] += span.rows or 0
+        entry["result_bytes"] += span.result_bytes or 0
+        if span.peak_bytes is not None:
+            entry["peak_bytes"] = max(entry.get("peak_bytes", 0), span.peak_bytes)
+    return dict(sorted(stats.items(), key=lambda item: -item[1]["self_s"]))
+
+
+def export(
+    path: str | os.PathLike,
+    trace_path: str | os.PathLike | None = None,
+    recorded: list[Span] | None = None,
+) -> None:
+    """Write the summary, and optionally a Chrome trace, of the recorded spans.
+
+    Args:
+        path (str | os.PathLike): JSON file for the summary.
+        trace_path (str | os.PathLike | None, optional): JSON file in the Chrome
+            trace event format. Defaults to None.
+        recorded (list[Span] | None, optional): Spans to export. If None, all
+            recorded spans are exported. Defaults to None.
+    """
+    recorded = _state.spans if recorded is None else recorded
+    Path(path).write_text(json.dumps(summary(recorded), indent=2))
+    if trace_path is None:
+        return
+
+    pid = os.getpid()
+    events = [
+        {
+            "name": span.name,
+            "cat": span.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": span.start * 1e6,
+            "dur": span.duration * 1e6,
+            "pid": pid,
+            "tid": span.thread,
+            "args": {
+                key: value
+                for key, value in asdict(span).items()
+                if key in ("rows", "result_bytes", "peak_bytes") and value is not None
+            },
+        }
+        for span in recorded
+    ]
+    Path(trace_path).write_text(
+        json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+    )
+
+
+def _export_at_exit() -> None:
+    """Export the spans of the run to the files named by the environment."""
+    export(
+        os.environ["PV_ASSIGNMENTS_PROFILE"],
+        os.environ.get("PV_ASSIGNMENTS_TRACE") or None,
+    )
+
+
+if os.environ.get("PV_ASSIGNMENTS_PROFILE"):
+    enable(memory=os.environ.get("PV_ASSIGNMENTS_PROFILE_MEMORY") == "1")
+    atexit.register(_export_at_exit)
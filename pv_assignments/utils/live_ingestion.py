@@ -0,0 +1,410 @@
+"""Live ingestion of irradiance records with incremental insolation updates.
+
+Records arrive as CSV lines in the schema of the part 2 file, from a file that is
+being appended to or from TCP connections. The lines are grouped into micro-batches
+and each batch is added to an InsolationAggregator, so an update only costs the
+transposition of the new rows, however much history has been ingested.
+
+Usage:
+    python -m pv_assignments.utils.live_ingestion --file live.csv --tilt 45
+    python -m pv_assignments.utils.live_ingestion --port 9000 --tilt 45
+
+replay() writes an existing file line by line at a given rate, as a local stand-in
+for a live source.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import os
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from pv_assignments.utils.batch_runner import prepare_sun_angles
+from pv_assignments.utils.insolation_stream import InsolationAggregator
+from pv_assignments.utils.instrumentation import stage
+from pv_assignments.utils.panel_irradiation import Panel, PanelArray
+
+# Columns of the part 2 file, in order
+PART_2_COLUMNS = ["DateTime", "GHI", "DHI", "DNI", "SolarElevation", "SolarAzimuth"]
+
+# A time of day followed by a UTC offset, which makes a timestamp tz-aware
+_UTC_OFFSET = r"\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(Z|[+-]\d{2}(?::?\d{2})?)$"
+
+
+@dataclass
+class UpdateInfo:
+    """Summary of one micro-batch.
+
+    Attributes:
+        rows (int): Rows added to the accumulators.
+        dropped (int): Records dropped because they could not be parsed, their
+            timestamp did not match the time zone of the service or their day was
+            already complete.
+        latency_s (float): Time from parsing the batch to updated accumulators (s).
+        latest (pd.Timestamp): Latest timestamp ingested so far.
+    """
+
+    rows: int
+    dropped: int
+    latency_s: float
+    latest: pd.Timestamp
+
+
+def parse_records(
+    lines: list[str],
+    columns: list[str] = PART_2_COLUMNS,
+    tz: str | datetime.tzinfo | None = "infer",
+) -> pd.DataFrame:
+    """Parse CSV lines without a header.
+
+    Malformed records do not raise: lines with too many fields are skipped, a
+    timestamp that cannot be parsed is NaT and any other field that is empty or
+    not a number is NaN. Tz-aware timestamps may have different UTC offsets, e.g.
+    on both sides of a DST change, and are converted to one time zone. A naive
+    timestamp among tz-aware ones, or the other way round, is NaT.
+
+    Args:
+        lines (list[str]): Records, one per line.
+        columns (list[str], optional): Names of the fields. Defaults to the columns
+            of the part 2 file.
+        tz (str | datetime.tzinfo | None, optional): Time zone of the result. With
+            None only naive timestamps are kept. "infer" takes the most common UTC
+            offset of the valid timestamps, or None if most are naive, with ties
+            going to the first. Defaults to
+            "infer".
+
+    Returns:
+        pd.DataFrame: The parsed records with a "DateTime" column.
+    """
+    df = pd.read_csv(
+        io.StringIO("\n".join(lines)),
+        header=None,
+        names=columns,
+        dtype=str,
+        on_bad_lines="skip",
+    )
+    text = df["DateTime"].str.strip()
+    offset = text.str.extract(_UTC_OFFSET, expand=False)
+    aware = offset.notna()
+    # Parsed separately, as pandas cannot hold naive and tz-aware values in one column
+    utc = pd.to_datetime(text.where(aware), format="ISO8601", errors="coerce", utc=True)
+    naive = pd.to_datetime(text.where(~aware), format="ISO8601", errors="coerce")
+    if isinstance(tz, str) and tz == "infer":
+        # The most common offset, so that a few stray records cannot set it. Ties
+        # go to the offset seen first.
+        offset = offset.fillna("").where(utc.notna() | naive.notna())
+        counts = offset.value_counts()
+        tz = None
+        if not counts.empty and counts.index[0]:
+            tz = pd.Timestamp(text[offset.eq(counts.index[0]).idxmax()]).tz
+    df["DateTime"] = naive if tz is None else utc.dt.tz_convert(tz)
+    for column in df.columns.drop("DateTime"):
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    return df
+
+
+class LiveIngestion:
+    """Micro-batching ingestion service feeding an InsolationAggregator."""
+
+    def __init__(
+        self,
+        panel: Panel | PanelArray,
+        columns: list[str] = PART_2_COLUMNS,
+        max_batch: int = 1000,
+        max_delay: float = 0.1,
+        latitude: float | None = None,
+        longitude: float | None = None,
+        on_update: Callable[["LiveIngestion", UpdateInfo], None] | None = None,
+    ) -> None:
+        """Initialize the service with empty accumulators.
+
+        Args:
+            panel (Panel | PanelArray): Panel (or panels) to calculate the insolation for.
+            columns (list[str], optional): Names of the fields of a record. Defaults to
+                the columns of the part 2 file.
+            max_batch (int, optional): Most records per micro-batch. Defaults to 1000.
+            max_delay (float, optional): Longest time a record waits for its batch to
+                fill up (s). Defaults to 0.1.
+            latitude (float | None, optional): Latitude of the site (degrees), for
+                records without solar angle columns. Defaults to None.
+            longitude (float | None, optional): Longitude of the site (degrees), for
+                records without solar angle columns. Defaults to None.
+            on_update (Callable | None, optional): Called with the service and the
+                summary of each batch after it is added. Defaults to None.
+        """
+        self.aggregator = InsolationAggregator(panel)
+        self.columns = columns
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.latitude = latitude
+        self.longitude = longitude
+        self.on_update = on_update
+        self.updates = 0
+        self.rows = 0
+        self.dropped = 0
+        self.latency_s: list[float] = []
+        self.errors: list[str] = []
+        self._tz: str | datetime.tzinfo | None = "infer"
+        self._latest: pd.Timestamp | None = None
+        self._queue: asyncio.Queue[str | None] = asyncio.Queue()
+
+    def ingest(self, lines: list[str]) -> UpdateInfo:
+        """Add a batch of records to the accumulators.
+
+        Records of a day before the latest day ingested cannot be added any more
+        and are dropped, as are records that cannot be parsed. The time zone of the
+        service is set by the first batch ingested: later tz-aware records are
+        converted to it, and naive records in a tz-aware stream (or the other way
+        round) are dropped. Records within a batch may be in any order.
+
+        Args:
+            lines (list[str]): Records, one CSV line each.
+
+        Returns:
+            UpdateInfo: Summary of the batch.
+        """
+        start = time.perf_counter()
+        with stage("live update", rows=len(lines)):
+            df = parse_records(lines, self.columns, tz=self._tz)
+            df = df.dropna(subset="DateTime").sort_values("DateTime", kind="stable")
+            if self._latest is not None:
+                # The aggregator only accepts rows from its open day onwards
+                df = df[df["DateTime"] >= self._latest.normalize()]
+            if not df.empty:
+                df = prepare_sun_angles(df, self.latitude, self.longitude)
+                self.aggregator.update(df)
+                self._tz = df["DateTime"].dt.tz
+                self._latest = df["DateTime"].iloc[-1]
+        info = UpdateInfo(
+            rows=len(df),
+            dropped=len(lines) - len(df),
+            latency_s=time.perf_counter() - start,
+            latest=self._latest,
+        )
+        self.updates += 1
+        self.rows += info.rows
+        self.dropped += info.dropped
+        self.latency_s.append(info.latency_s)
+        if self.on_update is not None:
+            self.on_update(self, info)
+        return info
+
+    def monthly(self) -> pd.DataFrame:
+        """Return the monthly insolation of everything ingested so far.
+
+        Returns:
+            pd.DataFrame: Mean daily insolation per month, as
+                Panel.calculate_monthly_insolation.
+        """
+        return self.aggregator.monthly()
+
+    def annual(self) -> pd.DataFrame:
+        """Return the annual insolation of everything ingested so far.
+
+        Returns:
+            pd.DataFrame: Sum of the daily insolation per year.
+        """
+        return self.aggregator.annual()
+
+    async def feed(self, lines: AsyncIterator[str]) -> None:
+        """Queue the records of a source until it is exhausted.
+
+        Args:
+            lines (AsyncIterator[str]): Lines of a source, e.g. tail_file or
+                read_lines. Blank lines and header lines are skipped.
+        """
+        async for line in lines:
+            line = line.strip()
+            # Records start with the year of their timestamp, headers do not
+            if line and line[0].isdigit():
+                await self._queue.put(line)
+
+    async def run(self) -> None:
+        """Group queued records into micro-batches and ingest them until stopped.
+
+        A batch that fails does not stop the service. Its error is kept in errors.
+        """
+        loop = asyncio.get_running_loop()
+        stopped = False
+        while not stopped:
+            line = await self._queue.get()
+            if line is None:
+                break
+            batch = [line]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    line = await asyncio.wait_for(
+                        self._queue.get(), max(deadline - loop.time(), 0)
+                    )
+                except TimeoutError:
+                    break
+                if line is None:
+                    stopped = True
+                    break
+                batch.append(line)
+            try:
+                self.ingest(batch)
+            except Exception as error:
+                self.errors.append(f"{type(error).__name__}: {error}")
+
+    def stop(self) -> None:
+        """Make run return after ingesting the records queued so far."""
+        self._queue.put_nowait(None)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9000) -> asyncio.Server:
+        """Accept records over TCP, one CSV line each, from any number of clients.
+
+        Args:
+            host (str, optional): Address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): Port to listen on. 0 picks a free port.
+                Defaults to 9000.
+
+        Returns:
+            asyncio.Server: The started server.
+        """
+
+        async def handle(
+            reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        ) -> None:
+            try:
+                await self.feed(read_lines(reader))
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+
+async def read_lines(reader: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Yield the lines of a stream until it is closed.
+
+    Args:
+        reader (asyncio.StreamReader): Stream, e.g. of a TCP connection.
+
+    Yields:
+        str: Decoded lines.
+    """
+    async for line in reader:
+        yield line.decode()
+
+
+async def tail_file(
+    path: str | os.PathLike,
+    from_start: bool = True,
+    poll_interval: float = 0.05,
+    stop: asyncio.Event | None = None,
+) -> AsyncIterator[str]:
+    """Yield the lines of a file as they are appended to it, like tail -f.
+
+    Args:
+        path (str | os.PathLike): File to follow.
+        from_start (bool, optional): Whether to yield the lines already in the file.
+            Defaults to True.
+        poll_interval (float, optional): Time between checks for new lines (s).
+            Defaults to 0.05.
+        stop (asyncio.Event | None, optional): Stops following once set and the
+            file is read to its end. If None, the file is followed forever.
+            Defaults to None.
+
+    Yields:
+        str: Complete lines of the file.
+    """
+    with Path(path).open() as file:
+        if not from_start:
+            file.seek(0, os.SEEK_END)
+        partial = ""
+        while True:
+            line = file.readline()
+            if line.endswith("\n"):
+                yield partial + line
+                partial = ""
+            elif line:
+                # A line that is still being written
+                partial += line
+            elif stop is not None and stop.is_set():
+                return
+            else:
+                await asyncio.sleep(poll_interval)
+
+
+async def replay(
+    source: str | os.PathLike,
+    destination: str | os.PathLike,
+    rate: float = 100.0,
+) -> None:
+    """Append the records of a file to another file at a fixed rate.
+
+    Args:
+        source (str | os.PathLike): File with the records, e.g. the part 2 file.
+        destination (str | os.PathLike): File to append the records to.
+        rate (float, optional): Records per second. Defaults to 100.
+    """
+    with Path(source).open() as src, Path(destination).open("a") as dst:
+        for line in src:
+            dst.write(line)
+            dst.flush()
+            await asyncio.sleep(1 / rate)
+
+
+def _print_update(service: LiveIngestion, info: UpdateInfo) -> None:
+    """Print the latest monthly insolation after a batch."""
+    if info.rows == 0:
+        return
+    month = service.monthly().iloc[-1]
+    values = ", ".join(f"{month[c]:.1f}" for c in service.aggregator.columns)
+    print(
+        f"{info.latest}: +{info.rows} rows in {info.latency_s * 1000:.2f} ms, "
+        f"monthly insolation {values} Wh/m²/day"
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run the service on the source given on the command line."""
+    panel = Panel(azimuth=args.azimuth, tilt=args.tilt, rho_g=args.rho_g)
+    service = LiveIngestion(
+        panel,
+        max_batch=args.max_batch,
+        max_delay=args.max_delay,
+        latitude=args.latitude,
+        longitude=args.longitude,
+        on_update=_print_update,
+    )
+    if args.file is not None:
+        source = asyncio.create_task(service.feed(tail_file(args.file)))
+    else:
+        server = await service.serve(args.host, args.port)
+        source = asyncio.create_task(server.serve_forever())
+    try:
+        await service.run()
+    finally:
+        source.cancel()
+
+
+def main() -> None:
+    """Run the ingestion service from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="CSV file to follow")
+    source.add_argument("--port", type=int, help="TCP port to listen on")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--azimuth", type=float, default=0.0)
+    parser.add_argument("--tilt", type=float, default=0.0)
+    parser.add_argument("--rho-g", type=float, default=0.2)
+    parser.add_argument("--latitude", type=float, default=None)
+    parser.add_argument("--longitude", type=float, default=None)
+    parser.add_argument("--max-batch", type=int, default=1000)
+    parser.add_argument("--max-delay", type=float, default=0.1)
+    args = parser.parse_args()
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Search for the panel orientation with the highest yearly insolation at a site."""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.panel_irradiation import PanelArray, mean_annual_insolation
+
+
+@dataclass
+class OrientationOptimum:
+    """Result of an orientation search.
+
+    Attributes:
+        azimuth (float): Optimal panel azimuth (degrees, south convention).
+        tilt (float): Optimal panel tilt (degrees).
+        insolation (float): Mean annual insolation at the optimum (Wh/m²).
+        surface (pd.DataFrame): Mean annual insolation (Wh/m²) of the coarse grid,
+            indexed by tilt with one column per azimuth.
+    """
+
+    azimuth: float
+    tilt: float
+    insolation: float
+    surface: pd.DataFrame
+
+
+def _yearly_insolation(
+    panels: PanelArray,
+    dhi: np.ndarray,
+    dni: np.ndarray,
+    azimuth_sun: np.ndarray,
+    zenith_sun: np.ndarray,
+    hours: np.ndarray,
+    day_starts: np.ndarray,
+    days: pd.DatetimeIndex,
+    max_elements: int,
+) -> np.ndarray:
+    """Calculate the mean annual insolation for every panel.
+
+    The GPOA of every timestep is weighted with its duration and summed per day,
+    and the days are summed into years with mean_annual_insolation. The panels are
+    evaluated in chunks, so the (n_panels, n_timesteps) matrix never has more than
+    `max_elements` elements.
+    """
+    chunk_size = max(1, max_elements // max(dhi.size, 1))
+    insolation = np.empty(len(panels))
+    for start in range(0, len(panels), chunk_size):
+        stop = min(start + chunk_size, len(panels))
+        chunk = PanelArray(
+            panels.azimuths[start:stop],
+            panels.tilts[start:stop],
+            panels.rho_gs[start:stop],
+        )
+        gpoa = chunk.calculate_gpoa(dhi, dni, azimuth_sun, zenith_sun)
+        gpoa *= hours
+        daily = np.add.reduceat(gpoa, day_starts, axis=1)
+        df_daily = pd.DataFrame(
+            daily.T, columns=[f"Insolation_{i}" for i in range(start, stop)]
+        )
+        df_daily.insert(0, "DateTime", days)
+        insolation[start:stop] = mean_annual_insolation(df_daily).to_numpy()
+    return insolation
+
+
+def optimize_orientation(
+    df: pd.DataFrame,
+    rho_g: float = 0.2,
+    azimuth_step: float = 10,
+    tilt_step: float = 5,
+    tilt_range: tuple[float, float] = (0, 90),
+    tolerance: float = 0.1,
+    max_elements: int = 2**22,
+) -> OrientationOptimum:
+    """Find the panel orientation with the highest yearly insolation.
+
+    A coarse grid over all azimuths and the tilt range is evaluated in one batched
+    pass. The grid is then refined locally around the best point until the step
+    is smaller than the tolerance.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the irradiance data.
+            Required columns: "DateTime", "DHI", "DNI", "Azimuth", "Zenith".
+            where Zenith and Azimuth are the sun's position at the given DateTime.
+        rho_g (float, optional): Ground reflectance. Defaults to 0.2.
+        azimuth_step (float, optional): Azimuth step of the coarse grid (degrees). Defaults to 10.
+        tilt_step (float, optional): Tilt step of the coarse grid (degrees). Defaults to 5.
+        tilt_range (tuple[float, float], optional): Smallest and largest tilt to search (degrees).
+            Defaults to (0, 90).
+        tolerance (float, optional): Step (degrees) at which the refinement stops. Defaults to 0.1.
+        max_elements (int, optional): Largest number of (panel, timestep) elements
+            evaluated at once. Defaults to 2**22.
+
+    Returns:
+        OrientationOptimum: The optimal orientation and the coarse insolation surface.
+    """
+    df = df.sort_values("DateTime", kind="stable")
+    dhi = df["DHI"].to_numpy(dtype=float)
+    dni = df["DNI"].to_numpy(dtype=float)
+    azimuth_sun = df["Azimuth"].to_numpy(dtype=float)
+    zenith_sun = df["Zenith"].to_numpy(dtype=float)
+
+    # Every row lasts 24 hours over the number of rows of its (local) day, as in the
+    # daily insolation of Panel
+    date_time = pd.DatetimeIndex(df["DateTime"])
+    local = date_time.tz_localize(None) if date_time.tz is not None else date_time
+    day_index = np.unique(local.normalize().asi8, return_inverse=True)[1]
+    hours = 24 / np.bincount(day_index)[day_index]
+
+    # Rows without any irradiance (night, missing data) add nothing, so drop them once
+    valid = (np.nan_to_num(dhi) > 0) | (np.nan_to_num(dni) > 0)
+    dhi = np.nan_to_num(dhi[valid])
+    dni = np.nan_to_num(dni[valid])
+    azimuth_sun = azimuth_sun[valid]
+    zenith_sun = zenith_sun[valid]
+    hours = hours[valid]
+    day_index = day_index[valid]
+    day_starts = np.flatnonzero(np.diff(day_index, prepend=-1))
+    days = date_time[valid][day_starts].normalize()
+
+    def evaluate(azimuths: np.ndarray, tilts: np.ndarray) -> np.ndarray:
+        azimuth_grid, tilt_grid = np.meshgrid(azimuths, tilts)
+        panels = PanelArray(azimuth_grid.ravel(), tilt_grid.ravel(), rho_g)
+        insolation = _yearly_insolation(
+            panels,
+            dhi,
+            dni,
+            azimuth_sun,
+            zenith_sun,
+            hours,
+            day_starts,
+            days,
+            max_elements,
+        )
+        return insolation.reshape(tilt_grid.shape)
+
+    tilt_min, tilt_max = tilt_range
+    azimuths = np.arange(-180, 180, azimuth_step, dtype=float)
+    tilts = np.linspace(
+        tilt_min, tilt_max, int(round((tilt_max - tilt_min) / tilt_step)) + 1
+    )
+    coarse = evaluate(azimuths, tilts)
+    surface = pd.DataFrame(
+        coarse,
+        index=pd.Index(tilts, name="Tilt"),
+        columns=pd.Index(azimuths, name="Azimuth"),
+    )
+
+    i_tilt, i_azimuth = np.unravel_index(np.argmax(coarse), coarse.shape)
+    best_azimuth, best_tilt = azimuths[i_azimuth], tilts[i_tilt]
+    best_insolation = coarse[i_tilt, i_azimuth]
+
+    # Local refinement: a 5x5 grid spanning one step on each side, shrinking each round
+    while max(azimuth_step, tilt_step) > tolerance:
+        azimuths = best_azimuth + np.linspace(-azimuth_step, azimuth_step, 5)
+        tilts = np.clip(
+            best_tilt + np.linspace(-tilt_step, tilt_step, 5), tilt_min, tilt_max
+        )
+        fine = evaluate(azimuths, tilts)
+        i_tilt, i_azimuth = np.unravel_index(np.argmax(fine), fine.shape)
+        if fine[i_tilt, i_azimuth] >= best_insolation:
+            best_azimuth, best_tilt = azimuths[i_azimuth], tilts[i_tilt]
+            best_insolation = fine[i_tilt, i_azimuth]
+        azimuth_step /= 2
+        tilt_step /= 2
+
+    # Wrap the azimuth back into [-180, 180)
+    best_azimuth = (best_azimuth + 180) % 360 - 180
+    return OrientationOptimum(
+        azimuth=float(best_azimuth),
+        tilt=float(best_tilt),
+        insolation=float(best_insolation),
+        surface=surface,
+    )
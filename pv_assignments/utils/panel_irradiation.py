@@ -1,24 +1,225 @@
 """Class for irradiance calculations on a solar panel based on its orientation and the sun's position."""
 
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Literal
+
 import numpy as np
 import pandas as pd
 
+from pv_assignments.utils.clear_sky import SOLAR_CONSTANT, extraterrestrial_irradiance
+from pv_assignments.utils.insolation_integration import integrate_daily_insolation
+from pv_assignments.utils.instrumentation import instrument, stage
+from pv_assignments.utils.result_cache import default_cache, fingerprint
+from pv_assignments.utils.shading import ShadingTable, interpolate_tables
+from pv_assignments.utils.sky_models import get_sky_model
+
+if TYPE_CHECKING:
+    from pv_assignments.utils.uncertainty import InsolationEnsemble
+
+
+def _like(result: np.ndarray, *inputs: object) -> float | np.ndarray | pd.Series:
+    """Return the result in the container type of the inputs.
+
+    The result is a Series with the index of the first Series among the inputs, a
+    scalar for scalar inputs and an array otherwise.
+    """
+    for value in inputs:
+        if isinstance(value, pd.Series):
+            return pd.Series(result, index=value.index)
+    if result.ndim == 0:
+        return result[()]
+    return result
+
+
+def _dni_extra(sky_model: str, date_time: pd.Series) -> np.ndarray | None:
+    """Extraterrestrial irradiance for the anisotropic sky models, None otherwise."""
+    if sky_model == "isotropic":
+        return None
+    return extraterrestrial_irradiance(date_time)
+
+
+def _check_shading(
+    shading: ShadingTable | None,
+    tilt: float | np.ndarray,
+    azimuth: float | np.ndarray,
+) -> None:
+    """Check that a shading table was built for the given panel orientation."""
+    if shading is not None and (
+        not np.allclose(shading.tilt, tilt) or not np.allclose(shading.azimuth, azimuth)
+    ):
+        raise ValueError(
+            "The shading table must be built for the panel's tilt and azimuth"
+        )
+
+
+# Input columns the insolation results depend on
+_INSOLATION_COLUMNS = ["DateTime", "DHI", "DNI", "Azimuth", "Zenith"]
+
+
+def _shading_parameters(shading: ShadingTable | None) -> tuple:
+    """Values a shading table contributes to a result cache key."""
+    if shading is None:
+        return (None,)
+    return shading.azimuths, shading.elevations, shading.table, shading.sky_view
+
+
+def _cached_result(
+    cache: bool,
+    key_parts: tuple,
+    df: pd.DataFrame,
+    compute: Callable[[], pd.DataFrame],
+) -> pd.DataFrame:
+    """Look an insolation result up in the default result cache, computing it on a miss."""
+    if not cache:
+        return compute()
+    key = fingerprint(*key_parts, *(df[column] for column in _INSOLATION_COLUMNS))
+    result = default_cache().get(key)
+    if result is None:
+        result = compute()
+        default_cache().put(key, result)
+    return result
+
+
+def annual_insolation(df_daily: pd.DataFrame) -> pd.DataFrame:
+    """Sum the daily insolation of every calendar year.
+
+    This is the one definition of the annual insolation: the time step is already
+    taken into account by the daily insolation, so it works for any sampling rate.
+
+    Args:
+        df_daily (pd.DataFrame): Daily insolation with a "DateTime" column and one or
+            more "Insolation" columns, e.g. from calculate_daily_insolation.
+
+    Returns:
+        pd.DataFrame: Insolation per year (Wh/m²) with the start of each year in the
+            "DateTime" column.
+    """
+    columns = [c for c in df_daily.columns if c.startswith("Insolation")]
+    df_annual = (
+        df_daily[["DateTime", *columns]]
+        .resample("YS", on="DateTime")
+        .sum(min_count=1)
+        .reset_index()
+    )
+    # Years between two years of data have no days and are left out
+    return df_annual.dropna(subset=columns, how="all").reset_index(drop=True)
+
+
+def mean_annual_insolation(df_daily: pd.DataFrame) -> pd.Series:
+    """Mean of the annual insolation over the years in the daily insolation.
+
+    Args:
+        df_daily (pd.DataFrame): Daily insolation, see annual_insolation.
+
+    Returns:
+        pd.Series: Mean annual insolation (Wh/m²) per "Insolation" column.
+    """
+    return annual_insolation(df_daily).drop(columns="DateTime").mean()
+
 
 class Panel:
     """Class representing a solar panel."""
 
-    def __init__(self, azimuth: float, tilt: float, rho_g: float = 0.2) -> None:
+    def __init__(
+        self,
+        azimuth: float | np.ndarray,
+        tilt: float | np.ndarray,
+        rho_g: float = 0.2,
+        sky_model: str = "isotropic",
+        shading: ShadingTable | None = None,
+    ) -> None:
         """Initialize the panel with its azimuth, tilt and ground reflectance.
 
         Args:
-            azimuth (float): Azimuth angle of the panel (degrees).
-            tilt (float): Tilt angle of the panel (degrees).
+            azimuth (float | np.ndarray): Azimuth angle of the panel (degrees). An array
+                gives one orientation per timestep, e.g. for a tracker.
+            tilt (float | np.ndarray): Tilt angle of the panel (degrees). An array gives
+                one tilt per timestep.
             rho_g (float, optional): Ground reflectance (default is 0.2).
+            sky_model (str, optional): Diffuse sky model, one of "isotropic",
+                "haydavies", "reindl" or "perez". Defaults to "isotropic".
+            shading (ShadingTable | None, optional): Row and horizon shading, built for
+                this panel's tilt and azimuth. If None, the sky is unobstructed.
+                Defaults to None.
         """
         self.azimuth = azimuth
         self.tilt = tilt
         self.rho_g = rho_g
+        get_sky_model(sky_model)
+        self.sky_model = sky_model
+        _check_shading(shading, tilt, azimuth)
+        self.shading = shading
 
+    @property
+    def tilt(self) -> float | np.ndarray:
+        """Tilt angle of the panel (degrees)."""
+        return self._tilt
+
+    @tilt.setter
+    def tilt(self, tilt: float | np.ndarray) -> None:
+        # The panel's own trigonometry is constant, so it is computed once here
+        self._tilt = tilt
+        if np.ndim(tilt):
+            self._cos_tilt = np.cos(np.radians(tilt))
+            self._sin_tilt = np.sin(np.radians(tilt))
+        else:
+            self._cos_tilt = float(np.cos(np.radians(tilt)))
+            self._sin_tilt = float(np.sin(np.radians(tilt)))
+
+    @instrument
+    def calculate_cos_angle_of_incidence(
+        self,
+        azimuth_sun: float | np.ndarray,
+        zenith_sun: float | np.ndarray,
+        out: np.ndarray | None = None,
+        cos_zenith: np.ndarray | None = None,
+        work: np.ndarray | None = None,
+    ) -> float | np.ndarray:
+        """Calculate the cosine of the angle of incidence of the sun on the panel.
+
+        Args:
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun (degrees).
+            zenith_sun (float | np.ndarray): Zenith angle of the sun (degrees).
+            out (np.ndarray | None, optional): Buffer to write the result into. Defaults to None.
+            cos_zenith (np.ndarray | None, optional): Buffer to write cos(zenith) into,
+                so it can be reused by the caller. Defaults to None.
+            work (np.ndarray | None, optional): Scratch buffer. Defaults to None.
+
+        Returns:
+            float | np.ndarray: Cosine of the angle of incidence.
+        """
+        azimuth_sun = np.asarray(azimuth_sun, dtype=float)
+        zenith_sun = np.asarray(zenith_sun, dtype=float)
+        shape = np.broadcast_shapes(
+            azimuth_sun.shape,
+            zenith_sun.shape,
+            np.shape(self.azimuth),
+            np.shape(self._cos_tilt),
+        )
+        if out is None:
+            out = np.empty(shape)
+        if cos_zenith is None:
+            cos_zenith = np.empty(shape)
+        if work is None:
+            work = np.empty(shape)
+
+        # First the product of the sines of the zenith and the tilt and the cosine of
+        # the azimuth difference, with cos(zenith) kept for the second term
+        np.radians(zenith_sun, out=cos_zenith)
+        np.sin(cos_zenith, out=out)
+        out *= self._sin_tilt
+        np.cos(cos_zenith, out=cos_zenith)
+        np.subtract(azimuth_sun, self.azimuth, out=work)
+        np.radians(work, out=work)
+        np.cos(work, out=work)
+        out *= work
+
+        # Then the product of the cosines of the zenith and the tilt is added
+        np.multiply(cos_zenith, self._cos_tilt, out=work)
+        out += work
+        return out
+
+    @instrument
     def calculate_angle_of_incidence(
         self, azimuth_sun: float | np.ndarray, zenith_sun: float | np.ndarray
     ) -> float | np.ndarray:
@@ -31,51 +232,115 @@ class Panel:
         Returns:
             float | np.ndarray: Angle of incidence (degrees).
         """
-        angle_of_incidence = np.degrees(
-            np.arccos(
-                np.cos(np.radians(zenith_sun)) * np.cos(np.radians(self.tilt))
-                + np.sin(np.radians(zenith_sun))
-                * np.sin(np.radians(self.tilt))
-                * np.cos(np.radians(azimuth_sun - self.azimuth))
-            )
-        )
-        return angle_of_incidence
+        cos_aoi = self.calculate_cos_angle_of_incidence(azimuth_sun, zenith_sun)
+        angle_of_incidence = np.degrees(np.arccos(cos_aoi, out=cos_aoi), out=cos_aoi)
+        return _like(angle_of_incidence, azimuth_sun, zenith_sun)
 
+    @instrument
     def calculate_gpoa_components(
         self,
         dhi: float | np.ndarray,
         dni: float | np.ndarray,
         azimuth_sun: float | np.ndarray,
         zenith_sun: float | np.ndarray,
+        out: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None,
+        dni_extra: float | np.ndarray | None = None,
+        cos_aoi_out: np.ndarray | None = None,
     ) -> tuple[float | np.ndarray, float | np.ndarray, float | np.ndarray]:
         """Calculate the components of the global plane of array irradiance.
 
+        cos(AOI) is used directly, so no arccos/degrees round trip is done. When `out`
+        is given, the components are written into those buffers and no new arrays of
+        the input length are allocated.
+
         Args:
             dhi (float | np.ndarray): Diffuse horizontal irradiance
             dni (float | np.ndarray): Direct normal irradiance
             azimuth_sun (float | np.ndarray): Azimuth angle of the sun
             zenith_sun (float | np.ndarray): Zenith angle of the sun
+            out (tuple[np.ndarray, np.ndarray, np.ndarray] | None, optional): Buffers for the
+                direct, diffuse and ground reflected irradiance. Defaults to None.
+            dni_extra (float | np.ndarray | None, optional): Extraterrestrial normal
+                irradiance, used by the anisotropic sky models. If None, the solar
+                constant is used. Defaults to None.
+            cos_aoi_out (np.ndarray | None, optional): Buffer that receives cos(AOI),
+                clipped at 0. It is the geometric value, without shading, so an
+                incidence angle modifier can be applied to the direct irradiance.
+                Defaults to None.
 
         Returns:
             tuple[float | np.ndarray, float | np.ndarray, float | np.ndarray]: Direct irradiance, diffuse irradiance, ground reflected irradiance.
         """
-        angle_of_incidence = self.calculate_angle_of_incidence(azimuth_sun, zenith_sun)
-        direct_irradiance = np.maximum(dni * np.cos(np.radians(angle_of_incidence)), 0)
-        diffuse_irradiance = dhi * (1 + np.cos(np.radians(self.tilt))) / 2
-        ground_reflected_irradiance = (
-            (dhi + dni * np.cos(np.radians(zenith_sun)))
-            * self.rho_g
-            * (1 - np.cos(np.radians(self.tilt)))
-            / 2
+        inputs = (dhi, dni, azimuth_sun, zenith_sun)
+        dhi = np.asarray(dhi, dtype=float)
+        dni = np.asarray(dni, dtype=float)
+        if out is None:
+            shape = np.broadcast_shapes(
+                dhi.shape,
+                dni.shape,
+                np.shape(azimuth_sun),
+                np.shape(zenith_sun),
+                np.shape(self.azimuth),
+                np.shape(self._cos_tilt),
+            )
+            direct, diffuse, ground_reflected = (np.empty(shape) for _ in range(3))
+        else:
+            direct, diffuse, ground_reflected = out
+
+        # The ground reflected buffer holds cos(zenith) until it is needed, and the
+        # diffuse buffer is used as scratch space before the diffuse term is written
+        self.calculate_cos_angle_of_incidence(
+            azimuth_sun,
+            zenith_sun,
+            out=direct,
+            cos_zenith=ground_reflected,
+            work=diffuse,
         )
-        return direct_irradiance, diffuse_irradiance, ground_reflected_irradiance
+        if self.sky_model == "isotropic":
+            np.multiply(dhi, 1 + self._cos_tilt, out=diffuse)
+            diffuse /= 2
+        else:
+            diffuse[...] = get_sky_model(self.sky_model)(
+                dhi,
+                dni,
+                direct,
+                ground_reflected,
+                np.asarray(zenith_sun, dtype=float),
+                self._cos_tilt,
+                self._sin_tilt,
+                SOLAR_CONSTANT if dni_extra is None else dni_extra,
+            )
+        if cos_aoi_out is not None:
+            np.maximum(direct, 0, out=cos_aoi_out)
+        direct *= dni
+        np.maximum(direct, 0, out=direct)
+        if self.shading is not None:
+            elevation_sun = 90 - np.asarray(zenith_sun, dtype=float)
+            direct *= self.shading.beam_fraction(azimuth_sun, elevation_sun)
+            diffuse *= self.shading.sky_view
+
+        ground_reflected *= dni
+        ground_reflected += dhi
+        ground_reflected *= self.rho_g
+        ground_reflected *= 1 - self._cos_tilt
+        ground_reflected /= 2
 
+        if out is not None:
+            return direct, diffuse, ground_reflected
+        return (
+            _like(direct, *inputs),
+            _like(diffuse, *inputs),
+            _like(ground_reflected, *inputs),
+        )
+
+    @instrument
     def calculate_gpoa(
         self,
         dhi: float | np.ndarray,
         dni: float | np.ndarray,
         azimuth_sun: float | np.ndarray,
         zenith_sun: float | np.ndarray,
+        dni_extra: float | np.ndarray | None = None,
     ) -> float | np.ndarray:
         """Calculate the global plane of array irradiance.
 
@@ -84,52 +349,130 @@ class Panel:
             dni (float | np.ndarray): Direct normal irradiance
             azimuth_sun (float | np.ndarray): Azimuth angle of the sun
             zenith_sun (float | np.ndarray): Zenith angle of the sun
+            dni_extra (float | np.ndarray | None, optional): Extraterrestrial normal
+                irradiance for the anisotropic sky models. Defaults to None.
+
         Returns:
             float | np.ndarray: Global plane of array irradiance.
         """
         direct_irradiance, diffuse_irradiance, ground_reflected_irradiance = (
-            self.calculate_gpoa_components(dhi, dni, azimuth_sun, zenith_sun)
+            self.calculate_gpoa_components(
+                dhi, dni, azimuth_sun, zenith_sun, dni_extra=dni_extra
+            )
         )
         gpoa = direct_irradiance + diffuse_irradiance + ground_reflected_irradiance
         return gpoa
 
-    def calculate_daily_insolation(self, df: pd.DataFrame) -> pd.DataFrame:
+    @instrument
+    def calculate_daily_insolation(
+        self,
+        df: pd.DataFrame,
+        method: Literal["mean", "exact"] = "mean",
+        cache: bool = True,
+    ) -> pd.DataFrame:
         """Calculate the daily insolation on the panel.
 
+        The DataFrame is not modified.
+
         Args:
             df (pd.DataFrame): DataFrame containing the irradiance data.
                 Required columns: "DateTime", "DHI", "DNI", "Azimuth", "Zenith".
                 where Zenith and Azimuth are the sun's position at the given DateTime.
+            method ("mean" | "exact", optional): "mean" takes the mean GPOA times 24,
+                with missing values as 0, which assumes complete, evenly spaced data.
+                "exact" integrates over the actual timestamps and fills or flags
+                missing data, see integrate_daily_insolation. Defaults to "mean".
+            cache (bool, optional): Whether to look the result up in the default
+                result cache, keyed by the panel parameters and the content of the
+                input columns. Defaults to True.
 
         Returns:
-            pd.DataFrame: DataFrame with the daily insolation values.
+            pd.DataFrame: DataFrame with the daily insolation values. The "exact" method
+                adds the "Coverage", "Filled" and "Flag" columns.
         """
-        df["GPOA"] = self.calculate_gpoa(
-            dhi=df["DHI"],
-            dni=df["DNI"],
-            azimuth_sun=df["Azimuth"],
-            zenith_sun=df["Zenith"],
+        return _cached_result(
+            cache,
+            ("Panel.daily", method, *self._cache_parameters()),
+            df,
+            lambda: self._daily_insolation(df, method),
+        )
+
+    def _cache_parameters(self) -> tuple:
+        """Panel parameters the insolation results depend on."""
+        return (
+            np.asarray(self.azimuth, dtype=float),
+            np.asarray(self.tilt, dtype=float),
+            float(self.rho_g),
+            self.sky_model,
+            *_shading_parameters(self.shading),
         )
-        df["GPOA"] = df["GPOA"].fillna(0)  # Replace NaN values with 0
-        df_daily = df.resample("D", on="DateTime").mean().reset_index()
-        df_daily["Insolation"] = df_daily["GPOA"] * 24  # Assuming 24 hours per day
+
+    def _daily_insolation(
+        self, df: pd.DataFrame, method: Literal["mean", "exact"]
+    ) -> pd.DataFrame:
+        """Calculate the daily insolation without the result cache."""
+        gpoa = self.calculate_gpoa(
+            dhi=df["DHI"].to_numpy(),
+            dni=df["DNI"].to_numpy(),
+            azimuth_sun=df["Azimuth"].to_numpy(),
+            zenith_sun=df["Zenith"].to_numpy(),
+            dni_extra=_dni_extra(self.sky_model, df["DateTime"]),
+        )
+        if method == "exact":
+            return integrate_daily_insolation(
+                df["DateTime"], gpoa, zenith_sun=df["Zenith"].to_numpy()
+            )
+
+        with stage("resampling", rows=len(gpoa)):
+            gpoa = pd.Series(
+                gpoa, index=pd.DatetimeIndex(df["DateTime"], name="DateTime")
+            )
+            gpoa = gpoa.fillna(0)  # Replace NaN values with 0
+            # Only the GPOA is resampled, and the caller's DataFrame is left untouched
+            df_daily = gpoa.resample("D").mean().to_frame("Insolation").reset_index()
+        df_daily["Insolation"] *= 24  # Assuming 24 hours per day
         return df_daily[["DateTime", "Insolation"]]
 
-    def calculate_monthly_insolation(self, df: pd.DataFrame) -> pd.DataFrame:
+    @instrument
+    def calculate_monthly_insolation(
+        self,
+        df: pd.DataFrame,
+        method: Literal["mean", "exact"] = "mean",
+        cache: bool = True,
+    ) -> pd.DataFrame:
         """Calculate the monthly insolation on the panel.
 
+        The DataFrame is not modified.
+
         Args:
             df (pd.DataFrame): DataFrame containing the irradiance data.
                 Required columns: "DateTime", "DHI", "DNI", "Azimuth", "Zenith".
                 where Zenith and Azimuth are the sun's position at the given DateTime.
+            method ("mean" | "exact", optional): Daily integration method, see
+                calculate_daily_insolation. Flagged days are left out of the monthly
+                mean. Defaults to "mean".
+            cache (bool, optional): Whether to use the default result cache, see
+                calculate_daily_insolation. Defaults to True.
 
         Returns:
             pd.DataFrame: DataFrame with the monthly insolation values.
         """
-        df_daily = self.calculate_daily_insolation(df)
-        df_monthly = df_daily.resample("MS", on="DateTime").mean().reset_index()
-        return df_monthly[["DateTime", "Insolation"]]
 
+        def compute() -> pd.DataFrame:
+            df_daily = self.calculate_daily_insolation(df, method=method, cache=cache)
+            df_monthly = (
+                df_daily[["DateTime", "Insolation"]]
+                .resample("MS", on="DateTime")
+                .mean()
+                .reset_index()
+            )
+            return df_monthly[["DateTime", "Insolation"]]
+
+        return _cached_result(
+            cache, ("Panel.monthly", method, *self._cache_parameters()), df, compute
+        )
+
+    @instrument
     def calculate_diffuse_fraction(
         self,
         dhi: float | np.ndarray,
@@ -151,3 +494,395 @@ class Panel:
             dhi, dni, azimuth_sun, zenith_sun
         )
         return diffuse / (direct + diffuse + ground_reflected)
+
+    def calculate_insolation_ensemble(
+        self, df: pd.DataFrame, **kwargs: object
+    ) -> "InsolationEnsemble":
+        """Calculate exceedance levels (P50, P90) of the monthly and annual insolation.
+
+        The ground reflectance, the DHI and DNI sensor biases and the orientation are
+        sampled around the panel's values, see uncertainty.insolation_ensemble.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing the irradiance data.
+                Required columns: "DateTime", "DHI", "DNI", "Azimuth", "Zenith".
+                where Zenith and Azimuth are the sun's position at the given DateTime.
+            **kwargs (object): Options of uncertainty.insolation_ensemble.
+
+        Returns:
+            InsolationEnsemble: Exceedance levels of the monthly and annual insolation
+                and of the transposition factor, and the samples.
+        """
+        # The ensemble is built on PanelArray, so it is imported on use
+        from pv_assignments.utils.uncertainty import insolation_ensemble
+
+        return insolation_ensemble(self, df, **kwargs)
+
+
+class PanelArray:
+    """Class representing a batch of solar panels with different orientations.
+
+    All calculations are broadcast over (n_panels, n_timesteps), so the sun-position
+    trigonometry is computed once per timestep and shared by every panel.
+    """
+
+    def __init__(
+        self,
+        azimuths: float | np.ndarray | list[float],
+        tilts: float | np.ndarray | list[float],
+        rho_gs: float | np.ndarray | list[float] = 0.2,
+        names: list[str] | None = None,
+        sky_model: str = "isotropic",
+        shading: list[ShadingTable | None] | None = None,
+    ) -> None:
+        """Initialize the panels with their azimuths, tilts and ground reflectances.
+
+        Args:
+            azimuths (float | np.ndarray | list[float]): Azimuth angles of the panels (degrees).
+            tilts (float | np.ndarray | list[float]): Tilt angles of the panels (degrees).
+            rho_gs (float | np.ndarray | list[float], optional): Ground reflectances (default is 0.2).
+            names (list[str] | None, optional): Name of each panel, used for the output columns.
+                If None, the panels are named by their index. Defaults to None.
+            sky_model (str, optional): Diffuse sky model, one of "isotropic",
+                "haydavies", "reindl" or "perez". Defaults to "isotropic".
+            shading (list[ShadingTable | None] | None, optional): Shading table of every
+                panel, None for unshaded panels. The tables must share one grid.
+                If None, no panel is shaded. Defaults to None.
+        """
+        azimuths, tilts, rho_gs = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(azimuths, dtype=float)),
+            np.atleast_1d(np.asarray(tilts, dtype=float)),
+            np.atleast_1d(np.asarray(rho_gs, dtype=float)),
+        )
+        if azimuths.ndim != 1:
+            raise ValueError("azimuths, tilts and rho_gs must be scalars or 1-D arrays")
+        if names is None:
+            names = [str(i) for i in range(azimuths.size)]
+        if len(names) != azimuths.size:
+            raise ValueError(f"Got {len(names)} names for {azimuths.size} panels")
+
+        self.azimuths = azimuths.copy()
+        self.tilts = tilts.copy()
+        self.rho_gs = rho_gs.copy()
+        self.names = list(names)
+        get_sky_model(sky_model)
+        self.sky_model = sky_model
+        self._set_shading(shading)
+
+        # Panel trigonometry as column vectors, so it broadcasts against timesteps
+        tilt_rad = np.radians(self.tilts)[:, None]
+        azimuth_rad = np.radians(self.azimuths)[:, None]
+        self._cos_tilt = np.cos(tilt_rad)
+        self._sin_tilt = np.sin(tilt_rad)
+        self._cos_azimuth = np.cos(azimuth_rad)
+        self._sin_azimuth = np.sin(azimuth_rad)
+        self._rho_g = self.rho_gs[:, None]
+
+    def _set_shading(self, shading: list[ShadingTable | None] | None) -> None:
+        """Stack the shading tables, so they are interpolated for all panels at once."""
+        self.shading = shading
+        if shading is None or all(table is None for table in shading):
+            self.shading = None
+            return
+        if len(shading) != self.azimuths.size:
+            raise ValueError(
+                f"Got {len(shading)} shading tables for {self.azimuths.size} panels"
+            )
+        for table, tilt, azimuth in zip(
+            shading, self.tilts, self.azimuths, strict=True
+        ):
+            _check_shading(table, tilt, azimuth)
+        grid = next(table for table in shading if table is not None)
+        if any(
+            table is not None and table.table.shape != grid.table.shape
+            for table in shading
+        ):
+            raise ValueError("All shading tables must share one grid")
+        self._shading_grid = grid
+        self._shading_tables = np.stack(
+            [np.ones_like(grid.table) if t is None else t.table for t in shading]
+        )
+        sky_view = [1.0 if t is None else t.sky_view for t in shading]
+        self._sky_view = np.array(sky_view)[:, None]
+
+    @classmethod
+    def from_panels(
+        cls, panels: list[Panel], names: list[str] | None = None
+    ) -> "PanelArray":
+        """Create a panel array from a list of single panels.
+
+        Args:
+            panels (list[Panel]): Panels to combine. They must share one sky model.
+            names (list[str] | None, optional): Name of each panel. Defaults to None.
+
+        Returns:
+            PanelArray: The combined panel array.
+        """
+        sky_models = {panel.sky_model for panel in panels}
+        if len(sky_models) > 1:
+            raise ValueError("All panels must use the same sky model")
+        return cls(
+            azimuths=[panel.azimuth for panel in panels],
+            tilts=[panel.tilt for panel in panels],
+            rho_gs=[panel.rho_g for panel in panels],
+            names=names,
+            sky_model=sky_models.pop() if sky_models else "isotropic",
+            shading=[panel.shading for panel in panels],
+        )
+
+    def __len__(self) -> int:
+        """Return the number of panels."""
+        return self.azimuths.size
+
+    def __getitem__(self, index: slice) -> "PanelArray":
+        """Return the panels selected by a slice as a new panel array."""
+        return PanelArray(
+            self.azimuths[index],
+            self.tilts[index],
+            self.rho_gs[index],
+            names=self.names[index],
+            sky_model=self.sky_model,
+            shading=None if self.shading is None else self.shading[index],
+        )
+
+    def _cos_angle_of_incidence(
+        self, azimuth_sun: float | np.ndarray, zenith_sun: float | np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Calculate cos(AOI) for every panel and cos(zenith) of the sun.
+
+        cos(azimuth_sun - azimuth_panel) is expanded with the angle difference identity,
+        so only multiplications are done per (panel, timestep).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: cos(AOI) with shape (n_panels, n_timesteps)
+                and cos(zenith) with shape (n_timesteps,).
+        """
+        zenith_rad = np.radians(np.atleast_1d(np.asarray(zenith_sun, dtype=float)))
+        azimuth_rad = np.radians(np.atleast_1d(np.asarray(azimuth_sun, dtype=float)))
+        cos_zenith = np.cos(zenith_rad)
+        sin_zenith = np.sin(zenith_rad)
+        cos_azimuth_diff = self._cos_azimuth * np.cos(
+            azimuth_rad
+        ) + self._sin_azimuth * np.sin(azimuth_rad)
+        cos_aoi = (
+            cos_zenith * self._cos_tilt + sin_zenith * self._sin_tilt * cos_azimuth_diff
+        )
+        return cos_aoi, cos_zenith
+
+    @instrument
+    def calculate_angle_of_incidence(
+        self, azimuth_sun: float | np.ndarray, zenith_sun: float | np.ndarray
+    ) -> np.ndarray:
+        """Calculate the angle of incidence of the sun on every panel.
+
+        Args:
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun (degrees).
+            zenith_sun (float | np.ndarray): Zenith angle of the sun (degrees).
+
+        Returns:
+            np.ndarray: Angle of incidence (degrees) with shape (n_panels, n_timesteps).
+        """
+        cos_aoi, _ = self._cos_angle_of_incidence(azimuth_sun, zenith_sun)
+        return np.degrees(np.arccos(np.clip(cos_aoi, -1, 1)))
+
+    @instrument
+    def calculate_gpoa_components(
+        self,
+        dhi: float | np.ndarray,
+        dni: float | np.ndarray,
+        azimuth_sun: float | np.ndarray,
+        zenith_sun: float | np.ndarray,
+        dni_extra: float | np.ndarray | None = None,
+        cos_aoi_out: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Calculate the components of the global plane of array irradiance for every panel.
+
+        Args:
+            dhi (float | np.ndarray): Diffuse horizontal irradiance
+            dni (float | np.ndarray): Direct normal irradiance
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun
+            zenith_sun (float | np.ndarray): Zenith angle of the sun
+            dni_extra (float | np.ndarray | None, optional): Extraterrestrial normal
+                irradiance, used by the anisotropic sky models. If None, the solar
+                constant is used. Defaults to None.
+            cos_aoi_out (np.ndarray | None, optional): Buffer with shape
+                (n_panels, n_timesteps) that receives cos(AOI), clipped at 0. It is
+                the geometric value, without shading. Defaults to None.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Direct irradiance, diffuse irradiance,
+                ground reflected irradiance, each with shape (n_panels, n_timesteps).
+        """
+        dhi = np.atleast_1d(np.asarray(dhi, dtype=float))
+        dni = np.atleast_1d(np.asarray(dni, dtype=float))
+        cos_aoi, cos_zenith = self._cos_angle_of_incidence(azimuth_sun, zenith_sun)
+        if cos_aoi_out is not None:
+            np.maximum(cos_aoi, 0, out=cos_aoi_out)
+        direct_irradiance = np.maximum(dni * cos_aoi, 0)
+        diffuse_irradiance = get_sky_model(self.sky_model)(
+            dhi,
+            dni,
+            cos_aoi,
+            cos_zenith,
+            np.atleast_1d(np.asarray(zenith_sun, dtype=float)),
+            self._cos_tilt,
+            self._sin_tilt,
+            SOLAR_CONSTANT if dni_extra is None else dni_extra,
+        )
+        if self.shading is not None:
+            elevation_sun = 90 - np.atleast_1d(np.asarray(zenith_sun, dtype=float))
+            direct_irradiance *= interpolate_tables(
+                self._shading_tables,
+                *self._shading_grid.grid_weights(azimuth_sun, elevation_sun),
+            )
+            diffuse_irradiance = diffuse_irradiance * self._sky_view
+        ground_reflected_irradiance = (
+            (dhi + dni * cos_zenith) * self._rho_g * (1 - self._cos_tilt) / 2
+        )
+        return direct_irradiance, diffuse_irradiance, ground_reflected_irradiance
+
+    @instrument
+    def calculate_gpoa(
+        self,
+        dhi: float | np.ndarray,
+        dni: float | np.ndarray,
+        azimuth_sun: float | np.ndarray,
+        zenith_sun: float | np.ndarray,
+        dni_extra: float | np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Calculate the global plane of array irradiance for every panel.
+
+        Args:
+            dhi (float | np.ndarray): Diffuse horizontal irradiance
+            dni (float | np.ndarray): Direct normal irradiance
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun
+            zenith_sun (float | np.ndarray): Zenith angle of the sun
+            dni_extra (float | np.ndarray | None, optional): Extraterrestrial normal
+                irradiance for the anisotropic sky models. Defaults to None.
+
+        Returns:
+            np.ndarray: Global plane of array irradiance with shape (n_panels, n_timesteps).
+        """
+        direct_irradiance, diffuse_irradiance, ground_reflected_irradiance = (
+            self.calculate_gpoa_components(
+                dhi, dni, azimuth_sun, zenith_sun, dni_extra=dni_extra
+            )
+        )
+        return direct_irradiance + diffuse_irradiance + ground_reflected_irradiance
+
+    @instrument
+    def calculate_diffuse_fraction(
+        self,
+        dhi: float | np.ndarray,
+        dni: float | np.ndarray,
+        azimuth_sun: float | np.ndarray,
+        zenith_sun: float | np.ndarray,
+    ) -> np.ndarray:
+        """Calculate the diffuse contribution of the irradiance for every panel.
+
+        Args:
+            dhi (float | np.ndarray): Diffuse horizontal irradiance
+            dni (float | np.ndarray): Direct normal irradiance
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun
+            zenith_sun (float | np.ndarray): Zenith angle of the sun
+
+        Returns:
+            np.ndarray: Diffuse contribution with shape (n_panels, n_timesteps).
+        """
+        direct, diffuse, ground_reflected = self.calculate_gpoa_components(
+            dhi, dni, azimuth_sun, zenith_sun
+        )
+        return diffuse / (direct + diffuse + ground_reflected)
+
+    @instrument
+    def calculate_daily_insolation(
+        self, df: pd.DataFrame, cache: bool = True
+    ) -> pd.DataFrame:
+        """Calculate the daily insolation on every panel.
+
+        The DataFrame is not modified.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing the irradiance data.
+                Required columns: "DateTime", "DHI", "DNI", "Azimuth", "Zenith".
+                where Zenith and Azimuth are the sun's position at the given DateTime.
+            cache (bool, optional): Whether to look the result up in the default
+                result cache, keyed by the panel parameters and the content of the
+                input columns. Defaults to True.
+
+        Returns:
+            pd.DataFrame: DataFrame with a "DateTime" column and one
+                "Insolation_<name>" column per panel.
+        """
+        return _cached_result(
+            cache,
+            ("PanelArray.daily", *self._cache_parameters()),
+            df,
+            lambda: self._daily_insolation(df),
+        )
+
+    def _cache_parameters(self) -> tuple:
+        """Panel parameters the insolation results depend on."""
+        shading = (None,)
+        if self.shading is not None:
+            shading = (
+                self._shading_grid.azimuths,
+                self._shading_grid.elevations,
+                self._shading_tables,
+                self._sky_view,
+            )
+        return (
+            self.azimuths,
+            self.tilts,
+            self.rho_gs,
+            tuple(self.names),
+            self.sky_model,
+            *shading,
+        )
+
+    def _daily_insolation(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Calculate the daily insolation without the result cache."""
+        gpoa = self.calculate_gpoa(
+            dhi=df["DHI"].to_numpy(),
+            dni=df["DNI"].to_numpy(),
+            azimuth_sun=df["Azimuth"].to_numpy(),
+            zenith_sun=df["Zenith"].to_numpy(),
+            dni_extra=_dni_extra(self.sky_model, df["DateTime"]),
+        )
+        with stage("resampling", rows=gpoa.shape[-1]):
+            gpoa = np.nan_to_num(gpoa, nan=0.0)  # Replace NaN values with 0
+            df_gpoa = pd.DataFrame(
+                gpoa.T,
+                index=pd.DatetimeIndex(df["DateTime"], name="DateTime"),
+                columns=[f"Insolation_{name}" for name in self.names],
+            )
+            df_daily = df_gpoa.resample("D").mean() * 24  # Assuming 24 hours per day
+        return df_daily.reset_index()
+
+    @instrument
+    def calculate_monthly_insolation(
+        self, df: pd.DataFrame, cache: bool = True
+    ) -> pd.DataFrame:
+        """Calculate the monthly insolation on every panel.
+
+        The DataFrame is not modified.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing the irradiance data.
+                Required columns: "DateTime", "DHI", "DNI", "Azimuth", "Zenith".
+                where Zenith and Azimuth are the sun's position at the given DateTime.
+            cache (bool, optional): Whether to use the default result cache, see
+                calculate_daily_insolation. Defaults to True.
+
+        Returns:
+            pd.DataFrame: DataFrame with a "DateTime" column and one
+                "Insolation_<name>" column per panel.
+        """
+
+        def compute() -> pd.DataFrame:
+            df_daily = self.calculate_daily_insolation(df, cache=cache)
+            return df_daily.resample("MS", on="DateTime").mean().reset_index()
+
+        return _cached_result(
+            cache, ("PanelArray.monthly", *self._cache_parameters()), df, compute
+        )
@@ -0,0 +1,364 @@
+"""DC and AC power of PV systems from the plane of array irradiance.
+
+The chain per timestep and system is:
+
+1. Incidence angle modifier on the beam component ("ashrae" or "physical").
+2. Cell temperature from the total plane of array irradiance, air temperature and
+   wind speed ("faiman" or "sapm").
+3. PVWatts DC power: pdc0 * effective irradiance / 1000 * (1 + gamma * (Tc - 25)).
+4. PVWatts inverter: part-load efficiency curve, clipped at the AC rating.
+
+All stages work in place on the (n_systems, n_timesteps) buffers of the GPOA
+components, so no intermediate arrays or DataFrame columns are created per stage.
+"""
+
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.panel_irradiation import PanelArray, _dni_extra
+
+# Default SAPM coefficients a, b and deltaT for an open-rack glass/glass module
+SAPM_OPEN_RACK_GLASS_GLASS = (-3.47, -0.0594, 3.0)
+
+# Air temperature (°C) and wind speed (m/s) used when the data has neither
+DEFAULT_AIR_TEMPERATURE = 20.0
+DEFAULT_WIND_SPEED = 1.0
+
+
+@dataclass
+class PowerResult:
+    """Result of a power simulation.
+
+    Attributes:
+        hourly (pd.DataFrame): Hourly mean AC power (W), with a "DateTime" column and
+            one "AC_<name>" column per system.
+        annual (pd.DataFrame): AC energy per year (kWh), with a "DateTime" column and
+            one "Energy_<name>" column per system.
+    """
+
+    hourly: pd.DataFrame
+    annual: pd.DataFrame
+
+
+def ashrae_iam(
+    cos_aoi: np.ndarray, b0: float = 0.05, out: np.ndarray | None = None
+) -> np.ndarray:
+    """Calculate the ASHRAE incidence angle modifier.
+
+    Args:
+        cos_aoi (np.ndarray): Cosine of the angle of incidence.
+        b0 (float, optional): ASHRAE coefficient. Defaults to 0.05.
+        out (np.ndarray | None, optional): Buffer to write the result into, may be
+            cos_aoi itself. Defaults to None.
+
+    Returns:
+        np.ndarray: Incidence angle modifier (0-1). 0 for light from behind.
+    """
+    behind = cos_aoi <= 0
+    with np.errstate(divide="ignore"):
+        out = np.divide(1.0, cos_aoi, out=out)
+    out -= 1
+    out *= -b0
+    out += 1
+    out[behind] = 0.0
+    return np.clip(out, 0, 1, out=out)
+
+
+def physical_iam(
+    cos_aoi: np.ndarray,
+    n: float = 1.526,
+    k: float = 4.0,
+    thickness: float = 0.002,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Calculate the incidence angle modifier from Fresnel reflection and absorption.
+
+    Args:
+        cos_aoi (np.ndarray): Cosine of the angle of incidence.
+        n (float, optional): Refractive index of the cover. Defaults to 1.526.
+        k (float, optional): Extinction coefficient of the cover (1/m). Defaults to 4.
+        thickness (float, optional): Thickness of the cover (m). Defaults to 0.002.
+        out (np.ndarray | None, optional): Buffer to write the result into, may be
+            cos_aoi itself. Defaults to None.
+
+    Returns:
+        np.ndarray: Incidence angle modifier (0-1), relative to normal incidence.
+    """
+
+    def transmittance(cos_i: np.ndarray) -> np.ndarray:
+        sin_i = np.sqrt(np.maximum(1 - cos_i**2, 0))
+        sin_r = sin_i / n
+        cos_r = np.sqrt(1 - sin_r**2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = ((cos_i - n * cos_r) / (cos_i + n * cos_r)) ** 2
+            rp = ((cos_r - n * cos_i) / (cos_r + n * cos_i)) ** 2
+        return np.exp(-k * thickness / cos_r) * (1 - (rs + rp) / 2)
+
+    cos_i = np.clip(cos_aoi, 0, 1)
+    iam = transmittance(cos_i) / transmittance(np.ones(1))
+    iam = np.where(cos_i > 0, np.nan_to_num(iam, nan=0.0), 0.0)
+    if out is None:
+        return iam
+    out[...] = iam
+    return out
+
+
+def faiman_temperature(
+    poa: np.ndarray,
+    temp_air: float | np.ndarray,
+    wind_speed: float | np.ndarray,
+    u0: float = 25.0,
+    u1: float = 6.84,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Calculate the cell temperature with the Faiman model.
+
+    Args:
+        poa (np.ndarray): Plane of array irradiance (W/m²).
+        temp_air (float | np.ndarray): Air temperature (°C).
+        wind_speed (float | np.ndarray): Wind speed (m/s).
+        u0 (float, optional): Constant heat loss factor (W/m²/K). Defaults to 25.
+        u1 (float, optional): Wind heat loss factor (W/m³/K/s). Defaults to 6.84.
+        out (np.ndarray | None, optional): Buffer to write the result into, may be
+            poa itself. Defaults to None.
+
+    Returns:
+        np.ndarray: Cell temperature (°C).
+    """
+    out = np.divide(poa, u0 + u1 * np.asarray(wind_speed, dtype=float), out=out)
+    out += temp_air
+    return out
+
+
+def sapm_temperature(
+    poa: np.ndarray,
+    temp_air: float | np.ndarray,
+    wind_speed: float | np.ndarray,
+    coefficients: tuple[float, float, float] = SAPM_OPEN_RACK_GLASS_GLASS,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Calculate the cell temperature with the Sandia (SAPM) model.
+
+    Args:
+        poa (np.ndarray): Plane of array irradiance (W/m²).
+        temp_air (float | np.ndarray): Air temperature (°C).
+        wind_speed (float | np.ndarray): Wind speed (m/s).
+        coefficients (tuple[float, float, float], optional): a, b and deltaT of the
+            mounting. Defaults to an open-rack glass/glass module.
+        out (np.ndarray | None, optional): Buffer to write the result into, may be
+            poa itself. Defaults to None.
+
+    Returns:
+        np.ndarray: Cell temperature (°C).
+    """
+    a, b, delta_t = coefficients
+    factor = np.exp(a + b * np.asarray(wind_speed, dtype=float)) + delta_t / 1000
+    out = np.multiply(poa, factor, out=out)
+    out += temp_air
+    return out
+
+
+def pvwatts_inverter(
+    pdc: np.ndarray,
+    pac0: float | np.ndarray,
+    eta_nom: float = 0.96,
+    eta_ref: float = 0.9637,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Calculate the AC power with the PVWatts inverter model.
+
+    Args:
+        pdc (np.ndarray): DC power (W).
+        pac0 (float | np.ndarray): AC power rating of the inverter (W).
+        eta_nom (float, optional): Nominal efficiency. Defaults to 0.96.
+        eta_ref (float, optional): Reference efficiency. Defaults to 0.9637.
+        out (np.ndarray | None, optional): Buffer to write the result into.
+            Defaults to None.
+
+    Returns:
+        np.ndarray: AC power (W), 0 without DC power or below the inverter's
+            self-consumption.
+    """
+    pdc0 = np.asarray(pac0, dtype=float) / eta_nom
+    zeta = pdc / pdc0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eta = eta_nom / eta_ref * (-0.0162 * zeta - 0.0059 / zeta + 0.9858)
+        out = np.multiply(eta, pdc, out=out)
+    np.clip(out, 0, pac0, out=out)
+    out[~(pdc > 0)] = 0.0
+    return out
+
+
+_IAM_MODELS = {"ashrae": ashrae_iam, "physical": physical_iam}
+_TEMPERATURE_MODELS = {"faiman": faiman_temperature, "sapm": sapm_temperature}
+
+
+class PowerModel:
+    """PVWatts-style DC and AC power of a fleet of PV systems."""
+
+    def __init__(
+        self,
+        panels: PanelArray,
+        pdc0: float | np.ndarray | list[float],
+        gamma_pdc: float = -0.004,
+        dc_ac_ratio: float = 1.2,
+        eta_inv_nom: float = 0.96,
+        iam_model: Literal["ashrae", "physical"] = "ashrae",
+        temperature_model: Literal["faiman", "sapm"] = "faiman",
+    ) -> None:
+        """Initialize the systems.
+
+        Args:
+            panels (PanelArray): Orientation of every system.
+            pdc0 (float | np.ndarray | list[float]): DC rating of every system at
+                1000 W/m² and 25 °C (W).
+            gamma_pdc (float, optional): Temperature coefficient of the DC power (1/°C).
+                Defaults to -0.004.
+            dc_ac_ratio (float, optional): Ratio of the DC rating to the inverter AC
+                rating. Defaults to 1.2.
+            eta_inv_nom (float, optional): Nominal inverter efficiency. Defaults to 0.96.
+            iam_model ("ashrae" | "physical", optional): Incidence angle modifier.
+                Defaults to "ashrae".
+            temperature_model ("faiman" | "sapm", optional): Cell temperature model.
+                Defaults to "faiman".
+        """
+        if iam_model not in _IAM_MODELS:
+            raise ValueError(f"Unknown IAM model: {iam_model}")
+        if temperature_model not in _TEMPERATURE_MODELS:
+            raise ValueError(f"Unknown temperature model: {temperature_model}")
+        self.panels = panels
+        self.pdc0 = np.broadcast_to(
+            np.asarray(pdc0, dtype=float), (len(panels),)
+        ).copy()
+        self.gamma_pdc = gamma_pdc
+        self.dc_ac_ratio = dc_ac_ratio
+        self.eta_inv_nom = eta_inv_nom
+        self.iam_model = iam_model
+        self.temperature_model = temperature_model
+
+    def calculate_power(
+        self,
+        dhi: np.ndarray,
+        dni: np.ndarray,
+        azimuth_sun: np.ndarray,
+        zenith_sun: np.ndarray,
+        temp_air: float | np.ndarray = DEFAULT_AIR_TEMPERATURE,
+        wind_speed: float | np.ndarray = DEFAULT_WIND_SPEED,
+        dni_extra: float | np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Calculate the DC and AC power of every system.
+
+        Args:
+            dhi (np.ndarray): Diffuse horizontal irradiance (W/m²).
+            dni (np.ndarray): Direct normal irradiance (W/m²).
+            azimuth_sun (np.ndarray): Azimuth angle of the sun (degrees).
+            zenith_sun (np.ndarray): Zenith angle of the sun (degrees).
+            temp_air (float | np.ndarray, optional): Air temperature (°C). Defaults to 20.
+            wind_speed (float | np.ndarray, optional): Wind speed (m/s). Defaults to 1.
+            dni_extra (float | np.ndarray | None, optional): Extraterrestrial normal
+                irradiance for the anisotropic sky models. Defaults to None.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: DC and AC power (W), each with shape
+                (n_systems, n_timesteps). Missing irradiance gives 0 W.
+        """
+        dni = np.atleast_1d(np.nan_to_num(np.asarray(dni, dtype=float), nan=0.0))
+        dhi = np.atleast_1d(np.nan_to_num(np.asarray(dhi, dtype=float), nan=0.0))
+        # The geometric cos(AOI) is written into the IAM buffer, so shading only
+        # scales the beam component and not the modifier as well
+        n_timesteps = np.broadcast_shapes(
+            dhi.shape, dni.shape, np.shape(azimuth_sun), np.shape(zenith_sun)
+        )[-1]
+        iam = np.empty((len(self.panels), n_timesteps))
+        direct, diffuse, ground = self.panels.calculate_gpoa_components(
+            dhi, dni, azimuth_sun, zenith_sun, dni_extra=dni_extra, cos_aoi_out=iam
+        )
+        _IAM_MODELS[self.iam_model](iam, out=iam)
+
+        diffuse += ground  # Sky and ground diffuse light
+        np.add(direct, diffuse, out=ground)  # Total plane of array irradiance
+        direct *= iam
+        direct += diffuse  # Effective irradiance reaching the cells
+        cell_temperature = _TEMPERATURE_MODELS[self.temperature_model](
+            ground, temp_air, wind_speed, out=ground
+        )
+
+        # PVWatts DC: pdc0 * effective / 1000 * (1 + gamma * (Tc - 25))
+        pdc = direct
+        cell_temperature -= 25
+        cell_temperature *= self.gamma_pdc
+        cell_temperature += 1
+        pdc *= cell_temperature
+        pdc *= (self.pdc0 / 1000)[:, None]
+
+        pac0 = (self.pdc0 * self.eta_inv_nom / self.dc_ac_ratio)[:, None]
+        pac = pvwatts_inverter(pdc, pac0, eta_nom=self.eta_inv_nom, out=diffuse)
+        return pdc, pac
+
+    def simulate(self, df: pd.DataFrame, max_elements: int = 2**22) -> PowerResult:
+        """Calculate the hourly AC power and annual AC energy of every system.
+
+        The systems are evaluated in chunks, so the (n_systems, n_timesteps) buffers
+        never have more than `max_elements` elements.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing the irradiance data.
+                Required columns: "DateTime", "DHI", "DNI", "Azimuth", "Zenith".
+                Optional columns: "AirTemperature" (°C) and "WindSpeed" (m/s), which
+                default to 20 °C and 1 m/s.
+            max_elements (int, optional): Largest number of (system, timestep) pairs
+                evaluated at once. Defaults to 2**22.
+
+        Returns:
+            PowerResult: Hourly AC power and annual AC energy.
+        """
+        temp_air = (
+            df["AirTemperature"].to_numpy(dtype=float)
+            if "AirTemperature" in df
+            else DEFAULT_AIR_TEMPERATURE
+        )
+        wind_speed = (
+            df["WindSpeed"].to_numpy(dtype=float)
+            if "WindSpeed" in df
+            else DEFAULT_WIND_SPEED
+        )
+        date_time = pd.DatetimeIndex(df["DateTime"], name="DateTime")
+        hourly_index = None
+        chunks = []
+        chunk_size = max(1, max_elements // max(len(df), 1))
+        for start in range(0, len(self.panels), chunk_size):
+            stop = start + chunk_size
+            chunk = PowerModel(
+                self.panels[start:stop],
+                self.pdc0[start:stop],
+                gamma_pdc=self.gamma_pdc,
+                dc_ac_ratio=self.dc_ac_ratio,
+                eta_inv_nom=self.eta_inv_nom,
+                iam_model=self.iam_model,
+                temperature_model=self.temperature_model,
+            )
+            _, pac = chunk.calculate_power(
+                df["DHI"].to_numpy(),
+                df["DNI"].to_numpy(),
+                df["Azimuth"].to_numpy(),
+                df["Zenith"].to_numpy(),
+                temp_air=temp_air,
+                wind_speed=wind_speed,
+                dni_extra=_dni_extra(self.panels.sky_model, df["DateTime"]),
+            )
+            hourly = pd.DataFrame(pac.T, index=date_time).resample("h").mean()
+            hourly_index = hourly.index
+            chunks.append(hourly.to_numpy())
+
+        hourly = pd.DataFrame(
+            np.concatenate(chunks, axis=1),
+            index=hourly_index,
+            columns=[f"AC_{name}" for name in self.panels.names],
+        )
+        # Each hourly mean power (W) times one hour is the energy of that hour (Wh)
+        annual = hourly.fillna(0).resample("YS").sum() / 1000
+        annual.columns = [f"Energy_{name}" for name in self.panels.names]
+        return PowerResult(hourly=hourly.reset_index(), annual=annual.reset_index())
@@ -0,0 +1,269 @@
+"""Quality control of measured GHI, DHI and DNI before they are used by Panel.
+
+Every row gets a bitmask of the tests it fails (QCFlag):
+
+- Physically possible and extremely rare limits of the BSRN recommendations
+  (Long and Dutton, 2002) for each component.
+- Closure: GHI against DHI + DNI·cos(zenith), and the diffuse ratio DHI/GHI.
+- Stuck sensors: a daytime value repeated for longer than a time window.
+- Clear-sky screening: GHI far above the clear-sky GHI of the Ineichen or Haurwitz
+  model.
+
+All tests are vectorized over the whole series, and screen() sets the values that
+fail them to NaN, so the "exact" insolation method can fill or flag those days.
+"""
+
+from enum import IntFlag
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.clear_sky import (
+    extraterrestrial_irradiance,
+    haurwitz,
+    ineichen,
+)
+
+COMPONENTS = ["GHI", "DHI", "DNI"]
+
+# Least irradiance (W/m²) for the closure and diffuse ratio tests to be meaningful
+_MIN_CLOSURE_IRRADIANCE = 50.0
+
+
+class QCFlag(IntFlag):
+    """Bits of the quality control mask. A row passes when its mask is 0."""
+
+    MISSING = 1 << 0  # A component is NaN while the sun is up
+    GHI_PHYSICAL = 1 << 1
+    DHI_PHYSICAL = 1 << 2
+    DNI_PHYSICAL = 1 << 3
+    GHI_EXTREME = 1 << 4
+    DHI_EXTREME = 1 << 5
+    DNI_EXTREME = 1 << 6
+    CLOSURE = 1 << 7
+    DIFFUSE_RATIO = 1 << 8
+    GHI_STUCK = 1 << 9
+    DHI_STUCK = 1 << 10
+    DNI_STUCK = 1 << 11
+    ABOVE_CLEAR_SKY = 1 << 12
+
+
+# Flags of the tests on a single component, per component
+_COMPONENT_FLAGS = {
+    "GHI": QCFlag.GHI_PHYSICAL | QCFlag.GHI_EXTREME | QCFlag.GHI_STUCK,
+    "DHI": QCFlag.DHI_PHYSICAL | QCFlag.DHI_EXTREME | QCFlag.DHI_STUCK,
+    "DNI": QCFlag.DNI_PHYSICAL | QCFlag.DNI_EXTREME | QCFlag.DNI_STUCK,
+}
+# Flags of the tests that compare the components, which reject all of them
+_ROW_FLAGS = QCFlag.CLOSURE | QCFlag.DIFFUSE_RATIO | QCFlag.ABOVE_CLEAR_SKY
+
+
+def _set(mask: np.ndarray, failed: np.ndarray, flag: QCFlag) -> None:
+    """Set a flag in the rows that failed a test."""
+    np.bitwise_or(mask, np.uint16(flag), out=mask, where=failed)
+
+
+def _outside(values: np.ndarray, lower: float, upper: np.ndarray) -> np.ndarray:
+    """Rows outside lower <= value <= upper."""
+    return (values < lower) | (values > upper)
+
+
+def stuck_values(
+    values: np.ndarray, min_samples: int, threshold: float = 5.0
+) -> np.ndarray:
+    """Find runs of a repeated value, as left by a stuck sensor or logger.
+
+    A rolling window with zero spread is the same as a run of equal values, so the
+    runs are found in one pass from the positions where the value changes.
+
+    Args:
+        values (np.ndarray): Measured values.
+        min_samples (int): Shortest run that counts as stuck.
+        threshold (float, optional): Only values above it can be stuck, so that
+            zeros at night are not flagged. Defaults to 5.
+
+    Returns:
+        np.ndarray: Whether each value is part of a stuck run.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return np.zeros(0, dtype=bool)
+    # NaN never equals itself, so missing values break runs
+    starts = np.empty(values.size, dtype=bool)
+    starts[0] = True
+    np.not_equal(values[1:], values[:-1], out=starts[1:])
+    run = np.cumsum(starts) - 1
+    lengths = np.bincount(run)
+    return (lengths[run] >= min_samples) & (values > threshold)
+
+
+def _window_samples(date_time: pd.Series, window: str | pd.Timedelta) -> int:
+    """Number of samples in a time window, from the typical sampling interval."""
+    index = pd.DatetimeIndex(date_time)
+    if index.size < 2:
+        return 3
+    step = pd.Timedelta(int(np.median(np.diff(index.asi8))), unit=index.unit)
+    return max(round(pd.Timedelta(window) / step) + 1, 3)
+
+
+def quality_control(
+    df: pd.DataFrame,
+    clear_sky: Literal["ineichen", "haurwitz"] = "ineichen",
+    linke_turbidity: float | np.ndarray = 3.0,
+    altitude: float = 0.0,
+    stuck_window: str | pd.Timedelta = "3h",
+    stuck_threshold: float = 5.0,
+    clear_sky_factor: float = 1.5,
+) -> np.ndarray:
+    """Run the quality control tests on every row.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the irradiance data.
+            Required columns: "DateTime", "GHI", "DHI", "DNI", "Zenith".
+        clear_sky ("ineichen" | "haurwitz", optional): Clear-sky model of the
+            screening. Defaults to "ineichen".
+        linke_turbidity (float | np.ndarray, optional): Linke turbidity of the
+            Ineichen model, one value or one per row. Defaults to 3.
+        altitude (float, optional): Altitude of the site (m). Defaults to 0.
+        stuck_window (str | pd.Timedelta, optional): Shortest time a daytime value
+            must repeat to count as stuck. Defaults to "3h".
+        stuck_threshold (float, optional): Only values above it can be stuck (W/m²).
+            Defaults to 5.
+        clear_sky_factor (float, optional): GHI above this multiple of the clear-sky
+            GHI plus 50 W/m² is flagged. It leaves room for cloud enhancement.
+            Defaults to 1.5.
+
+    Returns:
+        np.ndarray: uint16 bitmask of the failed tests per row, see QCFlag.
+    """
+    ghi, dhi, dni = (df[column].to_numpy(dtype=float) for column in COMPONENTS)
+    zenith = df["Zenith"].to_numpy(dtype=float)
+    cos_zenith = np.maximum(np.cos(np.radians(zenith)), 0)
+    dni_extra = extraterrestrial_irradiance(df["DateTime"])
+    mask = np.zeros(len(df), dtype=np.uint16)
+    day = zenith < 90
+
+    missing = np.isnan(ghi) | np.isnan(dhi) | np.isnan(dni)
+    _set(mask, missing & day, QCFlag.MISSING)
+
+    # BSRN physically possible limits, then extremely rare limits, as multiples of
+    # the extraterrestrial irradiance
+    horizontal = cos_zenith**1.2
+    horizontal *= dni_extra
+    _set(mask, _outside(ghi, -4, 1.5 * horizontal + 100), QCFlag.GHI_PHYSICAL)
+    _set(mask, _outside(dhi, -4, 0.95 * horizontal + 50), QCFlag.DHI_PHYSICAL)
+    _set(mask, _outside(dni, -4, dni_extra), QCFlag.DNI_PHYSICAL)
+    _set(mask, _outside(ghi, -2, 1.2 * horizontal + 50), QCFlag.GHI_EXTREME)
+    _set(mask, _outside(dhi, -2, 0.75 * horizontal + 30), QCFlag.DHI_EXTREME)
+    normal = cos_zenith**0.2
+    normal *= dni_extra
+    _set(mask, _outside(dni, -2, 0.95 * normal + 10), QCFlag.DNI_EXTREME)
+
+    # Closure and diffuse ratio, with a wider tolerance near the horizon
+    low_sun = zenith >= 75
+    in_range = zenith < 93
+    component_sum = dni * cos_zenith
+    component_sum += dhi
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closure = np.abs(ghi / component_sum - 1)
+        diffuse_ratio = dhi / ghi
+    _set(
+        mask,
+        in_range
+        & (component_sum > _MIN_CLOSURE_IRRADIANCE)
+        & (closure > np.where(low_sun, 0.15, 0.08)),
+        QCFlag.CLOSURE,
+    )
+    _set(
+        mask,
+        in_range
+        & (ghi > _MIN_CLOSURE_IRRADIANCE)
+        & (diffuse_ratio > np.where(low_sun, 1.10, 1.05)),
+        QCFlag.DIFFUSE_RATIO,
+    )
+
+    min_samples = _window_samples(df["DateTime"], stuck_window)
+    for values, flag in (
+        (ghi, QCFlag.GHI_STUCK),
+        (dhi, QCFlag.DHI_STUCK),
+        (dni, QCFlag.DNI_STUCK),
+    ):
+        _set(mask, stuck_values(values, min_samples, stuck_threshold), flag)
+
+    if clear_sky == "ineichen":
+        ghi_clear = ineichen(
+            zenith, df["DateTime"], linke_turbidity, altitude, dni_extra
+        )[0]
+    elif clear_sky == "haurwitz":
+        ghi_clear = haurwitz(zenith)
+    else:
+        raise ValueError(f"Unknown clear-sky model: {clear_sky}")
+    _set(mask, ghi > clear_sky_factor * ghi_clear + 50, QCFlag.ABOVE_CLEAR_SKY)
+    return mask
+
+
+def add_qc_flags(df: pd.DataFrame, **kwargs: object) -> pd.DataFrame:
+    """Return a copy of the data with the quality control bitmask as a "QC" column.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the irradiance data, see
+            quality_control.
+        **kwargs (object): Options of quality_control.
+
+    Returns:
+        pd.DataFrame: Copy of the DataFrame with a "QC" column.
+    """
+    mask = quality_control(df, **kwargs)
+    df = df.copy()
+    df["QC"] = mask
+    return df
+
+
+def screen(
+    df: pd.DataFrame,
+    flags: QCFlag = ~QCFlag.MISSING,
+    mask: np.ndarray | None = None,
+    **kwargs: object,
+) -> pd.DataFrame:
+    """Return a copy of the data with the values that fail quality control set to NaN.
+
+    A failed test on one component only removes that component, a failed closure,
+    diffuse ratio or clear-sky test removes all three.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the irradiance data, see
+            quality_control.
+        flags (QCFlag, optional): Tests to act on. Defaults to all tests.
+        mask (np.ndarray | None, optional): Bitmask of quality_control, if it was
+            already computed. Defaults to None.
+        **kwargs (object): Options of quality_control.
+
+    Returns:
+        pd.DataFrame: Copy of the DataFrame with the rejected values set to NaN.
+    """
+    if mask is None:
+        mask = quality_control(df, **kwargs)
+    mask = mask & np.uint16(flags)
+    rejected_rows = (mask & np.uint16(_ROW_FLAGS)) != 0
+    df = df.copy()
+    for column in COMPONENTS:
+        rejected = rejected_rows | ((mask & np.uint16(_COMPONENT_FLAGS[column])) != 0)
+        values = df[column].to_numpy(dtype=float, copy=True)
+        values[rejected] = np.nan
+        df[column] = values
+    return df
+
+
+def summarize(mask: np.ndarray) -> pd.Series:
+    """Count the rows that fail each test.
+
+    Args:
+        mask (np.ndarray): Bitmask of quality_control.
+
+    Returns:
+        pd.Series: Number of flagged rows per flag name.
+    """
+    return pd.Series(
+        {flag.name: int(np.count_nonzero(mask & np.uint16(flag))) for flag in QCFlag}
+    )
@@ -0,0 +1,160 @@
+"""Bounded cache of insolation results, keyed by panel parameters and input content.
+
+The key of a result is a hash of everything it depends on: the method and its
+options, the panel parameters and a content fingerprint of the input columns. Equal
+inputs therefore hit the cache even when they are different DataFrame objects, and
+a changed value anywhere in the inputs gives a new key.
+
+Results are kept in an in-process LRU with a memory budget. With the optional disk
+tier they are also written to the "results" cache directory, so they survive the
+process and are shared between jobs.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.cache import CACHE_VERSION, cache_dir
+
+
+def _update_hash(hasher: "hashlib._Hash", value: object) -> None:
+    """Feed a scalar, array or Series to a hash."""
+    if isinstance(value, pd.Series):
+        if pd.api.types.is_datetime64_any_dtype(value.dtype):
+            hasher.update(str(value.dtype).encode())
+            value = pd.DatetimeIndex(value).asi8
+        else:
+            value = value.to_numpy()
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            value = pd.util.hash_array(value)
+        hasher.update(f"{value.dtype}{value.shape}".encode())
+        hasher.update(np.ascontiguousarray(value).data)
+    else:
+        hasher.update(repr(value).encode())
+    hasher.update(b"|")
+
+
+def fingerprint(*values: object) -> str:
+    """Hash the content of scalars, arrays and Series.
+
+    Args:
+        *values (object): Values to hash, in order.
+
+    Returns:
+        str: Hex digest of the values.
+    """
+    # SHA-256 is hardware accelerated on most CPUs, about twice as fast as BLAKE2
+    hasher = hashlib.sha256()
+    hasher.update(str(CACHE_VERSION).encode())
+    for value in values:
+        _update_hash(hasher, value)
+    return hasher.hexdigest()[:32]
+
+
+class ResultCache:
+    """LRU cache of DataFrame results with a memory budget and optional disk tier.
+
+    Results are copied going in and out, so callers can modify what they get back
+    without affecting the cache.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20, disk: bool = False) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_bytes (int, optional): Memory budget of the in-process LRU (bytes).
+                Least recently used results are evicted to stay below it.
+                Defaults to 64 MiB.
+            disk (bool, optional): Whether to also keep results in the on-disk cache.
+                Defaults to False.
+        """
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[str, tuple[pd.DataFrame, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of results in memory."""
+        return len(self._results)
+
+    def _disk_path(self, key: str) -> Path:
+        """File of a result in the disk tier."""
+        return cache_dir("results") / f"{key}.pkl"
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        """Look up a result.
+
+        Args:
+            key (str): Key of the result.
+
+        Returns:
+            pd.DataFrame | None: Copy of the result, or None if it is not cached.
+        """
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return self._results[key][0].copy()
+        if self.disk:
+            path = self._disk_path(key)
+            if path.exists():
+                result = pd.read_pickle(path)
+                self._store(key, result)
+                self.hits += 1
+                return result.copy()
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: pd.DataFrame) -> None:
+        """Add a result.
+
+        Args:
+            key (str): Key of the result.
+            result (pd.DataFrame): The result. A copy is stored.
+        """
+        result = result.copy()
+        self._store(key, result)
+        if self.disk:
+            path = self._disk_path(key)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            result.to_pickle(tmp)
+            os.replace(tmp, path)
+
+    def _store(self, key: str, result: pd.DataFrame) -> None:
+        """Add a result to the in-process LRU and evict down to the budget."""
+        size = int(result.memory_usage(index=True, deep=True).sum())
+        if key in self._results:
+            self.nbytes -= self._results.pop(key)[1]
+        if size > self.max_bytes:
+            return
+        self._results[key] = (result, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            self.nbytes -= self._results.popitem(last=False)[1][1]
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop all results from memory.
+
+        Args:
+            disk (bool, optional): Whether to also delete the disk tier.
+                Defaults to False.
+        """
+        self._results.clear()
+        self.nbytes = 0
+        if disk:
+            for path in cache_dir("results").glob("*.pkl"):
+                path.unlink(missing_ok=True)
+
+
+_default_cache = ResultCache()
+
+
+def default_cache() -> ResultCache:
+    """Return the result cache shared by the whole process."""
+    return _default_cache
@@ -0,0 +1,190 @@
+"""Inter-row shading and horizon masking through a precomputed lookup table.
+
+The unshaded beam fraction of a panel only depends on the sun's position, so it is
+computed once per geometry on a (sun azimuth, sun elevation) grid and interpolated
+bilinearly for every timestep. Two losses are combined:
+
+- Rows: infinitely long parallel rows on flat ground, facing the panel azimuth. The
+  row in front shades the lower part of the panel when the sun's profile angle is
+  low. The first row of a plant is not treated separately.
+- Horizon: the beam is blocked while the sun is below the horizon profile.
+
+Both also block part of the sky, which is applied to the sky diffuse irradiance as a
+constant sky view factor.
+"""
+
+import numpy as np
+
+# Sample points along the panel slant used for the average row sky view factor
+_SLANT_SAMPLES = 101
+
+
+class ShadingTable:
+    """Lookup table of the unshaded beam fraction of one panel geometry."""
+
+    def __init__(
+        self,
+        tilt: float,
+        azimuth: float,
+        pitch: float | None = None,
+        collector_width: float | None = None,
+        horizon: tuple[np.ndarray, np.ndarray] | None = None,
+        azimuth_step: float = 1.0,
+        elevation_step: float = 0.5,
+    ) -> None:
+        """Build the lookup table.
+
+        Args:
+            tilt (float): Tilt angle of the panel (degrees).
+            azimuth (float): Azimuth angle of the panel (degrees, south convention).
+            pitch (float | None, optional): Distance between the rows (m). If None, there
+                is no row shading. Defaults to None.
+            collector_width (float | None, optional): Slant length of a row (m), the
+                "row height" along the tilted panel. Defaults to None.
+            horizon (tuple[np.ndarray, np.ndarray] | None, optional): Horizon profile as
+                azimuths (degrees, south convention) and elevations (degrees), which is
+                interpolated periodically. If None, the horizon is flat.
+                Defaults to None.
+            azimuth_step (float, optional): Azimuth spacing of the table (degrees).
+                Defaults to 1.0.
+            elevation_step (float, optional): Elevation spacing of the table (degrees).
+                Defaults to 0.5.
+        """
+        if (pitch is None) != (collector_width is None):
+            raise ValueError("pitch and collector_width must be given together")
+        if pitch is not None and pitch <= 0:
+            raise ValueError("pitch must be positive")
+        self.tilt = tilt
+        self.azimuth = azimuth
+        self.pitch = pitch
+        self.collector_width = collector_width
+
+        self.azimuths = np.arange(-180, 180 + azimuth_step / 2, azimuth_step)
+        self.elevations = np.arange(0, 90 + elevation_step / 2, elevation_step)
+        azimuth_grid, elevation_grid = np.meshgrid(
+            self.azimuths, self.elevations, indexing="ij"
+        )
+
+        self.table = np.ones(azimuth_grid.shape)
+        self.sky_view = 1.0
+        if pitch is not None:
+            self.table *= 1 - self._row_shading(azimuth_grid, elevation_grid)
+            self.sky_view *= self._row_sky_view()
+        if horizon is not None:
+            horizon_elevation = self._horizon_elevation(horizon, self.azimuths)
+            self.table *= elevation_grid >= horizon_elevation[:, None]
+            # Sky blocked by the horizon, as seen from a horizontal plane
+            self.sky_view *= 1 - np.mean(np.sin(np.radians(horizon_elevation)) ** 2)
+
+    @staticmethod
+    def _horizon_elevation(
+        horizon: tuple[np.ndarray, np.ndarray], azimuths: np.ndarray
+    ) -> np.ndarray:
+        """Horizon elevation (degrees) at the given azimuths."""
+        horizon_azimuths, horizon_elevations = (
+            np.asarray(values, dtype=float) for values in horizon
+        )
+        order = np.argsort(horizon_azimuths)
+        return np.interp(
+            azimuths,
+            horizon_azimuths[order],
+            horizon_elevations[order],
+            period=360,
+        )
+
+    def _row_shading(
+        self, azimuth_sun: np.ndarray, elevation_sun: np.ndarray
+    ) -> np.ndarray:
+        """Shaded fraction of the panel by the row in front of it."""
+        tilt = np.radians(self.tilt)
+        elevation = np.radians(elevation_sun)
+        # Sun elevation projected on the plane perpendicular to the rows
+        profile = np.arctan2(
+            np.sin(elevation),
+            np.cos(elevation) * np.cos(np.radians(azimuth_sun - self.azimuth)),
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            unshaded = (
+                self.pitch
+                * np.sin(profile)
+                / (self.collector_width * np.sin(profile + tilt))
+            )
+        # With the sun behind the panel there is no beam on it to shade
+        behind = np.sin(profile + tilt) <= 0
+        return np.where(behind, 0.0, np.clip(1 - unshaded, 0, 1))
+
+    def _row_sky_view(self) -> float:
+        """Sky view factor of the panel relative to an unobstructed panel.
+
+        Every point on the panel sees the sky above the top edge of the row in front,
+        so the 2D view factor (1 + cos(tilt + mask)) / 2 is averaged along the slant.
+        """
+        tilt = np.radians(self.tilt)
+        remaining = self.collector_width * (1 - np.linspace(0, 1, _SLANT_SAMPLES))
+        mask = np.arctan2(
+            remaining * np.sin(tilt), self.pitch - remaining * np.cos(tilt)
+        )
+        mask = np.maximum(mask, 0)
+        return float(np.mean(1 + np.cos(tilt + mask)) / (1 + np.cos(tilt)))
+
+    def grid_weights(
+        self, azimuth_sun: np.ndarray, elevation_sun: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Locate every sun position in the grid of the table.
+
+        Args:
+            azimuth_sun (np.ndarray): Azimuth angle of the sun (degrees).
+            elevation_sun (np.ndarray): Elevation angle of the sun (degrees).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Lower azimuth and
+                elevation indices and the positions between the grid points, as taken
+                by interpolate_tables.
+        """
+        azimuth_sun = (np.asarray(azimuth_sun, dtype=float) + 180) % 360 - 180
+        elevation_sun = np.clip(np.asarray(elevation_sun, dtype=float), 0, 90)
+
+        x = (azimuth_sun - self.azimuths[0]) / (self.azimuths[1] - self.azimuths[0])
+        y = (elevation_sun - self.elevations[0]) / (
+            self.elevations[1] - self.elevations[0]
+        )
+        i = np.clip(np.floor(np.nan_to_num(x)).astype(int), 0, self.azimuths.size - 2)
+        j = np.clip(np.floor(np.nan_to_num(y)).astype(int), 0, self.elevations.size - 2)
+        return i, j, x - i, y - j
+
+    def beam_fraction(
+        self, azimuth_sun: float | np.ndarray, elevation_sun: float | np.ndarray
+    ) -> np.ndarray:
+        """Interpolate the unshaded beam fraction for every sun position.
+
+        Args:
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun (degrees).
+            elevation_sun (float | np.ndarray): Elevation angle of the sun (degrees).
+
+        Returns:
+            np.ndarray: Unshaded fraction of the beam irradiance (0-1).
+        """
+        return interpolate_tables(
+            self.table, *self.grid_weights(azimuth_sun, elevation_sun)
+        )
+
+
+def interpolate_tables(
+    tables: np.ndarray, i: np.ndarray, j: np.ndarray, tx: np.ndarray, ty: np.ndarray
+) -> np.ndarray:
+    """Bilinearly interpolate one or more stacked tables at the same grid points.
+
+    Args:
+        tables (np.ndarray): Table with shape (n_azimuths, n_elevations), or stacked
+            tables with shape (n_tables, n_azimuths, n_elevations).
+        i (np.ndarray): Lower azimuth index of every point.
+        j (np.ndarray): Lower elevation index of every point.
+        tx (np.ndarray): Position between the azimuth grid points (0-1).
+        ty (np.ndarray): Position between the elevation grid points (0-1).
+
+    Returns:
+        np.ndarray: Interpolated values, with a leading table axis for stacked tables.
+    """
+    low = tables[..., i, j] * (1 - tx) + tables[..., i + 1, j] * tx
+    high = tables[..., i, j + 1] * (1 - tx) + tables[..., i + 1, j + 1] * tx
+    return low * (1 - ty) + high * ty
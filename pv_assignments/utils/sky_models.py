@@ -0,0 +1,224 @@
+"""Sky models for the diffuse irradiance on a tilted plane.
+
+Every model is a vectorized kernel with the same signature, so Panel and PanelArray
+can switch between them by name:
+
+- "isotropic": uniform sky, dhi * (1 + cos(tilt)) / 2.
+- "haydavies": Hay and Davies (1980), isotropic plus circumsolar brightening.
+- "reindl": Reindl et al. (1990), Hay-Davies plus horizon brightening.
+- "perez": Perez et al. (1990), circumsolar and horizon brightening from empirical
+  coefficients in eight sky clearness bins.
+
+The arguments broadcast, so the panel terms can be column vectors of shape
+(n_panels, 1) against sun terms of shape (n_timesteps,).
+"""
+
+# All kernels share one signature, so not every model uses every argument
+# ruff: noqa: ARG001
+
+from collections.abc import Callable
+
+import numpy as np
+
+from pv_assignments.utils.clear_sky import air_mass
+
+# Floor of cos(zenith) in the beam ratio, so it stays finite near the horizon
+_MIN_COS_ZENITH_HAY = np.cos(np.radians(89))
+_MIN_COS_ZENITH_PEREZ = np.cos(np.radians(85))
+
+# Perez (1990) "allsitescomposite1990" coefficients, one row per sky clearness bin:
+# f11, f12, f13, f21, f22, f23
+_PEREZ_COEFFICIENTS = np.array(
+    [
+        [-0.008, 0.588, -0.062, -0.060, 0.072, -0.022],
+        [0.130, 0.683, -0.151, -0.019, 0.066, -0.029],
+        [0.330, 0.487, -0.221, 0.055, -0.064, -0.026],
+        [0.568, 0.187, -0.295, 0.109, -0.152, -0.014],
+        [0.873, -0.392, -0.362, 0.226, -0.462, 0.001],
+        [1.132, -1.237, -0.412, 0.288, -0.823, 0.056],
+        [1.060, -1.600, -0.359, 0.264, -1.127, 0.131],
+        [0.678, -0.327, -0.250, 0.156, -1.377, 0.251],
+    ]
+)
+# Upper sky clearness of every bin but the last
+_PEREZ_EPSILON_EDGES = np.array([1.065, 1.23, 1.5, 1.95, 2.8, 4.5, 6.2])
+
+SkyModel = Callable[..., np.ndarray]
+
+
+def isotropic(
+    dhi: np.ndarray,
+    dni: np.ndarray,
+    cos_aoi: np.ndarray,
+    cos_zenith: np.ndarray,
+    zenith: np.ndarray,
+    cos_tilt: float | np.ndarray,
+    sin_tilt: float | np.ndarray,
+    dni_extra: float | np.ndarray,
+) -> np.ndarray:
+    """Calculate the diffuse irradiance on the plane with the isotropic model.
+
+    Args:
+        dhi (np.ndarray): Diffuse horizontal irradiance (W/m²).
+        dni (np.ndarray): Direct normal irradiance (W/m²).
+        cos_aoi (np.ndarray): Cosine of the angle of incidence.
+        cos_zenith (np.ndarray): Cosine of the sun's zenith angle.
+        zenith (np.ndarray): Zenith angle of the sun (degrees).
+        cos_tilt (float | np.ndarray): Cosine of the panel tilt.
+        sin_tilt (float | np.ndarray): Sine of the panel tilt.
+        dni_extra (float | np.ndarray): Extraterrestrial normal irradiance (W/m²).
+
+    Returns:
+        np.ndarray: Diffuse irradiance on the plane (W/m²).
+    """
+    return dhi * (1 + cos_tilt) / 2
+
+
+def _beam_ratio(
+    cos_aoi: np.ndarray, cos_zenith: np.ndarray, min_cos_zenith: float
+) -> np.ndarray:
+    """Ratio of beam irradiance on the plane to beam irradiance on the horizontal."""
+    return np.maximum(cos_aoi, 0) / np.maximum(cos_zenith, min_cos_zenith)
+
+
+def haydavies(
+    dhi: np.ndarray,
+    dni: np.ndarray,
+    cos_aoi: np.ndarray,
+    cos_zenith: np.ndarray,
+    zenith: np.ndarray,
+    cos_tilt: float | np.ndarray,
+    sin_tilt: float | np.ndarray,
+    dni_extra: float | np.ndarray,
+) -> np.ndarray:
+    """Calculate the diffuse irradiance on the plane with the Hay-Davies model.
+
+    Args:
+        dhi (np.ndarray): Diffuse horizontal irradiance (W/m²).
+        dni (np.ndarray): Direct normal irradiance (W/m²).
+        cos_aoi (np.ndarray): Cosine of the angle of incidence.
+        cos_zenith (np.ndarray): Cosine of the sun's zenith angle.
+        zenith (np.ndarray): Zenith angle of the sun (degrees).
+        cos_tilt (float | np.ndarray): Cosine of the panel tilt.
+        sin_tilt (float | np.ndarray): Sine of the panel tilt.
+        dni_extra (float | np.ndarray): Extraterrestrial normal irradiance (W/m²).
+
+    Returns:
+        np.ndarray: Diffuse irradiance on the plane (W/m²).
+    """
+    anisotropy = np.maximum(dni / dni_extra, 0)
+    beam_ratio = _beam_ratio(cos_aoi, cos_zenith, _MIN_COS_ZENITH_HAY)
+    return dhi * ((1 - anisotropy) * (1 + cos_tilt) / 2 + anisotropy * beam_ratio)
+
+
+def reindl(
+    dhi: np.ndarray,
+    dni: np.ndarray,
+    cos_aoi: np.ndarray,
+    cos_zenith: np.ndarray,
+    zenith: np.ndarray,
+    cos_tilt: float | np.ndarray,
+    sin_tilt: float | np.ndarray,
+    dni_extra: float | np.ndarray,
+) -> np.ndarray:
+    """Calculate the diffuse irradiance on the plane with the Reindl model.
+
+    Args:
+        dhi (np.ndarray): Diffuse horizontal irradiance (W/m²).
+        dni (np.ndarray): Direct normal irradiance (W/m²).
+        cos_aoi (np.ndarray): Cosine of the angle of incidence.
+        cos_zenith (np.ndarray): Cosine of the sun's zenith angle.
+        zenith (np.ndarray): Zenith angle of the sun (degrees).
+        cos_tilt (float | np.ndarray): Cosine of the panel tilt.
+        sin_tilt (float | np.ndarray): Sine of the panel tilt.
+        dni_extra (float | np.ndarray): Extraterrestrial normal irradiance (W/m²).
+
+    Returns:
+        np.ndarray: Diffuse irradiance on the plane (W/m²).
+    """
+    anisotropy = np.maximum(dni / dni_extra, 0)
+    beam_ratio = _beam_ratio(cos_aoi, cos_zenith, _MIN_COS_ZENITH_HAY)
+    beam_horizontal = np.maximum(dni * cos_zenith, 0)
+    ghi = dhi + beam_horizontal
+    with np.errstate(divide="ignore", invalid="ignore"):
+        horizon = np.where(ghi > 0, np.sqrt(beam_horizontal / ghi), 0.0)
+    # sin(tilt / 2) ** 2 = (1 - cos(tilt)) / 2
+    sin_half_tilt = np.sqrt((1 - cos_tilt) / 2)
+    return dhi * (
+        (1 - anisotropy) * (1 + cos_tilt) / 2 * (1 + horizon * sin_half_tilt**3)
+        + anisotropy * beam_ratio
+    )
+
+
+def perez(
+    dhi: np.ndarray,
+    dni: np.ndarray,
+    cos_aoi: np.ndarray,
+    cos_zenith: np.ndarray,
+    zenith: np.ndarray,
+    cos_tilt: float | np.ndarray,
+    sin_tilt: float | np.ndarray,
+    dni_extra: float | np.ndarray,
+) -> np.ndarray:
+    """Calculate the diffuse irradiance on the plane with the Perez model.
+
+    The coefficients of each timestep's sky clearness bin are gathered with
+    searchsorted and fancy indexing.
+
+    Args:
+        dhi (np.ndarray): Diffuse horizontal irradiance (W/m²).
+        dni (np.ndarray): Direct normal irradiance (W/m²).
+        cos_aoi (np.ndarray): Cosine of the angle of incidence.
+        cos_zenith (np.ndarray): Cosine of the sun's zenith angle.
+        zenith (np.ndarray): Zenith angle of the sun (degrees).
+        cos_tilt (float | np.ndarray): Cosine of the panel tilt.
+        sin_tilt (float | np.ndarray): Sine of the panel tilt.
+        dni_extra (float | np.ndarray): Extraterrestrial normal irradiance (W/m²).
+
+    Returns:
+        np.ndarray: Diffuse irradiance on the plane (W/m²), at least 0.
+    """
+    zenith_rad = np.radians(zenith)
+    kappa_z3 = 1.041 * zenith_rad**3
+    with np.errstate(divide="ignore", invalid="ignore"):
+        epsilon = ((dhi + dni) / dhi + kappa_z3) / (1 + kappa_z3)
+    # No diffuse light means no diffuse term, whichever bin is used
+    epsilon = np.where(dhi > 0, epsilon, 1.0)
+    delta = dhi * np.nan_to_num(air_mass(zenith), nan=0.0) / dni_extra
+
+    coefficients = _PEREZ_COEFFICIENTS[
+        np.searchsorted(_PEREZ_EPSILON_EDGES, epsilon, side="right")
+    ]
+    f11, f12, f13, f21, f22, f23 = np.moveaxis(coefficients, -1, 0)
+    f1 = np.maximum(f11 + f12 * delta + f13 * zenith_rad, 0)
+    f2 = f21 + f22 * delta + f23 * zenith_rad
+
+    beam_ratio = _beam_ratio(cos_aoi, cos_zenith, _MIN_COS_ZENITH_PEREZ)
+    # Near the horizon f1 can exceed 1 and the negative horizon term f2 can exceed
+    # the sky dome term, which would give a negative irradiance
+    return np.maximum(
+        dhi * ((1 - f1) * (1 + cos_tilt) / 2 + f1 * beam_ratio + f2 * sin_tilt), 0
+    )
+
+
+SKY_MODELS: dict[str, SkyModel] = {
+    "isotropic": isotropic,
+    "haydavies": haydavies,
+    "reindl": reindl,
+    "perez": perez,
+}
+
+
+def get_sky_model(name: str) -> SkyModel:
+    """Look up a sky model kernel by name.
+
+    Args:
+        name (str): One of "isotropic", "haydavies", "reindl" or "perez".
+
+    Returns:
+        SkyModel: The kernel.
+    """
+    try:
+        return SKY_MODELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown sky model: {name}") from None
@@ -0,0 +1,223 @@
+"""Vectorized solar position, so irradiance files don't need precomputed angles.
+
+Two methods are available:
+
+- "noaa": the NOAA solar calculator algorithm (after Meeus, Astronomical Algorithms),
+  accurate to about 0.01 degrees for the years 1800-2100, with atmospheric refraction.
+- "approximate": Spencer's (1971) Fourier series for the declination and equation
+  of time, accurate to about 0.5 degrees, but cheaper.
+
+Azimuths are returned in the south convention used by Panel: East=-90, West=90,
+North=+-180, South=0.
+"""
+
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+
+def _seconds_since_epoch(times: pd.DatetimeIndex) -> np.ndarray:
+    """Seconds since 1970-01-01 UTC. Naive timestamps are taken to be UTC."""
+    if times.tz is not None:
+        times = times.tz_convert("UTC").tz_localize(None)
+    return times.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+
+
+def _noaa(seconds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Declination (radians) and equation of time (minutes) with the NOAA algorithm."""
+    julian_century = (seconds / 86400 + 2440587.5 - 2451545) / 36525
+    jc = julian_century
+
+    mean_longitude = np.radians((280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360)
+    mean_anomaly = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+    eccentricity = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+    center = (
+        np.sin(mean_anomaly) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + np.sin(2 * mean_anomaly) * (0.019993 - 0.000101 * jc)
+        + np.sin(3 * mean_anomaly) * 0.000289
+    )
+    omega = np.radians(125.04 - 1934.136 * jc)
+    apparent_longitude = np.radians(
+        np.degrees(mean_longitude) + center - 0.00569 - 0.00478 * np.sin(omega)
+    )
+    mean_obliquity = (
+        23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+    )
+    obliquity = np.radians(mean_obliquity + 0.00256 * np.cos(omega))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(apparent_longitude))
+
+    y = np.tan(obliquity / 2) ** 2
+    equation_of_time = 4 * np.degrees(
+        y * np.sin(2 * mean_longitude)
+        - 2 * eccentricity * np.sin(mean_anomaly)
+        + 4 * eccentricity * y * np.sin(mean_anomaly) * np.cos(2 * mean_longitude)
+        - 0.5 * y**2 * np.sin(4 * mean_longitude)
+        - 1.25 * eccentricity**2 * np.sin(2 * mean_anomaly)
+    )
+    return declination, equation_of_time
+
+
+def _spencer(seconds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Declination (radians) and equation of time (minutes) with Spencer's series."""
+    days = seconds.astype("datetime64[s]").astype("datetime64[D]")
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(float) + 1
+    day_angle = 2 * np.pi * (day_of_year - 1) / 365
+    declination = (
+        0.006918
+        - 0.399912 * np.cos(day_angle)
+        + 0.070257 * np.sin(day_angle)
+        - 0.006758 * np.cos(2 * day_angle)
+        + 0.000907 * np.sin(2 * day_angle)
+        - 0.002697 * np.cos(3 * day_angle)
+        + 0.00148 * np.sin(3 * day_angle)
+    )
+    equation_of_time = 229.18 * (
+        0.000075
+        + 0.001868 * np.cos(day_angle)
+        - 0.032077 * np.sin(day_angle)
+        - 0.014615 * np.cos(2 * day_angle)
+        - 0.040849 * np.sin(2 * day_angle)
+    )
+    return declination, equation_of_time
+
+
+def _refraction(elevation: np.ndarray) -> np.ndarray:
+    """Atmospheric refraction correction (degrees) of the NOAA solar calculator."""
+    arcsec = np.zeros_like(elevation)
+
+    mid = (elevation > 5) & (elevation <= 85)
+    inv_tan = 1 / np.tan(np.radians(elevation[mid]))
+    inv_tan_sq = inv_tan * inv_tan
+    arcsec[mid] = inv_tan * (58.1 + inv_tan_sq * (-0.07 + inv_tan_sq * 0.000086))
+
+    low = (elevation > -0.575) & (elevation <= 5)
+    e = elevation[low]
+    arcsec[low] = 1735 + e * (-518.2 + e * (103.4 + e * (-12.79 + e * 0.711)))
+
+    below = elevation <= -0.575
+    arcsec[below] = -20.772 / np.tan(np.radians(elevation[below]))
+    return arcsec / 3600
+
+
+_SUN_TERMS = {"noaa": _noaa, "approximate": _spencer}
+
+# Spacing (seconds) of the grid the declination and equation of time are evaluated on
+_GRID_SECONDS = 3600
+
+
+def _interpolated_sun_terms(
+    seconds: np.ndarray, method: str
+) -> tuple[np.ndarray, np.ndarray]:
+    """Declination (radians) and equation of time (minutes) for every timestamp.
+
+    Both change slowly, so they are evaluated on an hourly grid and interpolated,
+    which is far below the accuracy of either method.
+    """
+    grid = np.arange(
+        np.floor(seconds.min() / _GRID_SECONDS) * _GRID_SECONDS,
+        seconds.max() + 2 * _GRID_SECONDS,
+        _GRID_SECONDS,
+    )
+    grid_declination, grid_equation_of_time = _SUN_TERMS[method](grid)
+    return (
+        np.interp(seconds, grid, grid_declination),
+        np.interp(seconds, grid, grid_equation_of_time),
+    )
+
+
+def apparent_solar_time(
+    times: pd.DatetimeIndex | pd.Series,
+    longitude: float,
+    method: Literal["noaa", "approximate"] = "noaa",
+) -> np.ndarray:
+    """Calculate the apparent (true) solar time.
+
+    Args:
+        times (pd.DatetimeIndex | pd.Series): Timestamps. Naive timestamps are taken to be UTC.
+        longitude (float): Longitude of the site (degrees, east positive).
+        method ("noaa" | "approximate", optional): Algorithm to use. Defaults to "noaa".
+
+    Returns:
+        np.ndarray: Apparent solar time (hours, 0-24).
+    """
+    seconds = _seconds_since_epoch(pd.DatetimeIndex(times))
+    _, equation_of_time = _interpolated_sun_terms(seconds, method)
+    return (seconds % 86400 / 60 + equation_of_time + 4 * longitude) % 1440 / 60
+
+
+def solar_position(
+    times: pd.DatetimeIndex | pd.Series,
+    latitude: float,
+    longitude: float,
+    method: Literal["noaa", "approximate"] = "noaa",
+    refraction: bool = True,
+) -> pd.DataFrame:
+    """Calculate the position of the sun for every timestamp.
+
+    Args:
+        times (pd.DatetimeIndex | pd.Series): Timestamps. Naive timestamps are taken to be UTC.
+        latitude (float): Latitude of the site (degrees, north positive).
+        longitude (float): Longitude of the site (degrees, east positive).
+        method ("noaa" | "approximate", optional): Algorithm to use. Defaults to "noaa".
+        refraction (bool, optional): Whether to correct the elevation for atmospheric
+            refraction. Only used by the "noaa" method. Defaults to True.
+
+    Returns:
+        pd.DataFrame: "Zenith", "Elevation" and "Azimuth" (south convention) in degrees,
+            indexed by the timestamps.
+    """
+    if method not in _SUN_TERMS:
+        raise ValueError(f"Unknown solar position method: {method}")
+    times = pd.DatetimeIndex(times)
+    seconds = _seconds_since_epoch(times)
+
+    declination, equation_of_time = _interpolated_sun_terms(seconds, method)
+
+    true_solar_time = (seconds % 86400 / 60 + equation_of_time + 4 * longitude) % 1440
+    hour_angle = np.radians(true_solar_time / 4 - 180)
+
+    lat = np.radians(latitude)
+    cos_zenith = np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(
+        declination
+    ) * np.cos(hour_angle)
+    elevation = 90 - np.degrees(np.arccos(np.clip(cos_zenith, -1, 1)))
+    if refraction and method == "noaa":
+        elevation += _refraction(elevation)
+    azimuth = np.degrees(
+        np.arctan2(
+            np.sin(hour_angle),
+            np.cos(hour_angle) * np.sin(lat) - np.tan(declination) * np.cos(lat),
+        )
+    )
+    return pd.DataFrame(
+        {"Zenith": 90 - elevation, "Elevation": elevation, "Azimuth": azimuth},
+        index=times,
+    )
+
+
+def add_solar_position(
+    df: pd.DataFrame,
+    latitude: float,
+    longitude: float,
+    method: Literal["noaa", "approximate"] = "noaa",
+) -> pd.DataFrame:
+    """Return a copy of an irradiance DataFrame with the sun's position added.
+
+    The result has the "Azimuth" and "Zenith" columns required by
+    Panel.calculate_daily_insolation and Panel.calculate_monthly_insolation.
+
+    Args:
+        df (pd.DataFrame): DataFrame with a "DateTime" column.
+        latitude (float): Latitude of the site (degrees, north positive).
+        longitude (float): Longitude of the site (degrees, east positive).
+        method ("noaa" | "approximate", optional): Algorithm to use. Defaults to "noaa".
+
+    Returns:
+        pd.DataFrame: Copy of the DataFrame with "Azimuth" and "Zenith" columns.
+    """
+    position = solar_position(df["DateTime"], latitude, longitude, method=method)
+    df = df.copy()
+    df["Azimuth"] = position["Azimuth"].to_numpy()
+    df["Zenith"] = position["Zenith"].to_numpy()
+    return df
@@ -0,0 +1,233 @@
+"""Typical meteorological year (TMY) from a multi-year irradiance archive.
+
+For every calendar month the candidate months of all years are compared with the
+long-term distribution of daily GHI and DNI by the Finkelstein-Schafer (FS)
+statistic, the mean absolute difference between the candidate's empirical CDF and
+the long-term CDF. The candidate with the lowest weighted FS statistic is picked,
+as in the Sandia method, and the twelve picked months are stitched into one year.
+
+The empirical CDFs are evaluated with sorted arrays and np.searchsorted, so all
+candidates of a month are scored together.
+"""
+
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.assignment_1.data.part_2_loader import load_data
+
+# Default weights of the daily sums in the weighted FS statistic
+DEFAULT_WEIGHTS = {"GHI": 0.5, "DNI": 0.5}
+
+
+@dataclass
+class TypicalYear:
+    """Result of a TMY selection.
+
+    Attributes:
+        data (pd.DataFrame): The stitched year with all columns of the archive and
+            the timestamps moved to the TMY's year.
+        years (pd.Series): Year picked for each calendar month, indexed by month.
+        statistics (pd.DataFrame): Weighted FS statistic of every candidate,
+            indexed by year with one column per month. NaN for months without
+            enough data.
+    """
+
+    data: pd.DataFrame
+    years: pd.Series
+    statistics: pd.DataFrame
+
+
+def load_archive(paths: Iterable[str | os.PathLike], **kwargs: object) -> pd.DataFrame:
+    """Load and concatenate irradiance files with the schema of the part 2 file.
+
+    Args:
+        paths (Iterable[str | os.PathLike]): CSV files, for example one per year.
+        **kwargs (object): Options of part_2_loader.load_data.
+
+    Returns:
+        pd.DataFrame: The data of all files in chronological order. Timestamps
+            present in several files are kept once.
+    """
+    df = pd.concat([load_data(path, **kwargs) for path in paths], ignore_index=True)
+    df = df.sort_values("DateTime", kind="stable")
+    return df.drop_duplicates("DateTime").reset_index(drop=True)
+
+
+def daily_means(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """Mean irradiance of every day.
+
+    Missing values count as 0, as at night in the part 2 file.
+
+    Args:
+        df (pd.DataFrame): Irradiance data with a "DateTime" column.
+        columns (list[str]): Columns to average.
+
+    Returns:
+        pd.DataFrame: "Year", "Month" and one column per averaged column, one row
+            per day in chronological order.
+    """
+    date_time = pd.DatetimeIndex(df["DateTime"])
+    day_codes = (
+        date_time.year.to_numpy() * 10_000
+        + date_time.month.to_numpy() * 100
+        + date_time.day.to_numpy()
+    )
+    days, day_index = np.unique(day_codes, return_inverse=True)
+    counts = np.bincount(day_index, minlength=len(days))
+    data = {"Year": days // 10_000, "Month": days // 100 % 100}
+    for column in columns:
+        values = np.nan_to_num(df[column].to_numpy(dtype=float), nan=0.0)
+        data[column] = np.bincount(day_index, weights=values, minlength=len(days))
+        data[column] /= counts
+    return pd.DataFrame(data)
+
+
+def finkelstein_schafer(
+    values: np.ndarray, groups: np.ndarray, n_groups: int
+) -> np.ndarray:
+    """FS statistic of every group of values against all values together.
+
+    Both CDFs are the fraction of values <= x, so tied values get the same CDF.
+
+    Args:
+        values (np.ndarray): Daily values of one calendar month over all years.
+        groups (np.ndarray): Candidate (0 to n_groups - 1) of each value.
+        n_groups (int): Number of candidates.
+
+    Returns:
+        np.ndarray: FS statistic per candidate. NaN for candidates without values.
+    """
+    long_term = np.sort(values)
+    long_term_cdf = np.searchsorted(long_term, values, side="right") / len(values)
+
+    # Number of values of the same candidate <= every value, from one sort by
+    # (candidate, value): the position of the last of its ties, relative to the
+    # start of the candidate
+    order = np.lexsort((values, groups))
+    sorted_groups, sorted_values = groups[order], values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    position = np.arange(len(values))
+    last_tie = np.append(
+        (sorted_groups[1:] != sorted_groups[:-1])
+        | (sorted_values[1:] != sorted_values[:-1]),
+        True,
+    )
+    # Reversed running minimum: the next position that ends a run of ties
+    tie_end = np.where(last_tie, position, len(values))
+    tie_end = np.minimum.accumulate(tie_end[::-1])[::-1]
+    at_most = np.empty(len(values))
+    at_most[order] = tie_end + 1 - starts[sorted_groups]
+    candidate_cdf = at_most / counts[groups]
+
+    with np.errstate(invalid="ignore"):
+        return (
+            np.bincount(
+                groups,
+                weights=np.abs(candidate_cdf - long_term_cdf),
+                minlength=n_groups,
+            )
+            / counts
+        )
+
+
+def _shift_year(date_time: pd.Series, years: int) -> pd.Series:
+    """Move timestamps by a whole number of years, keeping the wall clock time.
+
+    The DST changes of a time zone fall on other dates in other years, so tz-aware
+    timestamps are shifted on the naive wall clock and localized again. Wall clock
+    times that are ambiguous in the new year keep the UTC offset they had, and those
+    that do not exist in it become NaT.
+    """
+    if years == 0:
+        return date_time
+    if date_time.dt.tz is None:
+        return date_time + pd.DateOffset(years=years)
+    wall_clock = date_time.dt.tz_localize(None)
+    # Of the two offsets around a DST change the larger one is the summer time
+    utc_offset = wall_clock - date_time.dt.tz_convert(None)
+    return (wall_clock + pd.DateOffset(years=years)).dt.tz_localize(
+        date_time.dt.tz,
+        ambiguous=(utc_offset > utc_offset.min()).to_numpy(),
+        nonexistent="NaT",
+    )
+
+
+def build_tmy(
+    df: pd.DataFrame,
+    weights: dict[str, float] | None = None,
+    year: int = 2023,
+    min_coverage: float = 0.9,
+) -> TypicalYear:
+    """Build a typical meteorological year.
+
+    The sun angle columns are stitched with the irradiance they were measured
+    with, so the result can be passed to Panel.calculate_monthly_insolation
+    directly. They differ from the angles of the TMY's own dates by a few tenths of
+    a degree at most.
+
+    Args:
+        df (pd.DataFrame): Irradiance data of several years with a "DateTime"
+            column and the weighted columns, for example from load_archive.
+        weights (dict[str, float] | None, optional): Weight of the daily mean of each
+            column in the FS statistic. If None, DEFAULT_WEIGHTS is used.
+            Defaults to None.
+        year (int, optional): Year the timestamps of the TMY are moved to. Leap days
+            are dropped if it is not a leap year. Defaults to 2023.
+        min_coverage (float, optional): Least fraction of the days of a month with
+            data for it to be a candidate. Defaults to 0.9.
+
+    Returns:
+        TypicalYear: The stitched year, the picked years and the FS statistics.
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    daily = daily_means(df, list(weights))
+    all_years = np.unique(daily["Year"].to_numpy())
+    year_index = np.searchsorted(all_years, daily["Year"].to_numpy())
+    months = daily["Month"].to_numpy()
+
+    statistics = np.full((len(all_years), 12), np.nan)
+    for month in range(1, 13):
+        in_month = months == month
+        if not in_month.any():
+            raise ValueError(f"The data has no days in month {month}")
+        groups = year_index[in_month]
+        score = np.zeros(len(all_years))
+        for column, weight in weights.items():
+            values = daily[column].to_numpy()[in_month]
+            score += weight * finkelstein_schafer(values, groups, len(all_years))
+
+        days_in_month = pd.PeriodIndex.from_fields(
+            year=all_years, month=np.full(len(all_years), month), freq="M"
+        ).days_in_month.to_numpy()
+        coverage = np.bincount(groups, minlength=len(all_years)) / days_in_month
+        statistics[:, month - 1] = np.where(coverage >= min_coverage, score, np.nan)
+
+    if np.isnan(statistics).all(axis=0).any():
+        raise ValueError("Some months have no year with enough data")
+    picked = all_years[np.nanargmin(statistics, axis=0)]
+
+    date_time = pd.DatetimeIndex(df["DateTime"])
+    parts = []
+    for month, picked_year in enumerate(picked, start=1):
+        part = df[(date_time.year == picked_year) & (date_time.month == month)].copy()
+        part["DateTime"] = _shift_year(part["DateTime"], year - picked_year)
+        # DateOffset moves Feb 29 to Feb 28 in common years, where it is dropped,
+        # like the NaT of wall clock times that do not exist in the new year
+        part = part[pd.DatetimeIndex(part["DateTime"]).month == month]
+        parts.append(part.drop_duplicates("DateTime"))
+    data = pd.concat(parts, ignore_index=True)
+
+    return TypicalYear(
+        data=data,
+        years=pd.Series(picked, index=pd.RangeIndex(1, 13, name="Month"), name="Year"),
+        statistics=pd.DataFrame(
+            statistics,
+            index=pd.Index(all_years, name="Year"),
+            columns=pd.RangeIndex(1, 13, name="Month"),
+        ),
+    )
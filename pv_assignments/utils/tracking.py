@@ -0,0 +1,238 @@
+"""Solar trackers that give the panel orientation for every timestep.
+
+Every tracker computes the surface azimuth and tilt for a whole series in one
+vectorized call. The result is a Panel with per-timestep orientation arrays, which
+goes through the same AOI and GPOA formulas as a fixed panel.
+
+Azimuths use the south convention of Panel: East=-90, West=90, North=+-180, South=0.
+At night the trackers stow flat.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from pv_assignments.utils.panel_irradiation import Panel
+
+
+def _south(azimuth: np.ndarray) -> np.ndarray:
+    """Wrap azimuths (degrees) to the range [-180, 180)."""
+    return (azimuth + 180) % 360 - 180
+
+
+class Tracker(ABC):
+    """Base class of the trackers."""
+
+    @abstractmethod
+    def orientation(
+        self, azimuth_sun: float | np.ndarray, zenith_sun: float | np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Calculate the surface orientation for every sun position.
+
+        Args:
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun (degrees).
+            zenith_sun (float | np.ndarray): Zenith angle of the sun (degrees).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Surface azimuth and tilt (degrees).
+        """
+
+    def panel(
+        self,
+        azimuth_sun: float | np.ndarray,
+        zenith_sun: float | np.ndarray,
+        rho_g: float = 0.2,
+        sky_model: str = "isotropic",
+    ) -> Panel:
+        """Create a panel that follows the tracker over the given sun positions.
+
+        Args:
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun (degrees).
+            zenith_sun (float | np.ndarray): Zenith angle of the sun (degrees).
+            rho_g (float, optional): Ground reflectance. Defaults to 0.2.
+            sky_model (str, optional): Diffuse sky model. Defaults to "isotropic".
+
+        Returns:
+            Panel: Panel with one azimuth and tilt per sun position. Its methods must be
+                called with the same sun positions, e.g. the same DataFrame.
+        """
+        azimuth, tilt = self.orientation(azimuth_sun, zenith_sun)
+        return Panel(azimuth=azimuth, tilt=tilt, rho_g=rho_g, sky_model=sky_model)
+
+
+class SingleAxisTracker(Tracker):
+    """Single-axis tracker, horizontal or tilted, with optional backtracking.
+
+    The panel rotates about an axis in the plane of the panel to minimize the angle
+    of incidence. With backtracking, the rotation is reduced at low sun so that the
+    rows do not shade each other.
+    """
+
+    def __init__(
+        self,
+        axis_tilt: float = 0.0,
+        axis_azimuth: float = 0.0,
+        max_angle: float = 60.0,
+        backtrack: bool = True,
+        gcr: float = 2 / 7,
+    ) -> None:
+        """Initialize the tracker.
+
+        Args:
+            axis_tilt (float, optional): Tilt of the rotation axis from the horizontal
+                (degrees). 0 is a horizontal single-axis tracker. Defaults to 0.
+            axis_azimuth (float, optional): Direction the rotation axis points in,
+                towards its lower end (degrees, south convention). 0 is a north-south
+                axis. Defaults to 0.
+            max_angle (float, optional): Largest rotation from the flat position
+                (degrees). Defaults to 60.
+            backtrack (bool, optional): Whether to backtrack to avoid row-to-row
+                shading. Defaults to True.
+            gcr (float, optional): Ground coverage ratio, the collector width divided by
+                the row pitch. Defaults to 2/7.
+        """
+        if not 0 < gcr <= 1:
+            raise ValueError("gcr must be in (0, 1]")
+        self.axis_tilt = axis_tilt
+        self.axis_azimuth = axis_azimuth
+        self.max_angle = max_angle
+        self.backtrack = backtrack
+        self.gcr = gcr
+
+    def _rotation_sin_cos(
+        self, azimuth_sun: float | np.ndarray, zenith_sun: float | np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Sine and cosine of the rotation angle.
+
+        The rotation is carried as a (sin, cos) pair through backtracking and the
+        rotation limit, so no trigonometric functions are evaluated after the sun
+        vector.
+        """
+        zenith_sun = np.asarray(zenith_sun, dtype=float)
+        zenith_rad = np.radians(zenith_sun)
+        # Sun azimuth relative to the axis direction
+        relative_azimuth = np.radians(
+            np.asarray(azimuth_sun, dtype=float) - self.axis_azimuth
+        )
+
+        # Sun vector in the tracker frame: x to the right of the axis, z normal to the
+        # panel at rotation 0. The ideal rotation is atan2(x_axis, z_axis).
+        axis_tilt = np.radians(self.axis_tilt)
+        sin_zenith = np.sin(zenith_rad)
+        x_axis = sin_zenith * np.sin(relative_azimuth)
+        z_axis = sin_zenith * np.cos(relative_azimuth)
+        z_axis *= np.sin(axis_tilt)
+        z_axis += np.cos(zenith_rad) * np.cos(axis_tilt)
+        # With the sun along the axis any rotation is ideal, and 0 is used
+        norm = np.hypot(x_axis, z_axis)
+        along_axis = norm == 0
+        norm = np.where(along_axis, 1.0, norm)
+        sin_rotation = x_axis / norm
+        cos_rotation = np.where(along_axis, 1.0, z_axis / norm)
+
+        if self.backtrack:
+            # Rows shade each other once |cos(ideal)| < gcr, so the rotation is
+            # reduced by arccos(|cos(ideal)| / gcr) until the shadow just reaches
+            # the next row
+            ratio = np.abs(cos_rotation) / self.gcr
+            backtracking = ratio < 1
+            cos_correction = np.minimum(ratio, 1)
+            sin_correction = -np.sign(sin_rotation) * np.sqrt(1 - cos_correction**2)
+            sin_rotation, cos_rotation = (
+                np.where(
+                    backtracking,
+                    sin_rotation * cos_correction + cos_rotation * sin_correction,
+                    sin_rotation,
+                ),
+                np.where(
+                    backtracking,
+                    cos_rotation * cos_correction - sin_rotation * sin_correction,
+                    cos_rotation,
+                ),
+            )
+
+        # |rotation| > max_angle exactly when cos(rotation) < cos(max_angle)
+        max_angle = np.radians(self.max_angle)
+        limited = cos_rotation < np.cos(max_angle)
+        sin_rotation = np.where(
+            limited, np.sign(sin_rotation) * np.sin(max_angle), sin_rotation
+        )
+        cos_rotation = np.where(limited, np.cos(max_angle), cos_rotation)
+
+        day = zenith_sun < 90
+        return np.where(day, sin_rotation, 0.0), np.where(day, cos_rotation, 1.0)
+
+    def rotation(
+        self, azimuth_sun: float | np.ndarray, zenith_sun: float | np.ndarray
+    ) -> np.ndarray:
+        """Calculate the rotation angle of the tracker.
+
+        Args:
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun (degrees).
+            zenith_sun (float | np.ndarray): Zenith angle of the sun (degrees).
+
+        Returns:
+            np.ndarray: Rotation from the flat position (degrees), positive when the
+                panel faces the right of the axis direction (west for a south
+                pointing axis). 0 with the sun below the horizon.
+        """
+        sin_rotation, cos_rotation = self._rotation_sin_cos(azimuth_sun, zenith_sun)
+        return np.degrees(np.arctan2(sin_rotation, cos_rotation))
+
+    def orientation(
+        self, azimuth_sun: float | np.ndarray, zenith_sun: float | np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Calculate the surface orientation for every sun position.
+
+        Args:
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun (degrees).
+            zenith_sun (float | np.ndarray): Zenith angle of the sun (degrees).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Surface azimuth and tilt (degrees).
+        """
+        sin_rotation, cos_rotation = self._rotation_sin_cos(azimuth_sun, zenith_sun)
+        axis_tilt = np.radians(self.axis_tilt)
+
+        # Surface normal of the rotated panel: x to the right of the axis, y along
+        # the horizontal axis direction and z up
+        x = sin_rotation
+        y = cos_rotation * np.sin(axis_tilt)
+        z = cos_rotation * np.cos(axis_tilt)
+        tilt = np.degrees(np.arccos(np.clip(z, -1, 1)))
+        azimuth = self.axis_azimuth + np.degrees(np.arctan2(x, y))
+        # A flat panel has no azimuth, use the axis direction
+        azimuth = np.where(np.hypot(x, y) > 1e-12, azimuth, self.axis_azimuth)
+        return _south(azimuth), tilt
+
+
+class DualAxisTracker(Tracker):
+    """Dual-axis tracker that points the panel at the sun."""
+
+    def __init__(self, max_tilt: float = 90.0) -> None:
+        """Initialize the tracker.
+
+        Args:
+            max_tilt (float, optional): Largest tilt the tracker can reach (degrees).
+                Defaults to 90.
+        """
+        self.max_tilt = max_tilt
+
+    def orientation(
+        self, azimuth_sun: float | np.ndarray, zenith_sun: float | np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Calculate the surface orientation for every sun position.
+
+        Args:
+            azimuth_sun (float | np.ndarray): Azimuth angle of the sun (degrees).
+            zenith_sun (float | np.ndarray): Zenith angle of the sun (degrees).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Surface azimuth and tilt (degrees).
+        """
+        azimuth_sun = np.asarray(azimuth_sun, dtype=float)
+        zenith_sun = np.asarray(zenith_sun, dtype=float)
+        day = zenith_sun < 90
+        tilt = np.where(day, np.minimum(zenith_sun, self.max_tilt), 0.0)
+        azimuth = np.where(day, _south(azimuth_sun), 0.0)
+        return azimuth, tilt
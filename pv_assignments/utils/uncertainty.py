@@ -0,0 +1,278 @@
+"""Monte Carlo uncertainty of the insolation on a panel.
+
+Every sample draws a ground reflectance, a relative bias of the DHI and DNI sensors
+and an orientation error of the panel. All samples are evaluated as one PanelArray
+over the whole time series, in chunks of samples sized to a memory budget, and the
+chunks can be spread over a process pool.
+
+The results are given as exceedance levels: P90 is the value that is exceeded by
+90% of the samples, i.e. the 10th percentile.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.panel_irradiation import (
+    Panel,
+    PanelArray,
+    _dni_extra,
+    mean_annual_insolation,
+)
+
+# About the number of float64 arrays of shape (n_samples, n_timesteps) alive at once
+# while a chunk is evaluated, measured for the Perez model
+_ARRAYS_PER_SAMPLE = 16
+
+# State of a worker process, set once by _init_worker
+_worker: dict = {}
+
+
+@dataclass
+class InsolationEnsemble:
+    """Result of a Monte Carlo ensemble.
+
+    Attributes:
+        monthly (pd.DataFrame): Monthly insolation (mean daily insolation, Wh/m²) with
+            a "DateTime" column and one column per exceedance level, e.g. "P90".
+        annual (pd.Series): Annual insolation (Wh/m²) per exceedance level.
+        transposition_factor (pd.Series): Annual insolation on the panel over the
+            annual insolation on a horizontal surface, per exceedance level.
+        samples (pd.DataFrame): Parameters, annual insolation and transposition
+            factor of every sample.
+    """
+
+    monthly: pd.DataFrame
+    annual: pd.Series
+    transposition_factor: pd.Series
+    samples: pd.DataFrame
+
+
+def exceedance_levels(values: np.ndarray, levels: tuple[int, ...]) -> np.ndarray:
+    """Values exceeded by the given percentages of the samples.
+
+    Args:
+        values (np.ndarray): Samples along the first axis.
+        levels (tuple[int, ...]): Exceedance probabilities (%), e.g. (50, 90).
+
+    Returns:
+        np.ndarray: One row per level.
+    """
+    return np.percentile(values, [100 - level for level in levels], axis=0)
+
+
+def _group_starts(keys: np.ndarray) -> np.ndarray:
+    """Indices where a sorted array of keys changes value, starting with 0."""
+    return np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+
+
+def _annual(daily: np.ndarray, days: pd.DatetimeIndex) -> np.ndarray:
+    """Mean annual insolation of every row of a (n_rows, n_days) daily insolation."""
+    df_daily = pd.DataFrame(
+        daily.T, columns=[f"Insolation_{i}" for i in range(len(daily))]
+    )
+    df_daily.insert(0, "DateTime", days)
+    return mean_annual_insolation(df_daily).to_numpy()
+
+
+def _init_worker(inputs: dict) -> None:
+    """Keep the time series of the ensemble in a worker process."""
+    _worker.update(inputs)
+
+
+def _evaluate(parameters: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Monthly and annual insolation of a chunk of samples.
+
+    Args:
+        parameters (np.ndarray): Azimuth, tilt, rho_g, DHI bias and DNI bias of every
+            sample, shape (5, n_samples).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Monthly insolation with shape
+            (n_samples, n_months) and annual insolation with shape (n_samples,).
+    """
+    azimuths, tilts, rho_gs, dhi_bias, dni_bias = parameters
+    shading = _worker["shading"]
+    panels = PanelArray(
+        azimuths,
+        tilts,
+        rho_gs,
+        sky_model=_worker["sky_model"],
+        shading=None if shading is None else [shading] * len(azimuths),
+    )
+    gpoa = panels.calculate_gpoa(
+        dhi=dhi_bias[:, None] * _worker["dhi"],
+        dni=dni_bias[:, None] * _worker["dni"],
+        azimuth_sun=_worker["azimuth_sun"],
+        zenith_sun=_worker["zenith_sun"],
+        dni_extra=_worker["dni_extra"],
+    )
+    np.nan_to_num(gpoa, copy=False, nan=0.0)
+    # Same as the daily mean * 24 and the monthly mean of Panel's insolation methods
+    daily = np.add.reduceat(gpoa, _worker["day_starts"], axis=1)
+    daily *= 24 / _worker["samples_per_day"]
+    monthly = np.add.reduceat(daily, _worker["month_starts"], axis=1)
+    monthly /= _worker["days_per_month"]
+    return monthly, _annual(daily, _worker["days"])
+
+
+def insolation_ensemble(
+    panel: Panel,
+    df: pd.DataFrame,
+    n_samples: int = 1000,
+    rho_g_std: float = 0.05,
+    dhi_bias_std: float = 0.05,
+    dni_bias_std: float = 0.03,
+    azimuth_std: float = 2.0,
+    tilt_std: float = 1.0,
+    levels: tuple[int, ...] = (50, 90),
+    max_bytes: int = 256 * 2**20,
+    workers: int | None = 1,
+    seed: int | None = 0,
+) -> InsolationEnsemble:
+    """Run a Monte Carlo ensemble of the monthly and annual insolation on a panel.
+
+    All parameters are drawn from normal distributions around the panel's own
+    values. The sensor biases are relative and the same for every timestep of a
+    sample, as for a miscalibrated sensor.
+
+    Args:
+        panel (Panel): Panel with the nominal orientation, ground reflectance and sky
+            model. Its azimuth and tilt must be scalars.
+        df (pd.DataFrame): DataFrame containing the irradiance data.
+            Required columns: "DateTime", "DHI", "DNI", "Azimuth", "Zenith".
+            where Zenith and Azimuth are the sun's position at the given DateTime.
+        n_samples (int, optional): Number of samples. Defaults to 1000.
+        rho_g_std (float, optional): Standard deviation of the ground reflectance,
+            which is clipped to [0, 1]. Defaults to 0.05.
+        dhi_bias_std (float, optional): Standard deviation of the relative DHI bias.
+            Defaults to 0.05.
+        dni_bias_std (float, optional): Standard deviation of the relative DNI bias.
+            Defaults to 0.03.
+        azimuth_std (float, optional): Standard deviation of the azimuth (degrees).
+            Defaults to 2.
+        tilt_std (float, optional): Standard deviation of the tilt (degrees).
+            Defaults to 1.
+        levels (tuple[int, ...], optional): Exceedance levels to report (%).
+            Defaults to (50, 90).
+        max_bytes (int, optional): Memory budget of a chunk of samples (bytes).
+            Defaults to 256 MiB.
+        workers (int | None, optional): Number of worker processes. 1 evaluates all
+            chunks in this process. If None, all cores are used. Defaults to 1.
+        seed (int | None, optional): Seed of the samples. Defaults to 0.
+
+    Returns:
+        InsolationEnsemble: Exceedance levels of the monthly and annual insolation
+            and of the transposition factor, and the samples.
+    """
+    if np.ndim(panel.azimuth) or np.ndim(panel.tilt):
+        raise ValueError("Ensembles need a panel with a fixed orientation")
+    if panel.shading is not None and (azimuth_std or tilt_std):
+        raise ValueError(
+            "A shading table is only valid for one orientation, "
+            "so the orientation must not vary"
+        )
+
+    rng = np.random.default_rng(seed)
+    azimuths = panel.azimuth + rng.normal(0, azimuth_std, n_samples)
+    tilts = panel.tilt + rng.normal(0, tilt_std, n_samples)
+    # A negative tilt is the same plane facing the other way
+    azimuths = np.where(tilts < 0, azimuths + 180, azimuths)
+    azimuths = (azimuths + 180) % 360 - 180
+    tilts = np.abs(tilts)
+    rho_gs = np.clip(panel.rho_g + rng.normal(0, rho_g_std, n_samples), 0, 1)
+    dhi_bias = np.maximum(1 + rng.normal(0, dhi_bias_std, n_samples), 0)
+    dni_bias = np.maximum(1 + rng.normal(0, dni_bias_std, n_samples), 0)
+    parameters = np.stack([azimuths, tilts, rho_gs, dhi_bias, dni_bias])
+
+    df = df.sort_values("DateTime", kind="stable")
+    date_time = df["DateTime"]
+    if date_time.dt.tz is not None:
+        # Days in local time, like resample("D") on a tz-aware column
+        date_time = date_time.dt.tz_localize(None)
+    days = date_time.to_numpy().astype("datetime64[D]")
+    day_starts = _group_starts(days)
+    months = days[day_starts].astype("datetime64[M]")
+    month_starts = _group_starts(months)
+    day_labels = pd.DatetimeIndex(
+        days[day_starts].astype("datetime64[ns]")
+    ).tz_localize(df["DateTime"].dt.tz)
+    inputs = {
+        "dhi": df["DHI"].to_numpy(dtype=float),
+        "dni": df["DNI"].to_numpy(dtype=float),
+        "azimuth_sun": df["Azimuth"].to_numpy(dtype=float),
+        "zenith_sun": df["Zenith"].to_numpy(dtype=float),
+        "dni_extra": _dni_extra(panel.sky_model, df["DateTime"]),
+        "sky_model": panel.sky_model,
+        "shading": panel.shading,
+        "day_starts": day_starts,
+        "samples_per_day": np.diff(day_starts, append=len(days)),
+        "month_starts": month_starts,
+        "days_per_month": np.diff(month_starts, append=len(day_starts)),
+        "days": day_labels,
+    }
+
+    chunk_size = max(1, max_bytes // (8 * _ARRAYS_PER_SAMPLE * max(len(df), 1)))
+    chunks = [
+        parameters[:, start : start + chunk_size]
+        for start in range(0, n_samples, chunk_size)
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        _init_worker(inputs)
+        try:
+            results = [_evaluate(chunk) for chunk in chunks]
+        finally:
+            _worker.clear()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(inputs,)
+        ) as pool:
+            results = list(pool.map(_evaluate, chunks))
+    monthly = np.concatenate([result[0] for result in results])
+    annual = np.concatenate([result[1] for result in results])
+
+    # Horizontal insolation of every sample, which only depends on the sensor biases
+    zenith = inputs["zenith_sun"]
+    beam = np.maximum(inputs["dni"] * np.cos(np.radians(zenith)), 0)
+    valid = np.isfinite(inputs["dhi"] + beam)
+    horizontal = _annual(
+        np.add.reduceat(np.where(valid, [inputs["dhi"], beam], 0), day_starts, axis=1)
+        * 24
+        / inputs["samples_per_day"],
+        day_labels,
+    )
+    transposition_factor = annual / (
+        dhi_bias * horizontal[0] + dni_bias * horizontal[1]
+    )
+
+    labels = [f"P{level}" for level in levels]
+    monthly_levels = pd.DataFrame(exceedance_levels(monthly, levels).T, columns=labels)
+    monthly_levels.insert(
+        0,
+        "DateTime",
+        pd.DatetimeIndex(months[month_starts].astype("datetime64[ns]")).tz_localize(
+            df["DateTime"].dt.tz
+        ),
+    )
+    return InsolationEnsemble(
+        monthly=monthly_levels,
+        annual=pd.Series(exceedance_levels(annual, levels), index=labels),
+        transposition_factor=pd.Series(
+            exceedance_levels(transposition_factor, levels), index=labels
+        ),
+        samples=pd.DataFrame(
+            {
+                "azimuth": azimuths,
+                "tilt": tilts,
+                "rho_g": rho_gs,
+                "dhi_bias": dhi_bias,
+                "dni_bias": dni_bias,
+                "annual": annual,
+                "transposition_factor": transposition_factor,
+            }
+        ),
+    )
@@ -0,0 +1 @@
+"""Tests of the pv_assignments package."""
@@ -0,0 +1,30 @@
+"""Shared fixtures of the tests."""
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pv_assignments.assignment_1.data.part_2_loader import load_data
+from pv_assignments.utils.batch_runner import prepare_sun_angles
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_root(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Path]:
+    """Keep the on-disk caches of a test run out of the user's cache directory."""
+    root = tmp_path_factory.mktemp("cache")
+    previous = os.environ.get("PV_ASSIGNMENTS_CACHE")
+    os.environ["PV_ASSIGNMENTS_CACHE"] = str(root)
+    yield root
+    if previous is None:
+        del os.environ["PV_ASSIGNMENTS_CACHE"]
+    else:
+        os.environ["PV_ASSIGNMENTS_CACHE"] = previous
+
+
+@pytest.fixture(scope="session")
+def irradiance() -> pd.DataFrame:
+    """The part 2 file with the sun angles in the south convention."""
+    return prepare_sun_angles(load_data())
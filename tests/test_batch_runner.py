@@ -0,0 +1,72 @@
+"""Tests of the batch runner over many sites and panel configurations."""
+
+import importlib.resources as resources
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.assignment_1.data.part_2_loader import DEFAULT_FILE
+from pv_assignments.utils.batch_runner import MONTHS, prepare_sun_angles, run_batch
+from pv_assignments.utils.panel_irradiation import Panel, mean_annual_insolation
+
+PANELS = pd.DataFrame(
+    {"name": ["south", "west"], "azimuth": [0.0, 90.0], "tilt": [35.0, 20.0]}
+)
+
+
+@pytest.fixture(scope="module")
+def data_file() -> Iterator[Path]:
+    """Path of the part 2 data file."""
+    with resources.as_file(
+        resources.files("pv_assignments.assignment_1.data").joinpath(DEFAULT_FILE)
+    ) as path:
+        yield path
+
+
+def test_matches_panel(data_file: Path, irradiance: pd.DataFrame) -> None:
+    """Annual and monthly results equal those of a single Panel."""
+    manifest = pd.DataFrame({"path": [str(data_file)]})
+    table = run_batch(manifest, PANELS, workers=1)
+    assert list(table.columns) == ["path", "panel", "annual", *MONTHS, "error"]
+    assert table["panel"].tolist() == ["south", "west"]
+    assert (table["error"] == "").all()
+    for row, (_, panel) in zip(table.itertuples(), PANELS.iterrows(), strict=True):
+        daily = Panel(panel["azimuth"], panel["tilt"]).calculate_daily_insolation(
+            irradiance, cache=False
+        )
+        assert row.annual == pytest.approx(mean_annual_insolation(daily).iloc[0])
+        monthly = daily.groupby(daily["DateTime"].dt.month)["Insolation"].mean()
+        np.testing.assert_allclose(
+            table.loc[row.Index, MONTHS].to_numpy(dtype=float), monthly
+        )
+
+
+def test_errors_are_reported(data_file: Path, tmp_path: Path) -> None:
+    """A file that fails gets NaN results and an error, the others still run."""
+    manifest = pd.DataFrame({"path": [str(tmp_path / "missing.csv"), str(data_file)]})
+    table = run_batch(manifest, PANELS, workers=1)
+    failed, ok = table.iloc[:2], table.iloc[2:]
+    assert failed["error"].str.startswith("FileNotFoundError").all()
+    assert failed[["annual", *MONTHS]].isna().all().all()
+    assert (ok["error"] == "").all()
+    assert ok["annual"].notna().all()
+
+
+def test_process_pool_matches_serial(data_file: Path) -> None:
+    """Worker processes give the same table as the serial run."""
+    manifest = pd.DataFrame({"path": [str(data_file)] * 3})
+    pd.testing.assert_frame_equal(
+        run_batch(manifest, PANELS, workers=2, chunksize=1),
+        run_batch(manifest, PANELS, workers=1),
+    )
+
+
+def test_sun_angles_need_a_site() -> None:
+    """Files without solar angles need a latitude and longitude."""
+    df = pd.DataFrame({"DateTime": pd.date_range("2024-06-01", periods=3, freq="h")})
+    with pytest.raises(ValueError):
+        prepare_sun_angles(df)
+    assert {"Azimuth", "Zenith"} <= set(prepare_sun_angles(df, 55.7, 12.1).columns)
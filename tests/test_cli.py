@@ -0,0 +1,84 @@
+"""Tests of the command line interface."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.cli import main
+from pv_assignments.utils.panel_irradiation import Panel, annual_insolation
+
+
+def test_transpose_prints_gpoa(capsys: pytest.CaptureFixture[str]) -> None:
+    """The transpose command prints the irradiance components of Panel."""
+    main(
+        [
+            "transpose",
+            "--azimuth", "63",
+            "--tilt", "41",
+            "--dhi", "120",
+            "--dni", "600",
+            "--sun-azimuth", "-76",
+            "--sun-zenith", "63",
+        ]
+    )  # fmt: skip
+    lines = capsys.readouterr().out.splitlines()
+    gpoa = sum(Panel(63, 41).calculate_gpoa_components(120, 600, -76, 63))
+    assert lines[-1] == f"GPOA: {gpoa:.2f} W/m^2"
+
+
+def test_insolation_matches_panel(tmp_path: Path, irradiance: pd.DataFrame) -> None:
+    """The annual insolation of a panel is the one of Panel."""
+    output = tmp_path / "annual.csv"
+    main(
+        ["insolation", "--panel", "south=0,45", "--period", "annual", "-o", str(output)]
+    )
+    result = pd.read_csv(output)
+    expected = annual_insolation(
+        Panel(0, 45).calculate_daily_insolation(irradiance, cache=False)
+    )
+    assert result.columns.tolist() == ["DateTime", "Insolation_south"]
+    np.testing.assert_allclose(result["Insolation_south"], expected["Insolation"])
+
+
+def test_insolation_prints_one_row_per_month(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """The monthly insolation of the default panel has a row per month."""
+    main(["insolation"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["DateTime", "Insolation_horizontal"]
+    assert len(lines) == 1 + 12
+
+
+def test_bad_panel_is_a_usage_error(capsys: pytest.CaptureFixture[str]) -> None:
+    """A panel without an orientation exits with a usage error."""
+    with pytest.raises(SystemExit) as error:
+        main(["insolation", "--panel", "south"])
+    assert error.value.code == 2
+    assert "Expected name=azimuth,tilt" in capsys.readouterr().err
+
+
+def test_missing_file_exits_with_message(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """A missing irradiance file exits with an error message."""
+    with pytest.raises(SystemExit) as error:
+        main(["insolation", str(tmp_path / "missing.csv")])
+    assert error.value.code == 1
+    assert capsys.readouterr().err.startswith("pv-assign insolation: ")
+
+
+def test_import_is_light() -> None:
+    """Importing the command line interface loads neither pandas nor matplotlib."""
+    code = (
+        "import sys, pv_assignments.cli; "
+        "print(sorted({'pandas', 'matplotlib'} & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
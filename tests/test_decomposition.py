@@ -0,0 +1,113 @@
+"""Tests of the GHI decomposition and the clear-sky models."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.clear_sky import (
+    air_mass,
+    extraterrestrial_irradiance,
+    haurwitz,
+    ineichen,
+)
+from pv_assignments.utils.decomposition import add_dni_dhi, disc, engerer, erbs
+
+LONGITUDE = 12.0883
+
+
+@pytest.mark.parametrize("model", ["erbs", "disc", "engerer"])
+def test_closure(irradiance: pd.DataFrame, model: str) -> None:
+    """DHI plus the horizontal DNI adds up to the measured GHI."""
+    df = add_dni_dhi(irradiance, model=model, longitude=LONGITUDE)
+    ghi = np.maximum(irradiance["GHI"].to_numpy(), 0)
+    cos_zenith = np.cos(np.radians(df["Zenith"].to_numpy()))
+    day = (df["Zenith"] < 85).to_numpy() & np.isfinite(ghi)
+    np.testing.assert_allclose(
+        (df["DHI"] + df["DNI"] * cos_zenith).to_numpy()[day], ghi[day], atol=1e-6
+    )
+    assert (df["DNI"].to_numpy()[day] >= 0).all()
+    assert (df["DHI"].to_numpy()[day] >= -1e-6).all()
+
+
+def test_low_sun_is_diffuse() -> None:
+    """Near the horizon all irradiance is diffuse."""
+    times = pd.DatetimeIndex(["2024-06-01 04:00"] * 2)
+    ghi, zenith = np.array([20.0, 5.0]), np.array([88.0, 89.5])
+    for dni, dhi in (
+        erbs(ghi, zenith, times),
+        disc(ghi, zenith, times),
+        engerer(ghi, zenith, times, LONGITUDE),
+    ):
+        np.testing.assert_allclose(dni, 0.0)
+        np.testing.assert_allclose(dhi, ghi)
+
+
+def test_erbs_clear_and_overcast() -> None:
+    """A clear sky is mostly direct light and an overcast sky diffuse."""
+    times = pd.DatetimeIndex(["2024-06-21 12:00"] * 2)
+    zenith = np.array([35.0, 35.0])
+    horizontal_extra = extraterrestrial_irradiance(times) * np.cos(np.radians(zenith))
+    ghi = horizontal_extra * np.array([0.85, 0.1])
+    dni, dhi = erbs(ghi, zenith, times)
+    assert dhi[0] / ghi[0] == pytest.approx(0.165)
+    assert dhi[1] / ghi[1] == pytest.approx(1 - 0.009)
+
+
+def test_unknown_model(irradiance: pd.DataFrame) -> None:
+    """Unknown models and engerer without a longitude raise ValueError."""
+    with pytest.raises(ValueError):
+        add_dni_dhi(irradiance.iloc[:24], model="dirint")
+    with pytest.raises(ValueError):
+        add_dni_dhi(irradiance.iloc[:24], model="engerer")
+
+
+def test_extraterrestrial_irradiance() -> None:
+    """The irradiance peaks at perihelion in early January."""
+    times = pd.date_range("2024-01-01", "2024-12-31", freq="D")
+    dni_extra = extraterrestrial_irradiance(times)
+    assert dni_extra.max() == pytest.approx(1406, abs=5)
+    assert dni_extra.min() == pytest.approx(1316, abs=5)
+    assert times[dni_extra.argmax()].month == 1
+    assert times[dni_extra.argmin()].month == 7
+
+
+def test_air_mass() -> None:
+    """The air mass is 1 overhead, about 2 at 60 degrees and NaN at night."""
+    assert air_mass(0) == pytest.approx(1.0, abs=1e-3)
+    assert air_mass(60) == pytest.approx(2.0, abs=0.01)
+    assert np.isnan(air_mass(95))
+    np.testing.assert_allclose(
+        air_mass(np.array([0.0, 60.0])), [air_mass(0), air_mass(60)]
+    )
+
+
+def test_haurwitz() -> None:
+    """The clear-sky GHI falls with the zenith and is 0 at night."""
+    ghi = haurwitz(np.array([0.0, 30.0, 60.0, 89.0, 100.0]))
+    assert ghi[0] == pytest.approx(1098 * np.exp(-0.057))
+    assert np.all(np.diff(ghi[:4]) < 0)
+    assert ghi[4] == 0.0
+
+
+def test_ineichen(irradiance: pd.DataFrame) -> None:
+    """The Ineichen clear sky closes and bounds the measured daily GHI."""
+    zenith = irradiance["Zenith"].to_numpy()
+    ghi, dni, dhi = ineichen(zenith, irradiance["DateTime"], linke_turbidity=2)
+    cos_zenith = np.maximum(np.cos(np.radians(zenith)), 0)
+    np.testing.assert_allclose(dhi + dni * cos_zenith, ghi)
+    assert (ghi[zenith >= 90] == 0).all()
+    assert (dhi >= 0).all()
+    # Apart from a few days with cloud enhancement the sky is at most clear
+    daily = (
+        pd.DataFrame(
+            {"Measured": irradiance["GHI"].fillna(0).to_numpy(), "Clear": ghi},
+            index=pd.DatetimeIndex(irradiance["DateTime"]),
+        )
+        .resample("D")
+        .sum()
+    )
+    assert (daily["Measured"] > 1.1 * daily["Clear"]).mean() < 0.02
+    # More turbid air lets less direct light through
+    _, dni_turbid, _ = ineichen(zenith, irradiance["DateTime"], linke_turbidity=4)
+    day = zenith < 80
+    assert (dni_turbid[day] < dni[day]).all()
@@ -0,0 +1,92 @@
+"""Tests of the figure renderer and its content-keyed cache."""
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.figure_renderer import (
+    FigureRenderer,
+    figure_key,
+    figure_path,
+)
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+
+def _draw(values: np.ndarray, title: str = "") -> "Figure":
+    """Draw a line plot of the values."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.plot(values)
+    ax.set_title(title)
+    return fig
+
+
+def _fail(values: np.ndarray) -> "Figure":
+    """Drawing function that always fails."""
+    raise RuntimeError(f"cannot draw {len(values)} values")
+
+
+def test_figure_key() -> None:
+    """The key follows the data, the dpi and the drawing function."""
+    values = np.arange(5.0)
+    key = figure_key(_draw, 100, {"values": values, "title": "a"})
+    assert key == figure_key(_draw, 100, {"title": "a", "values": values.copy()})
+    assert key != figure_key(_draw, 100, {"values": values + 1, "title": "a"})
+    assert key != figure_key(_draw, 200, {"values": values, "title": "a"})
+    assert key != figure_key(_fail, 100, {"values": values, "title": "a"})
+    df = pd.DataFrame({"a": values})
+    assert figure_key(_draw, 100, {"values": df}) != figure_key(
+        _draw, 100, {"values": df.rename(columns={"a": "b"})}
+    )
+
+
+def test_cached_figures_are_skipped(tmp_path: Path) -> None:
+    """A figure is rendered once and copied from the cache afterwards."""
+    path = tmp_path / "figure.png"
+    values = np.random.default_rng(0).normal(size=10)
+    with FigureRenderer(workers=1) as renderer:
+        assert renderer.submit(_draw, path, dpi=50, values=values).result() == str(path)
+        content = path.read_bytes()
+        path.unlink()
+        renderer.submit(_draw, path, dpi=50, values=values)
+        assert (renderer.rendered, renderer.skipped) == (1, 1)
+    assert path.read_bytes() == content
+
+    with FigureRenderer(workers=1, cache=False) as renderer:
+        renderer.submit(_draw, path, dpi=50, values=values)
+        assert renderer.rendered == 1
+
+
+def test_process_pool(tmp_path: Path) -> None:
+    """Worker processes render the figures the calling process would."""
+    paths = [tmp_path / f"{i}.png" for i in range(3)]
+    with FigureRenderer(workers=2, cache=False) as renderer:
+        for i, path in enumerate(paths):
+            renderer.submit(_draw, path, dpi=50, values=np.arange(i + 2.0))
+        assert renderer.wait() == [str(path) for path in paths]
+    assert all(path.stat().st_size > 0 for path in paths)
+
+
+def test_errors_are_raised(tmp_path: Path) -> None:
+    """A failed job raises its error when the renderer is waited for."""
+    renderer = FigureRenderer(workers=1)
+    renderer.submit(_fail, tmp_path / "figure.png", values=np.arange(3.0))
+    with pytest.raises(RuntimeError, match="cannot draw"):
+        renderer.wait()
+    assert not (tmp_path / "figure.png").exists()
+
+
+def test_figure_path() -> None:
+    """Figures are saved as PNG files in the figures package."""
+    path = Path(figure_path("Part 2-1"))
+    assert path.name == "Part 2-1.png"
+    assert path.parent.name == "figures"
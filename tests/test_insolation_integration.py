@@ -0,0 +1,106 @@
+"""Tests of the time-weighted integration of irradiance into daily insolation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.insolation_integration import integrate_daily_insolation
+from pv_assignments.utils.panel_irradiation import Panel
+
+
+def _hourly(start: str, days: int, tz: str | None = None) -> pd.DatetimeIndex:
+    """Hourly timestamps of whole local days."""
+    first = pd.Timestamp(start, tz=tz)
+    return pd.date_range(
+        first, first + pd.DateOffset(days=days), freq="h", inclusive="left"
+    )
+
+
+def test_constant_irradiance() -> None:
+    """A constant irradiance integrates to the value times 24 hours."""
+    result = integrate_daily_insolation(_hourly("2024-01-01", 3), np.full(72, 100.0))
+    np.testing.assert_allclose(result["Insolation"], 2400.0)
+    np.testing.assert_allclose(result["Coverage"], 1.0)
+    assert not result["Flag"].any()
+
+
+@pytest.mark.parametrize(
+    "day, hours", [("2024-03-31", 23), ("2024-10-27", 25), ("2024-06-01", 24)]
+)
+def test_dst_days(day: str, hours: int) -> None:
+    """Days with a DST change have 23 or 25 hours of elapsed time."""
+    date_time = _hourly(day, 1, tz="Europe/Copenhagen")
+    assert date_time.size == hours
+    result = integrate_daily_insolation(date_time, np.full(hours, 100.0))
+    assert len(result) == 1
+    assert result["DateTime"][0] == pd.Timestamp(day, tz="Europe/Copenhagen")
+    assert result["Insolation"][0] == pytest.approx(100.0 * hours)
+    assert result["Coverage"][0] == pytest.approx(1.0)
+    assert result["Filled"][0] == 0.0
+
+
+def test_dst_matches_utc() -> None:
+    """Local days are the same elapsed hours as the UTC samples in them."""
+    date_time = _hourly("2024-10-26", 3, tz="Europe/Copenhagen")
+    gpoa = np.random.default_rng(0).uniform(0, 800, date_time.size)
+    result = integrate_daily_insolation(date_time, gpoa)
+    expected = pd.Series(gpoa, index=date_time).groupby(date_time.date).sum()
+    np.testing.assert_allclose(result["Insolation"], expected)
+
+
+def test_irregular_steps() -> None:
+    """Samples are weighted with the time until the next sample."""
+    date_time = pd.DatetimeIndex(
+        ["2024-01-01 00:00", "2024-01-01 06:00", "2024-01-01 06:30", "2024-01-02 00:00"]
+    )
+    result = integrate_daily_insolation(
+        date_time, np.array([0.0, 100.0, 200.0, 0.0]), max_gap_factor=100
+    )
+    assert result["Insolation"][0] == pytest.approx(6 * 0 + 0.5 * 100 + 17.5 * 200)
+
+
+def test_short_gap_is_filled() -> None:
+    """Short runs of missing data are interpolated and reported as filled."""
+    gpoa = np.full(24, 100.0)
+    gpoa[10:12] = np.nan
+    result = integrate_daily_insolation(_hourly("2024-01-01", 1), gpoa)
+    assert result["Insolation"][0] == pytest.approx(2400.0)
+    assert result["Coverage"][0] == pytest.approx(22 / 24)
+    assert result["Filled"][0] == pytest.approx(2 / 24)
+
+
+def test_long_gap_is_flagged() -> None:
+    """Long runs of missing data are not filled and flag the day."""
+    gpoa = np.full(24, 100.0)
+    gpoa[6:18] = np.nan
+    result = integrate_daily_insolation(_hourly("2024-01-01", 1), gpoa)
+    assert result["Flag"][0]
+    assert np.isnan(result["Insolation"][0])
+    assert result["Coverage"][0] == pytest.approx(0.5)
+    result = integrate_daily_insolation(
+        _hourly("2024-01-01", 1), gpoa, fill="none", min_coverage=0.4
+    )
+    assert result["Insolation"][0] == pytest.approx(1200.0)
+
+
+def test_night_is_zero() -> None:
+    """Missing values with the sun below the horizon count as 0 W/m²."""
+    gpoa = np.full(24, 100.0)
+    gpoa[:6] = np.nan
+    zenith = np.where(np.arange(24) < 6, 120.0, 30.0)
+    result = integrate_daily_insolation(_hourly("2024-01-01", 1), gpoa, zenith)
+    assert result["Insolation"][0] == pytest.approx(1800.0)
+    assert result["Coverage"][0] == pytest.approx(1.0)
+
+
+def test_exact_method_matches_mean(irradiance: pd.DataFrame) -> None:
+    """On days of complete hourly data the exact method equals the mean times 24."""
+    data = irradiance.iloc[24 * 40 : 24 * 70]
+    panel = Panel(azimuth=0, tilt=30)
+    mean = panel.calculate_daily_insolation(data, cache=False)
+    exact = panel.calculate_daily_insolation(data, method="exact", cache=False)
+    complete = (exact["Coverage"] == 1).to_numpy()
+    assert complete.sum() > 20
+    np.testing.assert_allclose(
+        exact["Insolation"][complete], mean["Insolation"][complete], rtol=1e-9
+    )
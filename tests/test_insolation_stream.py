@@ -0,0 +1,63 @@
+"""Tests of the streaming insolation aggregation against the batch calculation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.insolation_stream import InsolationAggregator
+from pv_assignments.utils.panel_irradiation import (
+    Panel,
+    PanelArray,
+    annual_insolation,
+)
+
+
+def _chunks(df: pd.DataFrame, size: int) -> list[pd.DataFrame]:
+    """Split the data into chunks that do not line up with the days."""
+    return [df.iloc[i : i + size] for i in range(0, len(df), size)]
+
+
+@pytest.mark.parametrize("chunksize", [1000, 37])
+def test_stream_matches_batch(irradiance: pd.DataFrame, chunksize: int) -> None:
+    """Daily, monthly and annual results equal those of the whole frame."""
+    data = irradiance.iloc[:3000]
+    panel = Panel(azimuth=10, tilt=35)
+    stream = InsolationAggregator(panel).consume(_chunks(data, chunksize))
+
+    daily = panel.calculate_daily_insolation(data, cache=False)
+    pd.testing.assert_frame_equal(stream.daily(), daily, check_dtype=False, rtol=1e-9)
+    monthly = panel.calculate_monthly_insolation(data, cache=False)
+    pd.testing.assert_frame_equal(
+        stream.monthly(), monthly, check_dtype=False, rtol=1e-9
+    )
+    pd.testing.assert_frame_equal(
+        stream.annual(), annual_insolation(daily), check_dtype=False, rtol=1e-9
+    )
+
+
+def test_panel_array(irradiance: pd.DataFrame) -> None:
+    """A PanelArray is aggregated per panel."""
+    data = irradiance.iloc[:2000]
+    array = PanelArray([0, 90], [30, 60])
+    stream = InsolationAggregator(array, keep_daily=False).consume(_chunks(data, 500))
+    monthly = array.calculate_monthly_insolation(data, cache=False)
+    assert list(stream.monthly().columns) == [
+        "DateTime",
+        "Insolation_0",
+        "Insolation_1",
+    ]
+    np.testing.assert_allclose(
+        stream.monthly()[["Insolation_0", "Insolation_1"]],
+        monthly[["Insolation_0", "Insolation_1"]],
+        rtol=1e-9,
+    )
+    with pytest.raises(ValueError):
+        stream.daily()
+
+
+def test_out_of_order_chunks(irradiance: pd.DataFrame) -> None:
+    """Chunks that go back in time are rejected."""
+    stream = InsolationAggregator(Panel(azimuth=0, tilt=30))
+    stream.update(irradiance.iloc[100:200])
+    with pytest.raises(ValueError):
+        stream.update(irradiance.iloc[:50])
@@ -0,0 +1,88 @@
+"""Tests of the timing and memory instrumentation."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils import instrumentation
+from pv_assignments.utils.instrumentation import instrument, profile, stage
+from pv_assignments.utils.panel_irradiation import Panel
+
+
+@instrument
+def _outer(values: np.ndarray) -> np.ndarray:
+    """Instrumented function with a nested stage and call."""
+    with stage("inner stage", rows=3):
+        pass
+    return _inner(values) * 2
+
+
+@instrument
+def _inner(values: np.ndarray) -> np.ndarray:
+    """Instrumented function called by _outer."""
+    return values + 1
+
+
+def test_disabled_by_default() -> None:
+    """Nothing is recorded while instrumentation is disabled."""
+    before = len(instrumentation.spans())
+    assert not instrumentation.is_enabled()
+    np.testing.assert_array_equal(_outer(np.arange(5.0)), (np.arange(5.0) + 1) * 2)
+    assert len(instrumentation.spans()) == before
+
+
+def test_nested_spans() -> None:
+    """Nested spans are recorded with their depth, rows and self time."""
+    with profile() as recorded:
+        _outer(np.arange(10.0))
+    assert not instrumentation.is_enabled()
+    names = [span.name for span in recorded]
+    assert names == [
+        "inner stage",
+        "test_instrumentation._inner",
+        "test_instrumentation._outer",
+    ]
+    stage_span, inner, outer = recorded
+    assert (stage_span.depth, inner.depth, outer.depth) == (1, 1, 0)
+    assert stage_span.rows == 3
+    assert outer.rows == inner.rows == 10
+    assert inner.result_bytes == 80
+    assert outer.self_time <= outer.duration
+    assert outer.duration >= inner.duration + stage_span.duration
+
+
+def test_memory_tracing() -> None:
+    """With memory tracing the peak memory of every span is recorded."""
+    with profile(memory=True) as recorded:
+        _outer(np.zeros(100_000))
+    outer = recorded[-1]
+    assert outer.peak_bytes is not None
+    assert outer.peak_bytes >= 800_000
+
+
+def test_panel_methods_are_instrumented(irradiance: pd.DataFrame) -> None:
+    """The Panel methods record spans of the whole data."""
+    with profile() as recorded:
+        Panel(0, 30).calculate_daily_insolation(irradiance, cache=False)
+    assert any(
+        span.name == "panel_irradiation.Panel.calculate_daily_insolation"
+        and span.rows == len(irradiance)
+        for span in recorded
+    )
+
+
+def test_summary_and_export(tmp_path: Path) -> None:
+    """The summary aggregates calls per name and the trace has one event each."""
+    with profile() as recorded:
+        for _ in range(3):
+            _outer(np.arange(4.0))
+    stats = instrumentation.summary(recorded)
+    assert stats["test_instrumentation._outer"]["calls"] == 3
+    assert stats["test_instrumentation._inner"]["rows"] == 12
+    instrumentation.export(tmp_path / "summary.json", tmp_path / "trace.json", recorded)
+    assert json.loads((tmp_path / "summary.json").read_text()).keys() == stats.keys()
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert len(events) == len(recorded) == 9
+    assert all(event["ph"] == "X" for event in events)
@@ -0,0 +1,162 @@
+"""Tests of the live ingestion service."""
+
+import asyncio
+from importlib import resources
+
+import pandas as pd
+import pytest
+
+from pv_assignments.assignment_1.data.part_2_loader import DEFAULT_FILE
+from pv_assignments.utils.live_ingestion import (
+    LiveIngestion,
+    UpdateInfo,
+    parse_records,
+)
+from pv_assignments.utils.panel_irradiation import Panel
+
+MALFORMED = [
+    "2024-13-45 99:00:00+01:00,1,2,3,4,5",
+    "2024-01-01 05:00:00+01:00,1,2,3,4,5,6,7",
+    "2024garbage",
+    "2024-01-01 06:00:00,1,2,3,4,5",
+]
+
+
+@pytest.fixture(scope="module")
+def records() -> list[str]:
+    """Records of the part 2 file, without the header."""
+    text = (
+        resources.files("pv_assignments.assignment_1.data")
+        .joinpath(DEFAULT_FILE)
+        .read_text()
+    )
+    return text.splitlines()[1:]
+
+
+def test_parse_records_coerces_bad_fields() -> None:
+    """Unparsable fields become NaN or NaT and long lines are skipped."""
+    df = parse_records(["2024-01-01 12:00:00+01:00,abc,,3,4,5", *MALFORMED])
+    assert len(df) == 4
+    assert df["DateTime"].isna().tolist() == [False, True, True, True]
+    assert df.loc[0, ["GHI", "DHI"]].isna().all()
+    assert df.loc[0, "DNI"] == 3
+
+
+def test_parse_records_converts_utc_offsets() -> None:
+    """Mixed UTC offsets are converted to the most common one."""
+    df = parse_records(
+        [
+            "2024-01-01 12:00:00+01:00,1,2,3,4,5",
+            "2024-01-01 14:00:00+02:00,1,2,3,4,5",
+            "2024-01-01 13:00:00+01:00,1,2,3,4,5",
+        ]
+    )
+    assert str(df["DateTime"].dt.tz) == "UTC+01:00"
+    assert df["DateTime"].dt.hour.tolist() == [12, 13, 13]
+
+
+def test_parse_records_keeps_naive_timestamps() -> None:
+    """Naive timestamps are kept when most records are naive."""
+    df = parse_records(
+        [
+            "2024-01-01 12:00:00,1,2,3,4,5",
+            "2024-01-01 13:00:00+01:00,1,2,3,4,5",
+            "2024-01-01 14:00:00,1,2,3,4,5",
+        ]
+    )
+    assert df["DateTime"].dt.tz is None
+    assert df["DateTime"].isna().tolist() == [False, True, False]
+
+
+def test_batches_match_one_update(records: list[str]) -> None:
+    """Shuffled micro-batches give the same insolation as one update."""
+    single = LiveIngestion(Panel(0, 45))
+    single.ingest(records)
+    batched = LiveIngestion(Panel(0, 45))
+    for start in range(0, len(records), 500):
+        batched.ingest(records[start : start + 500][::-1])
+    pd.testing.assert_frame_equal(batched.monthly(), single.monthly())
+    pd.testing.assert_frame_equal(batched.annual(), single.annual())
+    assert batched.rows == single.rows == len(records)
+
+
+def test_malformed_records_are_dropped(records: list[str]) -> None:
+    """Malformed records are counted as dropped and do not change the result."""
+    clean = LiveIngestion(Panel(0, 45))
+    clean.ingest(records)
+    service = LiveIngestion(Panel(0, 45))
+    info = service.ingest(MALFORMED + records)
+    assert info.dropped == len(MALFORMED)
+    assert info.rows == len(records)
+    pd.testing.assert_frame_equal(service.monthly(), clean.monthly())
+
+
+def test_mixed_offsets_match_one_offset(records: list[str]) -> None:
+    """A record with another UTC offset is ingested at the same instant."""
+    clean = LiveIngestion(Panel(0, 45))
+    clean.ingest(records)
+    shifted = records.copy()
+    assert shifted[12].startswith("2024-01-01 12:00:00+01:00")
+    shifted[12] = shifted[12].replace("12:00:00+01:00", "13:00:00+02:00")
+    service = LiveIngestion(Panel(0, 45))
+    service.ingest(shifted[:24])
+    info = service.ingest(shifted[24:])
+    assert info.dropped == 0
+    pd.testing.assert_frame_equal(service.monthly(), clean.monthly())
+
+
+def test_naive_records_after_aware_are_dropped(records: list[str]) -> None:
+    """Naive records in a tz-aware stream are dropped."""
+    service = LiveIngestion(Panel(0, 45))
+    service.ingest(records[:24])
+    info = service.ingest([line.replace("+01:00", "") for line in records[24:48]])
+    assert (info.rows, info.dropped) == (0, 24)
+
+
+def test_late_records_are_dropped(records: list[str]) -> None:
+    """Records of a day before the open day are dropped."""
+    service = LiveIngestion(Panel(0, 45))
+    service.ingest(records[48:72])
+    info = service.ingest(records[:24])
+    assert (info.rows, info.dropped) == (0, 24)
+
+
+def test_run_survives_malformed_records(records: list[str]) -> None:
+    """The run loop keeps ingesting after a batch with malformed records."""
+
+    async def run() -> LiveIngestion:
+        service = LiveIngestion(Panel(0, 45), max_batch=10, max_delay=0.01)
+        for line in MALFORMED + records[:48]:
+            service._queue.put_nowait(line)
+        service.stop()
+        await service.run()
+        return service
+
+    service = asyncio.run(run())
+    assert service.rows == 48
+    assert service.dropped == len(MALFORMED)
+
+
+def test_run_survives_failed_batch(records: list[str]) -> None:
+    """The run loop keeps ingesting after a batch raises."""
+    updates: list[int] = []
+
+    def on_update(_service: LiveIngestion, info: UpdateInfo) -> None:
+        updates.append(info.rows)
+        if len(updates) == 1:
+            raise RuntimeError("sink down")
+
+    async def run() -> LiveIngestion:
+        service = LiveIngestion(
+            Panel(0, 45), max_batch=24, max_delay=0.01, on_update=on_update
+        )
+        for line in records[:48]:
+            service._queue.put_nowait(line)
+        service.stop()
+        await service.run()
+        return service
+
+    service = asyncio.run(run())
+    assert updates == [24, 24]
+    assert service.rows == 48
+    assert service.errors == ["RuntimeError: sink down"]
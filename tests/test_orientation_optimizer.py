@@ -0,0 +1,59 @@
+"""Tests of the orientation optimizer and the annual insolation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.orientation_optimizer import optimize_orientation
+from pv_assignments.utils.panel_irradiation import (
+    Panel,
+    annual_insolation,
+    mean_annual_insolation,
+)
+
+
+def test_annual_insolation() -> None:
+    """Daily insolation is summed per calendar year."""
+    days = pd.date_range("2023-12-30", "2025-01-02", freq="D", tz="Europe/Copenhagen")
+    daily = pd.DataFrame({"DateTime": days, "Insolation": 1.0, "Flag": False})
+    annual = annual_insolation(daily)
+    assert annual.columns.tolist() == ["DateTime", "Insolation"]
+    assert annual["DateTime"].dt.year.tolist() == [2023, 2024, 2025]
+    assert annual["Insolation"].tolist() == [2.0, 366.0, 2.0]
+    assert mean_annual_insolation(daily)["Insolation"] == pytest.approx(370 / 3)
+
+
+def test_annual_insolation_skips_years_without_data() -> None:
+    """Years between years of data do not lower the mean."""
+    days = pd.to_datetime(["2020-06-01", "2022-06-01"])
+    daily = pd.DataFrame({"DateTime": days, "Insolation_a": [1.0, 3.0]})
+    assert mean_annual_insolation(daily)["Insolation_a"] == 2.0
+
+
+def test_optimum_is_the_best_orientation(irradiance: pd.DataFrame) -> None:
+    """The optimum beats the coarse grid and faces south at a moderate tilt."""
+    optimum = optimize_orientation(irradiance, azimuth_step=30, tilt_step=15)
+    assert optimum.surface.shape == (7, 12)
+    assert optimum.insolation >= optimum.surface.to_numpy().max()
+    assert abs(optimum.azimuth) < 15
+    assert 20 < optimum.tilt < 50
+
+
+def test_optimum_insolation_matches_panel(irradiance: pd.DataFrame) -> None:
+    """The optimizer uses the same annual insolation as Panel."""
+    optimum = optimize_orientation(irradiance, azimuth_step=30, tilt_step=15)
+    panel = Panel(optimum.azimuth, optimum.tilt)
+    annual = mean_annual_insolation(
+        panel.calculate_daily_insolation(irradiance, cache=False)
+    )
+    assert optimum.insolation == pytest.approx(annual["Insolation"])
+
+
+def test_time_step_comes_from_the_timestamps(irradiance: pd.DataFrame) -> None:
+    """Half-hourly data with the same irradiance gives the same insolation."""
+    half_hourly = irradiance.loc[irradiance.index.repeat(2)].reset_index(drop=True)
+    offset = np.tile(np.array([0, 30], dtype="timedelta64[m]"), len(irradiance))
+    half_hourly["DateTime"] = half_hourly["DateTime"] + pd.to_timedelta(offset)
+    hourly = optimize_orientation(irradiance, tolerance=5)
+    fine = optimize_orientation(half_hourly, tolerance=5)
+    assert fine.insolation == pytest.approx(hourly.insolation)
@@ -0,0 +1,150 @@
+"""Tests of Panel and PanelArray."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.panel_irradiation import Panel, PanelArray
+
+ORIENTATIONS = [(0.0, 0.0), (0.0, 45.0), (90.0, 30.0), (-120.0, 90.0), (180.0, 10.0)]
+
+
+def _sun(n: int = 200, seed: int = 0) -> tuple[np.ndarray, ...]:
+    """Random DHI, DNI and sun positions, partly below the horizon."""
+    rng = np.random.default_rng(seed)
+    dhi = rng.uniform(0, 300, n)
+    dni = rng.uniform(0, 900, n)
+    azimuth_sun = rng.uniform(-180, 180, n)
+    zenith_sun = rng.uniform(0, 100, n)
+    return dhi, dni, azimuth_sun, zenith_sun
+
+
+def test_panel_array_matches_panels() -> None:
+    """PanelArray gives the components of the individual panels."""
+    dhi, dni, azimuth_sun, zenith_sun = _sun()
+    panels = [Panel(a, t, rho_g=0.25) for a, t in ORIENTATIONS]
+    array = PanelArray.from_panels(panels)
+    components = array.calculate_gpoa_components(dhi, dni, azimuth_sun, zenith_sun)
+    for i, panel in enumerate(panels):
+        expected = panel.calculate_gpoa_components(dhi, dni, azimuth_sun, zenith_sun)
+        for value, reference in zip(components, expected, strict=True):
+            np.testing.assert_allclose(value[i], reference, atol=1e-9)
+
+
+def test_panel_array_angle_of_incidence() -> None:
+    """The angle of incidence of every panel equals the one of a single Panel."""
+    _, _, azimuth_sun, zenith_sun = _sun()
+    array = PanelArray([a for a, _ in ORIENTATIONS], [t for _, t in ORIENTATIONS])
+    angles = array.calculate_angle_of_incidence(azimuth_sun, zenith_sun)
+    assert angles.shape == (len(ORIENTATIONS), len(azimuth_sun))
+    for i, (azimuth, tilt) in enumerate(ORIENTATIONS):
+        np.testing.assert_allclose(
+            angles[i],
+            Panel(azimuth, tilt).calculate_angle_of_incidence(azimuth_sun, zenith_sun),
+        )
+
+
+def test_panel_array_slicing_and_names() -> None:
+    """Slices keep the names, and the number of names must match."""
+    array = PanelArray([0, 90, 180], [10, 20, 30], names=["a", "b", "c"])
+    assert len(array) == 3
+    part = array[1:]
+    assert part.names == ["b", "c"]
+    np.testing.assert_array_equal(part.tilts, [20, 30])
+    with pytest.raises(ValueError):
+        PanelArray([0, 90], [10, 20], names=["a"])
+
+
+def test_panel_array_insolation_matches_panels(irradiance: pd.DataFrame) -> None:
+    """PanelArray gives the daily and monthly insolation of the panels."""
+    panels = [Panel(a, t) for a, t in ORIENTATIONS]
+    array = PanelArray.from_panels(panels, names=[str(i) for i in range(len(panels))])
+    daily = array.calculate_daily_insolation(irradiance, cache=False)
+    monthly = array.calculate_monthly_insolation(irradiance, cache=False)
+    for i, panel in enumerate(panels):
+        np.testing.assert_allclose(
+            daily[f"Insolation_{i}"],
+            panel.calculate_daily_insolation(irradiance, cache=False)["Insolation"],
+        )
+        np.testing.assert_allclose(
+            monthly[f"Insolation_{i}"],
+            panel.calculate_monthly_insolation(irradiance, cache=False)["Insolation"],
+        )
+
+
+def test_cos_angle_of_incidence_matches_spherical_formula() -> None:
+    """The in-place cos(AOI) equals the spherical trigonometry formula."""
+    _, _, azimuth_sun, zenith_sun = _sun()
+    for azimuth, tilt in ORIENTATIONS:
+        panel = Panel(azimuth, tilt)
+        zenith, tilt_rad = np.radians(zenith_sun), np.radians(tilt)
+        expected = np.sin(zenith) * np.sin(tilt_rad) * np.cos(
+            np.radians(azimuth_sun - azimuth)
+        ) + np.cos(zenith) * np.cos(tilt_rad)
+        np.testing.assert_allclose(
+            panel.calculate_cos_angle_of_incidence(azimuth_sun, zenith_sun), expected
+        )
+
+
+def test_cached_trigonometry_follows_a_new_tilt() -> None:
+    """Setting the tilt updates the cached cos and sin of the tilt."""
+    panel = Panel(0, 10)
+    panel.tilt = 60
+    np.testing.assert_allclose(
+        panel.calculate_cos_angle_of_incidence(0.0, 30.0), np.cos(np.radians(30))
+    )
+
+
+def test_isotropic_components() -> None:
+    """The isotropic components follow their closed forms."""
+    dhi, dni, azimuth_sun, zenith_sun = _sun()
+    panel = Panel(20, 40, rho_g=0.3)
+    direct, diffuse, ground = panel.calculate_gpoa_components(
+        dhi, dni, azimuth_sun, zenith_sun
+    )
+    cos_tilt = np.cos(np.radians(40))
+    cos_aoi = panel.calculate_cos_angle_of_incidence(azimuth_sun, zenith_sun)
+    np.testing.assert_allclose(direct, np.maximum(dni * cos_aoi, 0))
+    np.testing.assert_allclose(diffuse, dhi * (1 + cos_tilt) / 2)
+    ghi = dhi + dni * np.cos(np.radians(zenith_sun))
+    np.testing.assert_allclose(ground, ghi * 0.3 * (1 - cos_tilt) / 2)
+
+
+def test_out_buffers_give_the_same_components() -> None:
+    """Writing into buffers gives the same components as allocating."""
+    dhi, dni, azimuth_sun, zenith_sun = _sun()
+    panel = Panel(30, 35)
+    expected = panel.calculate_gpoa_components(dhi, dni, azimuth_sun, zenith_sun)
+    out = tuple(np.empty(len(dhi)) for _ in range(3))
+    result = panel.calculate_gpoa_components(dhi, dni, azimuth_sun, zenith_sun, out=out)
+    for value, buffer, reference in zip(result, out, expected, strict=True):
+        assert value is buffer
+        np.testing.assert_allclose(value, reference)
+
+
+def test_scalar_inputs_give_scalars() -> None:
+    """Scalar inputs give scalar components, here for part 2-1."""
+    panel = Panel(63, 41)
+    direct, diffuse, ground = panel.calculate_gpoa_components(120, 600, -76, 63)
+    assert np.ndim(direct) == np.ndim(diffuse) == np.ndim(ground) == 0
+    # The sun is behind the panel
+    assert direct == 0
+    assert diffuse == pytest.approx(120 * (1 + np.cos(np.radians(41))) / 2)
+
+
+def test_series_input_gives_series() -> None:
+    """A Series in any of the inputs gives Series with its index."""
+    panel = Panel(0, 30)
+    zenith_sun = pd.Series([40.0, 50.0], index=[3, 7])
+    gpoa = panel.calculate_gpoa(100.0, 500.0, 10.0, zenith_sun)
+    assert isinstance(gpoa, pd.Series)
+    assert gpoa.index.tolist() == [3, 7]
+    np.testing.assert_allclose(
+        gpoa, panel.calculate_gpoa(100.0, 500.0, 10.0, zenith_sun.to_numpy())
+    )
+    angle = panel.calculate_angle_of_incidence(10.0, zenith_sun)
+    assert isinstance(angle, pd.Series)
+    components = panel.calculate_gpoa_components(
+        pd.Series([100.0, 90.0]), 500.0, 10.0, 40.0
+    )
+    assert all(isinstance(value, pd.Series) for value in components)
@@ -0,0 +1,73 @@
+"""Tests of the cached part 2 loader against plain pandas reads."""
+
+from importlib import resources
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pv_assignments.assignment_1.data import part_2_loader
+
+OPTIONS = {
+    "columns": ["DNI", "SolarAzimuth"],
+    "start": "2024-03-31",
+    "end": pd.Timestamp("2024-10-27 12:00"),
+}
+
+
+@pytest.fixture
+def part_2_file() -> Path:
+    """Path of the part 2 CSV file."""
+    with resources.as_file(
+        resources.files("pv_assignments.assignment_1.data").joinpath(
+            part_2_loader.DEFAULT_FILE
+        )
+    ) as path:
+        return path
+
+
+@pytest.fixture
+def shuffled_file(part_2_file: Path, tmp_path: Path) -> Path:
+    """The part 2 file with its rows in random order."""
+    df = pd.read_csv(part_2_file)
+    path = tmp_path / "shuffled.csv"
+    df.sample(frac=1, random_state=0).to_csv(path, index=False)
+    return path
+
+
+def test_cache_matches_csv(part_2_file: Path) -> None:
+    """The converted and memory-mapped cache entry equals the CSV."""
+    expected = part_2_loader.load_data(part_2_file, cache=False)
+    pd.testing.assert_frame_equal(
+        part_2_loader.load_data(part_2_file, cache="refresh"), expected
+    )
+    pd.testing.assert_frame_equal(part_2_loader.load_data(part_2_file), expected)
+    pd.testing.assert_frame_equal(part_2_loader.load_data(), expected)
+
+
+def test_cache_selects_columns_and_rows(part_2_file: Path) -> None:
+    """Column and time range selection on the cache equal the CSV."""
+    expected = part_2_loader.load_data(part_2_file, cache=False, **OPTIONS)
+    assert expected.columns.tolist() == ["DateTime", "DNI", "SolarAzimuth"]
+    assert len(expected) == (1 + 30 + 31 + 30 + 31 + 31 + 30 + 26) * 24 + 12
+    pd.testing.assert_frame_equal(
+        part_2_loader.load_data(part_2_file, **OPTIONS), expected
+    )
+
+
+def test_unsorted_file(part_2_file: Path, shuffled_file: Path) -> None:
+    """Rows of an unsorted file are loaded in chronological order by both paths."""
+    expected = part_2_loader.load_data(part_2_file, cache=False, **OPTIONS)
+    for cache in (False, True, True):
+        df = part_2_loader.load_data(shuffled_file, cache=cache, **OPTIONS)
+        pd.testing.assert_frame_equal(df, expected)
+
+
+def test_chunks_match_csv(part_2_file: Path) -> None:
+    """The chunks of iter_data add up to the CSV."""
+    expected = part_2_loader.load_data(part_2_file, cache=False)
+    chunks = list(part_2_loader.iter_data(part_2_file, chunksize=1000))
+    assert [len(chunk) for chunk in chunks[:-1]] == [1000] * (len(chunks) - 1)
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True), expected, check_index_type=False
+    )
@@ -0,0 +1,84 @@
+"""Tests of the PV power model."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.panel_irradiation import Panel, PanelArray
+from pv_assignments.utils.power import (
+    PowerModel,
+    ashrae_iam,
+    faiman_temperature,
+    physical_iam,
+    pvwatts_inverter,
+    sapm_temperature,
+)
+from pv_assignments.utils.shading import ShadingTable
+
+
+def test_ashrae_iam() -> None:
+    """ASHRAE modifier at normal, 60 degree and grazing incidence and from behind."""
+    cos_aoi = np.array([1.0, 0.5, 0.0, -0.3])
+    np.testing.assert_allclose(ashrae_iam(cos_aoi), [1.0, 0.95, 0.0, 0.0])
+
+
+def test_physical_iam() -> None:
+    """The physical modifier is 1 at normal incidence and falls to 0."""
+    iam = physical_iam(np.array([1.0, 0.8, 0.3, 0.0]))
+    assert iam[0] == pytest.approx(1.0)
+    assert np.all(np.diff(iam) < 0)
+    assert iam[-1] == 0
+
+
+def test_temperature_models() -> None:
+    """Cells heat up with irradiance and cool down with wind."""
+    poa = np.array([0.0, 500.0, 1000.0, 1000.0])
+    wind_speed = np.array([1.0, 1.0, 1.0, 5.0])
+    for model in (faiman_temperature, sapm_temperature):
+        temperature = model(poa, 20.0, wind_speed)
+        assert temperature[0] == pytest.approx(20.0)
+        assert temperature[0] < temperature[1] < temperature[2]
+        assert temperature[3] < temperature[2]
+    assert faiman_temperature(np.array([1000.0]), 20.0, 0.0)[0] == pytest.approx(60.0)
+
+
+def test_pvwatts_inverter() -> None:
+    """AC power is clipped at the rating and 0 at very low or no DC power."""
+    pdc = np.array([0.0, 0.1, 500.0, 1000.0, 2000.0, np.nan])
+    pac = pvwatts_inverter(pdc, pac0=1000.0)
+    assert pac[0] == 0.0
+    assert pac[1] == 0.0
+    assert 0.9 * 500 < pac[2] < 500
+    assert pac[3] < 1000.0
+    assert pac[4] == 1000.0
+    assert pac[5] == 0.0
+
+
+def test_shading_scales_the_beam_once() -> None:
+    """The modifier uses the geometric cos(AOI), not the shaded beam."""
+    dhi, dni = np.array([100.0, 80.0]), np.array([800.0, 600.0])
+    azimuth_sun, zenith_sun = np.array([10.0, -20.0]), np.array([70.0, 40.0])
+    shading = ShadingTable(30, 0, pitch=3.0, collector_width=2.0)
+    panels = PanelArray.from_panels([Panel(0, 30, shading=shading)])
+    model = PowerModel(panels, pdc0=1000, gamma_pdc=0.0)
+    pdc, _ = model.calculate_power(dhi, dni, azimuth_sun, zenith_sun)
+
+    direct, diffuse, ground = panels.calculate_gpoa_components(
+        dhi, dni, azimuth_sun, zenith_sun
+    )
+    cos_aoi = Panel(0, 30).calculate_cos_angle_of_incidence(azimuth_sun, zenith_sun)
+    assert direct[0, 0] < dni[0] * cos_aoi[0]  # The first timestep is shaded
+    effective = direct[0] * ashrae_iam(cos_aoi) + diffuse[0] + ground[0]
+    np.testing.assert_allclose(pdc[0], effective)
+
+
+def test_simulate(irradiance: pd.DataFrame) -> None:
+    """Annual energy scales with the DC rating and AC power is never negative."""
+    panels = PanelArray([0, 0], [45, 45], names=["small", "large"])
+    result = PowerModel(panels, pdc0=[1000, 2000]).simulate(irradiance)
+    assert result.hourly.columns.tolist() == ["DateTime", "AC_small", "AC_large"]
+    assert len(result.hourly) == len(irradiance)
+    assert (result.hourly[["AC_small", "AC_large"]] >= 0).all().all()
+    small, large = result.annual[["Energy_small", "Energy_large"]].iloc[0]
+    assert large == pytest.approx(2 * small)
+    assert 0 < small < 1500
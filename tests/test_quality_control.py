@@ -0,0 +1,119 @@
+"""Tests of the quality control of measured irradiance."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.clear_sky import ineichen
+from pv_assignments.utils.quality_control import (
+    QCFlag,
+    add_qc_flags,
+    quality_control,
+    screen,
+    stuck_values,
+    summarize,
+)
+
+
+@pytest.fixture
+def clear_week(irradiance: pd.DataFrame) -> pd.DataFrame:
+    """A week of June with the Ineichen clear sky as measurements."""
+    df = irradiance[irradiance["DateTime"].dt.month == 6].iloc[: 24 * 7].copy()
+    ghi, dni, dhi = ineichen(df["Zenith"].to_numpy(), df["DateTime"])
+    return df.assign(GHI=ghi, DNI=dni, DHI=dhi).reset_index(drop=True)
+
+
+def _noon(df: pd.DataFrame, day: int = 0) -> int:
+    """Row of the highest sun on a day of the week."""
+    return int(df["Zenith"].iloc[24 * day : 24 * (day + 1)].idxmin())
+
+
+def test_stuck_values() -> None:
+    """Runs of at least min_samples equal daytime values are stuck."""
+    values = np.array([0, 0, 0, 0, 10, 20, 20, 20, np.nan, 20, 20, 30])
+    np.testing.assert_array_equal(
+        stuck_values(values, min_samples=3),
+        [0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0],
+    )
+    assert stuck_values(np.array([]), 3).size == 0
+
+
+def test_clear_sky_passes(clear_week: pd.DataFrame) -> None:
+    """Consistent clear-sky data passes every test."""
+    mask = quality_control(clear_week)
+    assert mask.dtype == np.uint16
+    assert (mask == 0).all()
+    assert (summarize(mask) == 0).all()
+
+
+@pytest.mark.parametrize(
+    "column, value, flag",
+    [
+        ("GHI", -10.0, QCFlag.GHI_PHYSICAL),
+        ("DNI", 1500.0, QCFlag.DNI_PHYSICAL),
+        ("DHI", 900.0, QCFlag.DHI_EXTREME),
+    ],
+)
+def test_component_faults(
+    clear_week: pd.DataFrame, column: str, value: float, flag: QCFlag
+) -> None:
+    """A faulty value sets its flag, and screening it only removes that component."""
+    row = _noon(clear_week)
+    clear_week.loc[row, column] = value
+    mask = quality_control(clear_week)
+    assert mask[row] & flag
+    screened = screen(clear_week, flags=flag, mask=mask)
+    assert np.isnan(screened.loc[row, column])
+    assert screened[["GHI", "DHI", "DNI"]].isna().sum().sum() == 1
+
+
+def test_missing(clear_week: pd.DataFrame) -> None:
+    """Missing values are flagged in the day only and not screened by default."""
+    night = int(clear_week["Zenith"].idxmax())
+    rows = [_noon(clear_week), night]
+    clear_week.loc[rows, "GHI"] = np.nan
+    mask = quality_control(clear_week)
+    assert mask[rows[0]] & QCFlag.MISSING
+    assert not mask[rows[1]] & QCFlag.MISSING
+    screened = screen(clear_week, mask=mask)
+    assert screened.loc[rows[0], ["DHI", "DNI"]].notna().all()
+
+
+def test_row_faults(clear_week: pd.DataFrame) -> None:
+    """Failed closure and clear-sky tests remove all three components."""
+    row = _noon(clear_week, day=2)
+    clear_week.loc[row, "GHI"] *= 2
+    mask = quality_control(clear_week)
+    assert mask[row] & QCFlag.CLOSURE
+    assert mask[row] & QCFlag.ABOVE_CLEAR_SKY
+    assert screen(clear_week, mask=mask).loc[row, ["GHI", "DHI", "DNI"]].isna().all()
+    # Only acting on the clear-sky test leaves the closure failure alone
+    kept = screen(clear_week, flags=QCFlag.GHI_PHYSICAL, mask=mask)
+    assert kept.loc[row, ["GHI", "DHI", "DNI"]].notna().all()
+
+
+def test_diffuse_ratio(clear_week: pd.DataFrame) -> None:
+    """More diffuse than global irradiance fails the diffuse ratio test."""
+    row = _noon(clear_week, day=1)
+    clear_week.loc[row, "DHI"] = 1.2 * clear_week.loc[row, "GHI"]
+    assert quality_control(clear_week)[row] & QCFlag.DIFFUSE_RATIO
+
+
+def test_stuck_sensor(clear_week: pd.DataFrame) -> None:
+    """A daytime value repeated for hours is stuck."""
+    row = _noon(clear_week, day=3)
+    rows = list(range(row - 2, row + 3))
+    clear_week.loc[rows, "DNI"] = clear_week.loc[row, "DNI"]
+    mask = quality_control(clear_week, stuck_window="3h")
+    assert all(mask[rows] & QCFlag.DNI_STUCK)
+    assert not (mask & QCFlag.GHI_STUCK).any()
+
+
+def test_measured_data(irradiance: pd.DataFrame) -> None:
+    """Most of the measured data passes and the flags are added as a column."""
+    df = add_qc_flags(irradiance, clear_sky="haurwitz")
+    assert "QC" not in irradiance.columns
+    day = df["Zenith"] < 85
+    assert (df.loc[day, "QC"] == 0).mean() > 0.9
+    with pytest.raises(ValueError):
+        quality_control(irradiance, clear_sky="solis")
@@ -0,0 +1,87 @@
+"""Tests of the result cache and its use by the Panel methods."""
+
+import numpy as np
+import pandas as pd
+
+from pv_assignments.utils.panel_irradiation import Panel
+from pv_assignments.utils.result_cache import (
+    ResultCache,
+    default_cache,
+    fingerprint,
+)
+
+
+def _frame(n: int, value: float = 0.0) -> pd.DataFrame:
+    """DataFrame of n float rows."""
+    return pd.DataFrame({"Insolation": np.full(n, value)})
+
+
+def test_fingerprint() -> None:
+    """The fingerprint follows the content, not the object."""
+    values = pd.Series(np.arange(10.0))
+    assert fingerprint("a", values) == fingerprint("a", values.copy())
+    assert fingerprint("a", values) != fingerprint("b", values)
+    assert fingerprint("a", values) != fingerprint("a", values + 1e-12)
+    times = pd.Series(pd.date_range("2024-01-01", periods=3, freq="h"))
+    assert fingerprint(times) != fingerprint(times.dt.tz_localize("UTC"))
+    assert fingerprint(np.arange(3)) != fingerprint(np.arange(3.0))
+
+
+def test_results_are_copies() -> None:
+    """Changing a stored or returned result does not change the cache."""
+    cache = ResultCache()
+    result = _frame(3, 1.0)
+    cache.put("key", result)
+    result["Insolation"] = 2.0
+    cached = cache.get("key")
+    cached["Insolation"] = 3.0
+    pd.testing.assert_frame_equal(cache.get("key"), _frame(3, 1.0))
+    assert cache.get("other") is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_lru_eviction() -> None:
+    """The least recently used results are evicted to stay within the budget."""
+    size = int(_frame(100).memory_usage(index=True, deep=True).sum())
+    cache = ResultCache(max_bytes=2 * size)
+    cache.put("a", _frame(100))
+    cache.put("b", _frame(100))
+    cache.get("a")
+    cache.put("c", _frame(100))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.nbytes == 2 * size
+    cache.put("large", _frame(1000))
+    assert cache.get("large") is None
+    assert len(cache) == 2
+
+
+def test_disk_tier() -> None:
+    """Results on disk are found by a new cache and removed by clear."""
+    ResultCache(disk=True).put("disk-key", _frame(5, 4.0))
+    cache = ResultCache(disk=True)
+    pd.testing.assert_frame_equal(cache.get("disk-key"), _frame(5, 4.0))
+    assert ResultCache().get("disk-key") is None
+    cache.clear(disk=True)
+    assert ResultCache(disk=True).get("disk-key") is None
+
+
+def test_panel_results_are_cached(irradiance: pd.DataFrame) -> None:
+    """Equal inputs hit the cache and changed inputs or panels miss it."""
+    data = irradiance.iloc[: 24 * 30]
+    panel = Panel(azimuth=15, tilt=35)
+    cache = default_cache()
+    first = panel.calculate_daily_insolation(data)
+    hits = cache.hits
+    pd.testing.assert_frame_equal(panel.calculate_daily_insolation(data.copy()), first)
+    assert cache.hits == hits + 1
+
+    misses = cache.misses
+    changed = data.copy()
+    changed.loc[changed.index[300], "DNI"] += 1
+    panel.calculate_daily_insolation(changed)
+    Panel(azimuth=15, tilt=36).calculate_daily_insolation(data)
+    assert cache.misses == misses + 2
+    pd.testing.assert_frame_equal(
+        first, panel.calculate_daily_insolation(data, cache=False)
+    )
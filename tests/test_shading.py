@@ -0,0 +1,108 @@
+"""Tests of the shading lookup table and the shaded panels."""
+
+import numpy as np
+import pytest
+
+from pv_assignments.utils.panel_irradiation import Panel, PanelArray
+from pv_assignments.utils.shading import ShadingTable
+from tests.test_panel_irradiation import _sun
+
+
+def test_unobstructed() -> None:
+    """Without rows or horizon nothing is shaded."""
+    shading = ShadingTable(30, 0)
+    assert (shading.table == 1).all()
+    assert shading.sky_view == 1.0
+
+
+def test_row_shading_closed_form() -> None:
+    """With the sun in front of the rows the unshaded fraction has a closed form."""
+    shading = ShadingTable(30, 0, pitch=4.0, collector_width=2.0)
+    elevation = np.array([5.0, 10.0, 20.0, 60.0])
+    expected = np.minimum(
+        4.0
+        * np.sin(np.radians(elevation))
+        / (2.0 * np.sin(np.radians(elevation + 30))),
+        1,
+    )
+    np.testing.assert_allclose(
+        shading.beam_fraction(np.zeros(4), elevation), expected, atol=1e-3
+    )
+    assert 0 < shading.sky_view < 1
+
+
+def test_wider_pitch_shades_less() -> None:
+    """Rows further apart shade less beam and block less sky."""
+    azimuth_sun, elevation_sun = np.linspace(-80, 80, 50), np.full(50, 12.0)
+    close = ShadingTable(30, 0, pitch=3.0, collector_width=2.0)
+    wide = ShadingTable(30, 0, pitch=6.0, collector_width=2.0)
+    assert (
+        wide.beam_fraction(azimuth_sun, elevation_sun)
+        >= close.beam_fraction(azimuth_sun, elevation_sun)
+    ).all()
+    assert wide.sky_view > close.sky_view
+
+
+def test_horizon() -> None:
+    """The beam is blocked while the sun is below the horizon profile."""
+    horizon = (np.array([-90.0, 0.0, 90.0, 180.0]), np.array([0.0, 20.0, 0.0, 0.0]))
+    shading = ShadingTable(30, 0, horizon=horizon)
+    np.testing.assert_allclose(
+        shading.beam_fraction([0.0, 0.0, 90.0], [10.0, 30.0, 10.0]), [0, 1, 1]
+    )
+    assert shading.sky_view < 1
+
+
+def test_invalid_geometry() -> None:
+    """Pitch and collector width are needed together and the pitch is positive."""
+    with pytest.raises(ValueError):
+        ShadingTable(30, 0, pitch=4.0)
+    with pytest.raises(ValueError):
+        ShadingTable(30, 0, pitch=0.0, collector_width=2.0)
+
+
+def test_shaded_panel_loses_beam() -> None:
+    """Shading lowers the beam and sky diffuse but not the ground component."""
+    dhi, dni, azimuth_sun, zenith_sun = _sun()
+    shading = ShadingTable(30, 0, pitch=3.0, collector_width=2.0)
+    unshaded = Panel(0, 30).calculate_gpoa_components(dhi, dni, azimuth_sun, zenith_sun)
+    shaded = Panel(0, 30, shading=shading).calculate_gpoa_components(
+        dhi, dni, azimuth_sun, zenith_sun
+    )
+    assert (shaded[0] <= unshaded[0] + 1e-9).all()
+    assert (shaded[0] < unshaded[0]).any()
+    np.testing.assert_allclose(shaded[1], unshaded[1] * shading.sky_view)
+    np.testing.assert_allclose(shaded[2], unshaded[2])
+
+
+def test_panel_array_matches_shaded_panels() -> None:
+    """PanelArray applies the shading tables of the individual panels."""
+    dhi, dni, azimuth_sun, zenith_sun = _sun()
+    shading = ShadingTable(30, 0, pitch=4.0, collector_width=2.0)
+    panels = [Panel(0, 30, shading=shading), Panel(90, 20)]
+    array = PanelArray.from_panels(panels)
+    gpoa = array.calculate_gpoa(dhi, dni, azimuth_sun, zenith_sun)
+    for i, panel in enumerate(panels):
+        np.testing.assert_allclose(
+            gpoa[i], panel.calculate_gpoa(dhi, dni, azimuth_sun, zenith_sun)
+        )
+
+
+def test_cos_aoi_out_is_not_shaded() -> None:
+    """cos_aoi_out receives the geometric cos(AOI) of a shaded panel."""
+    dhi, dni, azimuth_sun, zenith_sun = _sun()
+    shading = ShadingTable(30, 0, pitch=3.0, collector_width=2.0)
+    unshaded = Panel(0, 30)
+    expected = np.maximum(
+        unshaded.calculate_cos_angle_of_incidence(azimuth_sun, zenith_sun), 0
+    )
+    cos_aoi = np.empty(len(dhi))
+    Panel(0, 30, shading=shading).calculate_gpoa_components(
+        dhi, dni, azimuth_sun, zenith_sun, cos_aoi_out=cos_aoi
+    )
+    np.testing.assert_allclose(cos_aoi, expected)
+    cos_aoi = np.empty((1, len(dhi)))
+    PanelArray([0], [30], shading=[shading]).calculate_gpoa_components(
+        dhi, dni, azimuth_sun, zenith_sun, cos_aoi_out=cos_aoi
+    )
+    np.testing.assert_allclose(cos_aoi[0], expected)
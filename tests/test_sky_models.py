@@ -0,0 +1,89 @@
+"""Tests of the diffuse sky models of Panel and PanelArray."""
+
+import numpy as np
+import pytest
+
+from pv_assignments.utils.panel_irradiation import Panel, PanelArray
+from pv_assignments.utils.sky_models import SKY_MODELS, get_sky_model, perez
+from tests.test_panel_irradiation import ORIENTATIONS, _sun
+
+
+@pytest.mark.parametrize("sky_model", SKY_MODELS)
+def test_reduce_to_dhi_on_a_horizontal_panel(sky_model: str) -> None:
+    """Every sky model gives the DHI on a horizontal panel."""
+    dhi, dni, azimuth_sun, _ = _sun()
+    # Above 85 degrees the circumsolar terms are capped, so stay below it
+    zenith_sun = np.linspace(0, 84, len(dhi))
+    panel = Panel(0, 0, sky_model=sky_model)
+    _, diffuse, _ = panel.calculate_gpoa_components(
+        dhi, dni, azimuth_sun, zenith_sun, dni_extra=1361.0
+    )
+    np.testing.assert_allclose(diffuse, dhi)
+
+
+@pytest.mark.parametrize("sky_model", ["haydavies", "reindl", "perez"])
+def test_anisotropic_models_brighten_the_sun_facing_panel(sky_model: str) -> None:
+    """Circumsolar light adds diffuse irradiance on a panel facing the sun."""
+    dhi, dni = np.full(3, 100.0), np.full(3, 800.0)
+    azimuth_sun, zenith_sun = np.zeros(3), np.full(3, 40.0)
+    isotropic = Panel(0, 40).calculate_gpoa_components(
+        dhi, dni, azimuth_sun, zenith_sun
+    )[1]
+    anisotropic = Panel(0, 40, sky_model=sky_model).calculate_gpoa_components(
+        dhi, dni, azimuth_sun, zenith_sun, dni_extra=1361.0
+    )[1]
+    assert np.all(anisotropic > isotropic)
+
+
+@pytest.mark.parametrize("sky_model", SKY_MODELS)
+def test_non_negative(sky_model: str) -> None:
+    """The diffuse irradiance is never negative, also with a low sun."""
+    dhi, dni, azimuth_sun, _ = _sun(n=5000)
+    zenith_sun = np.linspace(80, 90, dhi.size)
+    for azimuth, tilt in ORIENTATIONS:
+        _, diffuse, _ = Panel(
+            azimuth, tilt, sky_model=sky_model
+        ).calculate_gpoa_components(dhi, dni, azimuth_sun, zenith_sun, dni_extra=1361.0)
+        assert (diffuse >= 0).all()
+
+
+def test_perez_is_clamped() -> None:
+    """Perez is clamped at 0 where f1 exceeds 1 behind the panel."""
+    tilt = np.radians(18.5)
+    zenith = np.array([89.88])
+    diffuse = perez(
+        dhi=np.array([290.9]),
+        dni=np.array([97.9]),
+        cos_aoi=np.array([-0.545]),
+        cos_zenith=np.cos(np.radians(zenith)),
+        zenith=zenith,
+        cos_tilt=np.cos(tilt),
+        sin_tilt=np.sin(tilt),
+        dni_extra=1361.0,
+    )
+    assert diffuse[0] == 0.0
+
+
+def test_unknown_sky_model() -> None:
+    """An unknown sky model raises ValueError."""
+    with pytest.raises(ValueError):
+        Panel(0, 30, sky_model="klucher")
+    with pytest.raises(ValueError):
+        get_sky_model("klucher")
+
+
+@pytest.mark.parametrize("sky_model", SKY_MODELS)
+def test_panel_array_matches_panels(sky_model: str) -> None:
+    """PanelArray gives the components of the individual panels."""
+    dhi, dni, azimuth_sun, zenith_sun = _sun()
+    panels = [Panel(a, t, rho_g=0.25, sky_model=sky_model) for a, t in ORIENTATIONS]
+    array = PanelArray.from_panels(panels)
+    components = array.calculate_gpoa_components(
+        dhi, dni, azimuth_sun, zenith_sun, dni_extra=1361.0
+    )
+    for i, panel in enumerate(panels):
+        expected = panel.calculate_gpoa_components(
+            dhi, dni, azimuth_sun, zenith_sun, dni_extra=1361.0
+        )
+        for value, reference in zip(components, expected, strict=True):
+            np.testing.assert_allclose(value[i], reference, atol=1e-9)
@@ -0,0 +1,78 @@
+"""Tests of the solar position against the angles in the part 2 data file."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.assignment_1.data.part_2_loader import load_data
+from pv_assignments.utils.solar_position import (
+    add_solar_position,
+    apparent_solar_time,
+    solar_position,
+)
+
+# Site of the part 2 data file
+LATITUDE, LONGITUDE = 55.6953, 12.0883
+
+
+@pytest.mark.parametrize(
+    "method, tolerance", [("noaa", (0.25, 0.1)), ("approximate", (0.5, 0.5))]
+)
+def test_matches_data_file(method: str, tolerance: tuple[float, float]) -> None:
+    """Elevation and azimuth agree with the file while the sun is up."""
+    df = load_data()
+    position = solar_position(df["DateTime"], LATITUDE, LONGITUDE, method=method)
+    up = (df["SolarElevation"] > 5).to_numpy()
+    elevation = position["Elevation"].to_numpy() - df["SolarElevation"].to_numpy()
+    # The file uses the north convention for the azimuth
+    azimuth = position["Azimuth"].to_numpy() - (df["SolarAzimuth"].to_numpy() - 180)
+    azimuth = (azimuth + 180) % 360 - 180
+    assert np.abs(elevation[up]).max() < tolerance[0]
+    assert np.abs(azimuth[up]).max() < tolerance[1]
+
+
+def test_zenith_and_elevation() -> None:
+    """The zenith is the complement of the elevation."""
+    times = pd.date_range("2024-06-01", periods=48, freq="h", tz="UTC")
+    position = solar_position(times, LATITUDE, LONGITUDE)
+    np.testing.assert_allclose(position["Zenith"] + position["Elevation"], 90)
+    pd.testing.assert_index_equal(position.index, times)
+
+
+def test_naive_times_are_utc() -> None:
+    """Naive timestamps give the same position as the same UTC timestamps."""
+    times = pd.date_range("2024-03-01", periods=24, freq="h")
+    pd.testing.assert_frame_equal(
+        solar_position(times, LATITUDE, LONGITUDE).reset_index(drop=True),
+        solar_position(times.tz_localize("UTC"), LATITUDE, LONGITUDE).reset_index(
+            drop=True
+        ),
+    )
+
+
+def test_solar_noon() -> None:
+    """At apparent noon the sun is due south and highest."""
+    times = pd.date_range("2024-06-21", periods=24 * 60, freq="min", tz="UTC")
+    position = solar_position(times, LATITUDE, LONGITUDE)
+    noon = position["Elevation"].to_numpy().argmax()
+    assert abs(position["Azimuth"].iloc[noon]) < 0.5
+    assert position["Elevation"].iloc[noon] == pytest.approx(
+        90 - LATITUDE + 23.44, abs=0.3
+    )
+    assert apparent_solar_time(times[noon : noon + 1], LONGITUDE)[0] == pytest.approx(
+        12, abs=1 / 60
+    )
+
+
+def test_unknown_method() -> None:
+    """An unknown method raises ValueError."""
+    with pytest.raises(ValueError):
+        solar_position(pd.DatetimeIndex(["2024-01-01"]), 0, 0, method="spa")
+
+
+def test_add_solar_position() -> None:
+    """The columns that Panel expects are added to a copy."""
+    df = pd.DataFrame({"DateTime": pd.date_range("2024-01-01", periods=3, freq="h")})
+    result = add_solar_position(df, LATITUDE, LONGITUDE)
+    assert list(df.columns) == ["DateTime"]
+    assert list(result.columns) == ["DateTime", "Azimuth", "Zenith"]
@@ -0,0 +1,79 @@
+"""Tests of the batch integration and peak search of the part 1 spectra."""
+
+import numpy as np
+import pytest
+
+from pv_assignments.assignment_1.data.part_1_loader import load_data
+from pv_assignments.assignment_1.part_1 import (
+    SILICON_BAND,
+    spectral_statistics,
+    stack_spectra,
+)
+
+pytestmark = pytest.mark.filterwarnings("ignore:Workbook contains no default style")
+
+HORIZONTAL = [
+    "Direct to horizontal plane (W/m2/nm)",
+    "Diffuse to horizontal plane (W/m2/nm)",
+    "Global to horizontal plane  (W/m2/nm)",
+]
+
+
+def test_matches_per_column_loop() -> None:
+    """Broadband integrals and peaks equal a loop over the columns."""
+    dfs = [load_data("1.5"), load_data("3")]
+    stats = spectral_statistics(*stack_spectra(dfs, ["AM 1.5", "AM 3"], HORIZONTAL))
+    assert stats.labels[0] == f"AM 1.5 - {HORIZONTAL[0]}"
+    assert stats.labels[-1] == f"AM 3 - {HORIZONTAL[-1]}"
+    i = 0
+    for df in dfs:
+        wavelengths = df["Wavelength (nm)"].to_numpy()
+        for column in HORIZONTAL:
+            values = df[column].to_numpy()
+            assert stats.broadband[i] == pytest.approx(
+                np.trapezoid(values, wavelengths)
+            )
+            assert stats.peak_wavelength[i] == wavelengths[np.argmax(values)]
+            assert stats.peak_irradiance[i] == values.max()
+            i += 1
+
+
+def test_band_integral() -> None:
+    """Bands are integrated with edges interpolated into the grid."""
+    wavelengths = np.array([0.0, 1.0, 2.0, 3.0])
+    spectra = np.array([[1.0, 1.0, 1.0, 1.0], [0.0, 1.0, 2.0, 3.0]])
+    stats = spectral_statistics(
+        wavelengths, spectra, ["flat", "ramp"], bands={"Mid": (0.5, 2.5)}
+    )
+    np.testing.assert_allclose(stats.broadband, [3.0, 4.5])
+    np.testing.assert_allclose(stats.bands["Mid"], [2.0, 3.0])
+
+
+def test_silicon_band_is_default() -> None:
+    """Without bands the silicon band is integrated."""
+    df = load_data("1.5")
+    stats = spectral_statistics(*stack_spectra([df], ["AM 1.5"], HORIZONTAL[2:]))
+    assert list(stats.bands) == ["Silicon"]
+    inside = df["Wavelength (nm)"].between(*SILICON_BAND)
+    assert stats.bands["Silicon"][0] == pytest.approx(
+        np.trapezoid(df[HORIZONTAL[2]][inside], df["Wavelength (nm)"][inside]),
+        rel=1e-2,
+    )
+    assert stats.bands["Silicon"][0] < stats.broadband[0]
+
+
+def test_components_close() -> None:
+    """Direct and diffuse integrate to the global horizontal irradiance."""
+    stats = spectral_statistics(
+        *stack_spectra([load_data("1.5")], ["AM 1.5"], HORIZONTAL)
+    )
+    direct, diffuse, total = stats.broadband
+    assert direct + diffuse == pytest.approx(total, rel=1e-2)
+
+
+def test_different_grids() -> None:
+    """Spectra on different wavelength grids cannot be stacked."""
+    df = load_data("1.5")
+    shifted = df.assign(**{"Wavelength (nm)": df["Wavelength (nm)"] + 1})
+    with pytest.raises(ValueError):
+        stack_spectra([df, shifted], ["a", "b"], HORIZONTAL)
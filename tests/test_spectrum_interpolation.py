@@ -0,0 +1,62 @@
+"""Tests of the interpolation of the spectra over air mass and water vapor."""
+
+import numpy as np
+import pytest
+
+from pv_assignments.assignment_1.data.spectrum_interpolation import (
+    REFERENCE_WATER_VAPOR,
+    SpectralInterpolator,
+)
+from pv_assignments.assignment_1.data.spectrum_store import default_store
+
+pytestmark = pytest.mark.filterwarnings("ignore:Workbook contains no default style")
+
+COLUMN = "Global to perpendicular plane  (W/m2/nm)"
+
+
+@pytest.fixture(scope="module")
+def interpolator() -> SpectralInterpolator:
+    """Interpolator of the global spectrum."""
+    return SpectralInterpolator(COLUMN)
+
+
+@pytest.mark.parametrize(
+    "am, water_vapor",
+    [("1.5", None), ("3", None), ("6", None), ("1.5", "0"), ("1.5", "2.13")],
+)
+def test_reproduces_grid(
+    interpolator: SpectralInterpolator, am: str, water_vapor: str | None
+) -> None:
+    """The spectra of the workbooks are returned at their grid points."""
+    expected = default_store().column(am, water_vapor, COLUMN)
+    wp = REFERENCE_WATER_VAPOR if water_vapor is None else float(water_vapor)
+    np.testing.assert_allclose(
+        interpolator(float(am), wp)[0], expected, rtol=1e-9, atol=1e-12
+    )
+
+
+def test_log_linear_between_grid_points(interpolator: SpectralInterpolator) -> None:
+    """Halfway between two air masses the spectrum is their geometric mean."""
+    store = default_store()
+    low, high = store.column("3", None, COLUMN), store.column("4.5", None, COLUMN)
+    positive = (low > 0) & (high > 0)
+    np.testing.assert_allclose(
+        interpolator(3.75)[0][positive], np.sqrt(low * high)[positive], rtol=1e-9
+    )
+
+
+def test_broadcasts_pairs(interpolator: SpectralInterpolator) -> None:
+    """Air masses and water vapors broadcast to one spectrum per pair."""
+    spectra = interpolator(np.array([1.5, 2.0, 5.0]), 1.0)
+    assert spectra.shape == (3, interpolator.wavelengths.size)
+    for i, am in enumerate([1.5, 2.0, 5.0]):
+        np.testing.assert_allclose(spectra[i], interpolator(am, 1.0)[0])
+
+
+def test_attenuation_grows(interpolator: SpectralInterpolator) -> None:
+    """More air mass or water vapor lowers the broadband irradiance."""
+    wavelengths = interpolator.wavelengths
+    broadband = np.trapezoid(interpolator([1.5, 2.5, 5.0]), wavelengths, axis=1)
+    assert np.all(np.diff(broadband) < 0)
+    broadband = np.trapezoid(interpolator(2.0, [0.2, 1.0, 2.0]), wavelengths, axis=1)
+    assert np.all(np.diff(broadband) < 0)
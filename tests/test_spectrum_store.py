@@ -0,0 +1,73 @@
+"""Tests of the spectrum store against plain pandas reads of the workbooks."""
+
+from importlib import resources
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.assignment_1.data import part_1_loader
+from pv_assignments.assignment_1.data.spectrum_store import (
+    DATA_PACKAGE,
+    SHEET_NAME,
+    SpectrumStore,
+    available_spectra,
+    spectrum_file_name,
+)
+
+pytestmark = pytest.mark.filterwarnings("ignore:Workbook contains no default style")
+
+
+def _read_workbook(am: str, water_vapor: str | None) -> pd.DataFrame:
+    """Read a spectrum workbook with pandas only."""
+    file_name = spectrum_file_name(am, water_vapor)
+    with resources.files(DATA_PACKAGE).joinpath(file_name).open("rb") as f:
+        return pd.read_excel(f, sheet_name=SHEET_NAME)
+
+
+def test_file_names() -> None:
+    """File names follow the air mass and water vapor of the spectrum."""
+    assert spectrum_file_name("1.5") == "Spectrum_AM1_5.xlsx"
+    assert spectrum_file_name("1.5", "0.71") == "Spectrum_AM1_5_WP0_71.xlsx"
+    assert ("4.5", None) in available_spectra()
+    assert ("1.5", "2.13") in available_spectra()
+
+
+@pytest.mark.parametrize("am, water_vapor", available_spectra())
+def test_store_matches_workbook(am: str, water_vapor: str | None) -> None:
+    """Converted and memory-mapped spectra equal the workbook."""
+    expected = _read_workbook(am, water_vapor)
+    store = SpectrumStore()
+    # The first read may convert the workbook, the second memory-maps the cache
+    pd.testing.assert_frame_equal(store.to_frame(am, water_vapor), expected)
+    store.clear()
+    pd.testing.assert_frame_equal(SpectrumStore().to_frame(am, water_vapor), expected)
+
+
+def test_columns_and_wavelengths() -> None:
+    """Columns and the wavelength grid equal the workbook."""
+    expected = _read_workbook("3", None)
+    store = SpectrumStore(maxsize=1)
+    assert store.columns == expected.columns.drop("Wavelength (nm)").tolist()
+    np.testing.assert_array_equal(store.wavelengths, expected["Wavelength (nm)"])
+    for name in store.columns:
+        np.testing.assert_array_equal(store.column("3", None, name), expected[name])
+
+
+def test_spectra_are_read_only() -> None:
+    """The cached arrays cannot be changed through the views."""
+    with pytest.raises(ValueError):
+        SpectrumStore().get("1.5")[0, 0] = 0.0
+
+
+def test_unknown_spectrum() -> None:
+    """A spectrum without a workbook raises FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        SpectrumStore().get("2")
+
+
+def test_part_1_loader_matches_workbook() -> None:
+    """The part 1 loader returns the workbook sheet."""
+    pd.testing.assert_frame_equal(
+        part_1_loader.load_data("1.5", "0.71"), _read_workbook("1.5", "0.71")
+    )
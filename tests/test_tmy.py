@@ -0,0 +1,115 @@
+"""Tests of the typical meteorological year."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.tmy import build_tmy, daily_means, finkelstein_schafer
+
+
+def _archive(tz: str | None = None) -> pd.DataFrame:
+    """Three hourly years, each day at a constant irradiance.
+
+    Within a month the daily values of 2023 are 1 to n, those of 2024 are shifted
+    by half a month and those of 2025 by a whole month, so 2024 is the year closest
+    to the long-term distribution of every month.
+    """
+    parts = []
+    for shift, year in zip((0, 0.5, 1), (2023, 2024, 2025), strict=True):
+        date_time = pd.date_range(
+            f"{year}-01-01", f"{year + 1}-01-01", freq="h", inclusive="left", tz=tz
+        )
+        value = date_time.day + shift * date_time.days_in_month
+        parts.append(
+            pd.DataFrame({"DateTime": date_time, "GHI": value, "DNI": 2 * value})
+        )
+    return pd.concat(parts, ignore_index=True)
+
+
+def test_finkelstein_schafer_known_values() -> None:
+    """FS statistic of a hand-computed example."""
+    values = np.array([1.0, 2.0, 3.0, 4.0])
+    groups = np.array([0, 0, 1, 1])
+    # Long-term CDF 1/4, 2/4, 3/4, 1 against 1/2, 1 for both candidates
+    np.testing.assert_allclose(
+        finkelstein_schafer(values, groups, 3), [0.375, 0.125, np.nan]
+    )
+
+
+def test_finkelstein_schafer_ties() -> None:
+    """Tied values get the same CDF in the candidate and the long term."""
+    values = np.array([1.0, 1.0, 2.0, 2.0, 2.0, 1.0])
+    groups = np.array([0, 0, 1, 1, 2, 2])
+    # Long-term CDF is 1/2 at 1 and 1 at 2, candidate 2 has 1/2 at 1 and 1 at 2
+    np.testing.assert_allclose(finkelstein_schafer(values, groups, 3), [0.5, 0, 0])
+
+
+def test_identical_candidates_have_no_distance() -> None:
+    """Candidates with the long-term distribution have an FS of 0."""
+    rng = np.random.default_rng(0)
+    values = np.tile(rng.normal(size=30), 4)
+    groups = np.repeat(np.arange(4), 30)
+    np.testing.assert_allclose(finkelstein_schafer(values, groups, 4), 0, atol=1e-15)
+
+
+def test_daily_means() -> None:
+    """Daily means count missing values as 0."""
+    df = pd.DataFrame(
+        {
+            "DateTime": pd.to_datetime(
+                ["2024-01-31 10:00", "2024-01-31 11:00", "2024-02-01 12:00"]
+            ),
+            "GHI": [100.0, np.nan, 50.0],
+        }
+    )
+    daily = daily_means(df, ["GHI"])
+    assert daily["Year"].tolist() == [2024, 2024]
+    assert daily["Month"].tolist() == [1, 2]
+    assert daily["GHI"].tolist() == [50.0, 50.0]
+
+
+def test_build_tmy_picks_the_typical_year() -> None:
+    """The year in the middle of the distribution is picked every month."""
+    tmy = build_tmy(_archive(), year=2023)
+    assert (tmy.years == 2024).all()
+    assert tmy.statistics.shape == (3, 12)
+    assert (tmy.statistics.idxmin() == 2024).all()
+    # February 29 of 2024 is dropped in the common year 2023
+    assert len(tmy.data) == 8760
+    assert (tmy.data["DateTime"].dt.year == 2023).all()
+    assert tmy.data["DateTime"].is_monotonic_increasing
+
+
+def test_build_tmy_skips_months_without_enough_data() -> None:
+    """Months below the coverage are no candidates."""
+    df = _archive()
+    date_time = pd.DatetimeIndex(df["DateTime"])
+    df = df[~((date_time.year == 2024) & (date_time.month == 3) & (date_time.day > 5))]
+    tmy = build_tmy(df)
+    assert np.isnan(tmy.statistics.loc[2024, 3])
+    assert tmy.years[3] != 2024
+    assert (tmy.years.drop(3) == 2024).all()
+
+
+def test_build_tmy_needs_every_month() -> None:
+    """A calendar month without data raises ValueError."""
+    df = _archive()
+    with pytest.raises(ValueError):
+        build_tmy(df[pd.DatetimeIndex(df["DateTime"]).month != 7])
+
+
+def test_build_tmy_in_a_time_zone_with_dst() -> None:
+    """Months are moved across the DST changes of a named time zone."""
+    tmy = build_tmy(_archive("Europe/Copenhagen"), year=2023)
+    assert (tmy.years == 2024).all()
+    date_time = tmy.data["DateTime"]
+    assert str(date_time.dt.tz) == "Europe/Copenhagen"
+    assert (date_time.dt.year == 2023).all()
+    assert date_time.is_monotonic_increasing and date_time.is_unique
+    # 2023 has 8760 hours. 02:00 on March 31 and the summer time 02:00 on October
+    # 29 are missing in 2024, where DST changed on other days
+    assert len(tmy.data) == 8758
+    assert pd.Timestamp("2023-03-26 02:00") not in date_time.dt.tz_localize(None)
+    # The repeated 02:00 of October 27, 2024 is kept once
+    on_day = date_time[date_time.dt.strftime("%m-%d") == "10-27"]
+    assert len(on_day) == 24
@@ -0,0 +1,117 @@
+"""Tests of the single and dual axis trackers."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.panel_irradiation import Panel
+from pv_assignments.utils.tracking import DualAxisTracker, SingleAxisTracker
+
+
+def _day_sun(n: int = 500, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Random sun positions above the horizon."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-180, 180, n), rng.uniform(0, 89, n)
+
+
+def test_dual_axis_faces_the_sun() -> None:
+    """A dual axis tracker has normal incidence whenever the sun is up."""
+    azimuth_sun, zenith_sun = _day_sun()
+    panel = DualAxisTracker().panel(azimuth_sun, zenith_sun)
+    np.testing.assert_allclose(
+        panel.calculate_cos_angle_of_incidence(azimuth_sun, zenith_sun), 1, atol=1e-9
+    )
+    _, tilt = DualAxisTracker(max_tilt=60).orientation(azimuth_sun, zenith_sun)
+    np.testing.assert_allclose(tilt, np.minimum(zenith_sun, 60))
+
+
+def test_horizontal_axis_closed_form() -> None:
+    """A horizontal north-south axis rotates to atan(tan(zenith) sin(azimuth))."""
+    azimuth_sun, zenith_sun = _day_sun()
+    tracker = SingleAxisTracker(max_angle=90, backtrack=False)
+    expected = np.degrees(
+        np.arctan2(
+            np.sin(np.radians(zenith_sun)) * np.sin(np.radians(azimuth_sun)),
+            np.cos(np.radians(zenith_sun)),
+        )
+    )
+    np.testing.assert_allclose(tracker.rotation(azimuth_sun, zenith_sun), expected)
+
+
+def _rotated_panel(
+    axis_tilt: float, axis_azimuth: float, rotation: np.ndarray
+) -> Panel:
+    """Panel of a single axis tracker at the given rotation (degrees)."""
+    rotation, axis_tilt = np.radians(rotation), np.radians(axis_tilt)
+    x = np.sin(rotation)
+    y = np.cos(rotation) * np.sin(axis_tilt)
+    z = np.cos(rotation) * np.cos(axis_tilt)
+    return Panel(
+        azimuth=axis_azimuth + np.degrees(np.arctan2(x, y)),
+        tilt=np.degrees(np.arccos(z)),
+    )
+
+
+@pytest.mark.parametrize("axis_tilt, axis_azimuth", [(0, 0), (20, 0), (10, 30)])
+def test_rotation_minimizes_aoi(axis_tilt: float, axis_azimuth: float) -> None:
+    """Without limits, turning the panel away from the rotation lowers cos(AOI)."""
+    azimuth_sun, zenith_sun = _day_sun()
+    tracker = SingleAxisTracker(axis_tilt, axis_azimuth, max_angle=180, backtrack=False)
+    best = tracker.panel(azimuth_sun, zenith_sun).calculate_cos_angle_of_incidence(
+        azimuth_sun, zenith_sun
+    )
+    rotation = tracker.rotation(azimuth_sun, zenith_sun)
+    for offset in (-2.0, 2.0):
+        other = _rotated_panel(
+            axis_tilt, axis_azimuth, rotation + offset
+        ).calculate_cos_angle_of_incidence(azimuth_sun, zenith_sun)
+        assert (other < best).all()
+
+
+def test_limits_and_backtracking() -> None:
+    """Backtracking and the rotation limit only ever reduce the rotation."""
+    azimuth_sun, zenith_sun = _day_sun()
+    ideal = SingleAxisTracker(max_angle=90, backtrack=False).rotation(
+        azimuth_sun, zenith_sun
+    )
+    limited = SingleAxisTracker(max_angle=45, backtrack=False).rotation(
+        azimuth_sun, zenith_sun
+    )
+    backtracked = SingleAxisTracker(max_angle=90, gcr=0.4).rotation(
+        azimuth_sun, zenith_sun
+    )
+    np.testing.assert_allclose(limited, np.clip(ideal, -45, 45), atol=1e-9)
+    assert (np.abs(backtracked) <= np.abs(ideal) + 1e-9).all()
+    # Backtracking only starts once the rows would shade each other
+    no_shade = np.abs(np.cos(np.radians(ideal))) >= 0.4
+    np.testing.assert_allclose(backtracked[no_shade], ideal[no_shade], atol=1e-9)
+    # Near sunrise the tracker is back close to flat
+    assert abs(SingleAxisTracker(gcr=0.4).rotation(-90, 89.5)) < 5
+
+
+def test_stow_at_night() -> None:
+    """With the sun below the horizon the trackers lie flat."""
+    for tracker in (SingleAxisTracker(), DualAxisTracker()):
+        _, tilt = tracker.orientation(np.array([30.0]), np.array([100.0]))
+        assert tilt[0] == 0.0
+
+
+def test_invalid_gcr() -> None:
+    """The ground coverage ratio must be in (0, 1]."""
+    with pytest.raises(ValueError):
+        SingleAxisTracker(gcr=0)
+
+
+def test_tracking_gains(irradiance: pd.DataFrame) -> None:
+    """Tracking collects more than a flat panel, and dual axis the most."""
+    azimuth_sun = irradiance["Azimuth"].to_numpy()
+    zenith_sun = irradiance["Zenith"].to_numpy()
+    totals = [
+        panel.calculate_daily_insolation(irradiance, cache=False)["Insolation"].sum()
+        for panel in (
+            Panel(0, 0),
+            SingleAxisTracker().panel(azimuth_sun, zenith_sun),
+            DualAxisTracker().panel(azimuth_sun, zenith_sun),
+        )
+    ]
+    assert totals[0] < totals[1] < totals[2]
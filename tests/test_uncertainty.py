@@ -0,0 +1,85 @@
+"""Tests of the Monte Carlo insolation ensembles."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pv_assignments.utils.panel_irradiation import Panel, mean_annual_insolation
+from pv_assignments.utils.shading import ShadingTable
+from pv_assignments.utils.uncertainty import exceedance_levels, insolation_ensemble
+
+NO_SPREAD = {
+    "rho_g_std": 0.0,
+    "dhi_bias_std": 0.0,
+    "dni_bias_std": 0.0,
+    "azimuth_std": 0.0,
+    "tilt_std": 0.0,
+}
+
+
+@pytest.mark.parametrize("sky_model", ["isotropic", "perez"])
+def test_zero_spread_matches_panel(irradiance: pd.DataFrame, sky_model: str) -> None:
+    """Without spread every level equals Panel's insolation."""
+    panel = Panel(20, 40, rho_g=0.25, sky_model=sky_model)
+    ensemble = panel.calculate_insolation_ensemble(irradiance, n_samples=4, **NO_SPREAD)
+    monthly = panel.calculate_monthly_insolation(irradiance, cache=False)
+    assert ensemble.monthly["DateTime"].tolist() == monthly["DateTime"].tolist()
+    for level in ("P50", "P90"):
+        np.testing.assert_allclose(ensemble.monthly[level], monthly["Insolation"])
+    annual = mean_annual_insolation(
+        panel.calculate_daily_insolation(irradiance, cache=False)
+    )
+    np.testing.assert_allclose(ensemble.annual, annual["Insolation"])
+
+    horizontal = mean_annual_insolation(
+        Panel(0, 0).calculate_daily_insolation(irradiance, cache=False)
+    )
+    np.testing.assert_allclose(
+        ensemble.transposition_factor,
+        annual["Insolation"] / horizontal["Insolation"],
+    )
+
+
+def test_chunks_and_workers_do_not_change_the_samples(
+    irradiance: pd.DataFrame,
+) -> None:
+    """Chunking and worker processes give the same ensemble."""
+    panel = Panel(0, 45)
+    one_chunk = insolation_ensemble(panel, irradiance, n_samples=12)
+    chunked = insolation_ensemble(
+        panel, irradiance, n_samples=12, max_bytes=2**20, workers=2
+    )
+    pd.testing.assert_frame_equal(one_chunk.samples, chunked.samples)
+    pd.testing.assert_frame_equal(one_chunk.monthly, chunked.monthly)
+
+
+def test_seed_sets_the_samples(irradiance: pd.DataFrame) -> None:
+    """The same seed gives the same samples and another seed does not."""
+    panel = Panel(0, 45)
+    first = insolation_ensemble(panel, irradiance, n_samples=4, seed=1)
+    again = insolation_ensemble(panel, irradiance, n_samples=4, seed=1)
+    other = insolation_ensemble(panel, irradiance, n_samples=4, seed=2)
+    pd.testing.assert_frame_equal(first.samples, again.samples)
+    assert not first.samples.equals(other.samples)
+
+
+def test_p90_is_below_p50(irradiance: pd.DataFrame) -> None:
+    """P90 is exceeded more often than P50, so it is lower."""
+    ensemble = insolation_ensemble(Panel(0, 45), irradiance, n_samples=50)
+    assert ensemble.annual["P90"] < ensemble.annual["P50"]
+    assert (ensemble.monthly["P90"] <= ensemble.monthly["P50"]).all()
+
+
+def test_exceedance_levels() -> None:
+    """Exceedance levels are the complementary percentiles."""
+    values = np.arange(101.0)
+    np.testing.assert_allclose(exceedance_levels(values, (50, 90, 10)), [50, 10, 90])
+
+
+def test_varying_orientation_with_shading_is_rejected(
+    irradiance: pd.DataFrame,
+) -> None:
+    """A shading table cannot follow a varying orientation."""
+    panel = Panel(0, 30, shading=ShadingTable(30, 0, pitch=4.0, collector_width=2.0))
+    with pytest.raises(ValueError):
+        insolation_ensemble(panel, irradiance, n_samples=2)